@@ -0,0 +1,4 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Benchmarks for photutils using airspeed velocity (asv).
+"""
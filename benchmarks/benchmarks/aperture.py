@@ -0,0 +1,51 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Benchmarks for the aperture subpackage.
+"""
+
+import numpy as np
+
+from photutils.aperture import (ApertureStats, CircularAnnulus,
+                                CircularAperture, EllipticalAperture,
+                                RectangularAperture, aperture_photometry)
+
+from .common import make_star_image
+
+
+def make_aperture(shape, positions):
+    if shape == 'circle':
+        return CircularAperture(positions, r=5.0)
+    if shape == 'ellipse':
+        return EllipticalAperture(positions, a=6.0, b=4.0, theta=0.5)
+    return RectangularAperture(positions, w=8.0, h=5.0, theta=0.5)
+
+
+class TimeAperturePhotometry:
+    params = ([100, 1000], ['circle', 'ellipse', 'rectangle'],
+              ['exact', 'center', 'subpixel'])
+    param_names = ('n_sources', 'shape', 'method')
+
+    def setup(self, n_sources, shape, method):
+        self.data, params = make_star_image(1000, n_sources)
+        positions = np.column_stack((params['x_0'], params['y_0']))
+        self.aperture = make_aperture(shape, positions)
+
+    def time_aperture_photometry(self, n_sources, shape, method):
+        aperture_photometry(self.data, self.aperture, method=method)
+
+
+class TimeApertureStats:
+    params = (100, 1000)
+    param_names = ('n_sources',)
+
+    def setup(self, n_sources):
+        self.data, params = make_star_image(1000, n_sources)
+        positions = np.column_stack((params['x_0'], params['y_0']))
+        self.aperture = CircularAperture(positions, r=5.0)
+        self.annulus = CircularAnnulus(positions, r_in=8.0, r_out=12.0)
+
+    def time_aperture_stats(self, n_sources):
+        ApertureStats(self.data, self.aperture).to_table()
+
+    def time_aperture_stats_annulus(self, n_sources):
+        ApertureStats(self.data, self.annulus).to_table()
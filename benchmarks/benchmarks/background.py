@@ -0,0 +1,36 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Benchmarks for the background subpackage.
+"""
+
+import numpy as np
+
+from photutils.background import Background2D
+
+from .common import make_star_image
+
+
+class TimeBackground2D:
+    params = ([500, 2000], [(32, 32), (64, 64)])
+    param_names = ('size', 'box_size')
+
+    def setup(self, size, box_size):
+        self.data, _ = make_star_image(size, size // 4)
+        self.mask = np.zeros(self.data.shape, dtype=bool)
+        self.mask[size // 4:size // 2, size // 4:size // 2] = True
+        self.bkg = Background2D(self.data, box_size)
+
+    def time_background2d(self, size, box_size):
+        Background2D(self.data, box_size)
+
+    def time_background2d_mask(self, size, box_size):
+        Background2D(self.data, box_size, mask=self.mask)
+
+    def time_background_image(self, size, box_size):
+        Background2D(self.data, box_size).background  # noqa: B018
+
+    def time_with_mask(self, size, box_size):
+        self.bkg.with_mask(self.data, self.mask)
+
+    def peakmem_background2d(self, size, box_size):
+        Background2D(self.data, box_size)
@@ -0,0 +1,48 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Synthetic data shared by the benchmarks.
+
+All data are generated with fixed seeds from the simulation functions
+in photutils, so the benchmarks run offline and are reproducible.
+"""
+
+from functools import cache
+
+from photutils.datasets import make_noise_image
+from photutils.psf import CircularGaussianPRF, make_psf_model_image
+
+FWHM = 3.0
+
+
+@cache
+def make_star_image(size, n_sources):
+    """
+    Make a square image of Gaussian PRF stars on a noisy background.
+
+    Parameters
+    ----------
+    size : int
+        The size of the square image along each axis.
+
+    n_sources : int
+        The number of stars.
+
+    Returns
+    -------
+    data : 2D `~numpy.ndarray`
+        The simulated image, including a constant background of 5 and
+        Gaussian noise with a standard deviation of 2.
+
+    params : `~astropy.table.Table`
+        The true (x, y, flux) parameters of the stars.
+    """
+    psf_model = CircularGaussianPRF(fwhm=FWHM)
+    data, params = make_psf_model_image((size, size), psf_model, n_sources,
+                                        model_shape=(11, 11),
+                                        flux=(500, 2000), min_separation=5,
+                                        seed=0)
+    data += make_noise_image(data.shape, distribution='gaussian', mean=5.0,
+                             stddev=2.0, seed=0)
+    data.flags.writeable = False
+    return data, params
+
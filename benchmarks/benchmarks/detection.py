@@ -0,0 +1,22 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Benchmarks for the detection subpackage.
+"""
+
+from photutils.detection import DAOStarFinder, IRAFStarFinder
+
+from .common import FWHM, make_star_image
+
+
+class TimeStarFinders:
+    params = ([500, 2000], [100, 1000], ['dao', 'iraf'])
+    param_names = ('size', 'n_sources', 'finder')
+
+    def setup(self, size, n_sources, finder):
+        data, _ = make_star_image(size, n_sources)
+        self.data = data - 5.0  # subtract the background
+        finder_class = DAOStarFinder if finder == 'dao' else IRAFStarFinder
+        self.finder = finder_class(threshold=10.0, fwhm=FWHM)
+
+    def time_find_stars(self, size, n_sources, finder):
+        self.finder(self.data)
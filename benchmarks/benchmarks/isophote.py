@@ -0,0 +1,30 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Benchmarks for the isophote subpackage.
+"""
+
+import numpy as np
+from astropy.modeling.models import Sersic2D
+
+from photutils.datasets import make_noise_image
+from photutils.isophote import Ellipse, EllipseGeometry
+
+
+class TimeEllipse:
+    params = ([128, 256], ['bilinear', 'mean'])
+    param_names = ('size', 'integrmode')
+
+    def setup(self, size, integrmode):
+        center = size / 2
+        model = Sersic2D(amplitude=100, r_eff=size / 8, n=2, x_0=center,
+                         y_0=center, ellip=0.3, theta=0.5)
+        yy, xx = np.mgrid[0:size, 0:size]
+        self.data = model(xx, yy) + make_noise_image(
+            (size, size), distribution='gaussian', mean=0.0, stddev=1.0,
+            seed=0)
+        self.geometry = EllipseGeometry(center, center, sma=size / 10,
+                                        eps=0.3, pa=0.5)
+
+    def time_ellipse_fit_image(self, size, integrmode):
+        ellipse = Ellipse(self.data, geometry=self.geometry)
+        ellipse.fit_image(maxsma=size / 4, integrmode=integrmode)
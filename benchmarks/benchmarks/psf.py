@@ -0,0 +1,124 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Benchmarks for the psf subpackage.
+"""
+
+from itertools import product
+
+import numpy as np
+from astropy.modeling.models import Gaussian2D
+from astropy.nddata import NDData
+from astropy.table import Table
+
+from photutils.detection import DAOStarFinder
+from photutils.psf import (AiryDiskPSF, CircularGaussianPRF, EPSFBuilder,
+                           GaussianPRF, GriddedPSFModel,
+                           IterativePSFPhotometry, MoffatPSF, PSFPhotometry,
+                           SourceGrouper, extract_stars)
+
+from .common import FWHM, make_star_image
+
+
+class _PSFPhotometryBase:
+    params = ([100, 500], [False, True])
+    param_names = ('n_sources', 'grouped')
+
+    def setup(self, n_sources, grouped):
+        data, params = make_star_image(1000, n_sources)
+        self.data = data - 5.0  # subtract the background
+        self.error = np.full(self.data.shape, 2.0)
+        self.init_params = Table()
+        self.init_params['x'] = params['x_0']
+        self.init_params['y'] = params['y_0']
+        self.psf_model = CircularGaussianPRF(fwhm=FWHM)
+        self.grouper = SourceGrouper(min_separation=8.0) if grouped else None
+        self.finder = DAOStarFinder(threshold=10.0, fwhm=FWHM)
+
+
+class TimePSFPhotometry(_PSFPhotometryBase):
+    def time_psf_photometry(self, n_sources, grouped):
+        psfphot = PSFPhotometry(self.psf_model, (7, 7),
+                                grouper=self.grouper, aperture_radius=4)
+        psfphot(self.data, error=self.error, init_params=self.init_params)
+
+    def time_psf_photometry_finder(self, n_sources, grouped):
+        psfphot = PSFPhotometry(self.psf_model, (7, 7), finder=self.finder,
+                                grouper=self.grouper, aperture_radius=4)
+        psfphot(self.data, error=self.error)
+
+
+class TimeIterativePSFPhotometry(_PSFPhotometryBase):
+    def time_iterative_psf_photometry(self, n_sources, grouped):
+        psfphot = IterativePSFPhotometry(self.psf_model, (7, 7), self.finder,
+                                         grouper=self.grouper, maxiters=2,
+                                         aperture_radius=4)
+        psfphot(self.data, error=self.error)
+
+
+class TimeEPSFBuilder:
+    params = ([25, 100], [2, 4])
+    param_names = ('n_stars', 'oversampling')
+
+    def setup(self, n_stars, oversampling):
+        data, params = make_star_image(1000, n_stars)
+        stars_tbl = Table()
+        stars_tbl['x'] = params['x_0']
+        stars_tbl['y'] = params['y_0']
+        self.stars = extract_stars(NDData(data - 5.0), stars_tbl, size=15)
+
+    def time_epsf_builder(self, n_stars, oversampling):
+        epsf_builder = EPSFBuilder(oversampling=oversampling, maxiters=3,
+                                   progress_bar=False)
+        epsf_builder(self.stars)
+
+
+class TimeGriddedPSFModel:
+    params = ([11, 51], [1, 1000])
+    param_names = ('size', 'n_evaluations')
+
+    def setup(self, size, n_evaluations):
+        yy, xx = np.mgrid[0:101, 0:101]
+        psfs = [Gaussian2D(1, 50, 50, 10, 5, theta=np.deg2rad(i * 10.0))(
+            xx, yy) for i in range(16)]
+        grid = [0, 300, 600, 900]
+        meta = {'grid_xypos': list(product(grid, grid)), 'oversampling': 4}
+        self.model = GriddedPSFModel(NDData(np.array(psfs), meta=meta))
+
+        rng = np.random.default_rng(0)
+        self.x_0 = rng.uniform(0, 900, n_evaluations)
+        self.y_0 = rng.uniform(0, 900, n_evaluations)
+        self.yy, self.xx = np.mgrid[0:size, 0:size] - (size - 1) / 2
+
+    def time_gridded_psf_model_evaluate(self, size, n_evaluations):
+        for x_0, y_0 in zip(self.x_0, self.y_0, strict=True):
+            self.model.evaluate(self.xx + x_0, self.yy + y_0, 1.0, x_0, y_0)
+
+
+class TimeFunctionalModels:
+    params = ['CircularGaussianPRF', 'GaussianPRF', 'MoffatPSF',
+              'AiryDiskPSF']
+    param_names = ('model',)
+
+    def setup(self, model):
+        models = {
+            'CircularGaussianPRF': CircularGaussianPRF(fwhm=FWHM),
+            'GaussianPRF': GaussianPRF(x_fwhm=FWHM, y_fwhm=1.5 * FWHM,
+                                       theta=30.0),
+            'MoffatPSF': MoffatPSF(alpha=FWHM, beta=2.5),
+            'AiryDiskPSF': AiryDiskPSF(radius=FWHM),
+        }
+        self.model = models[model]
+        self.param_values = [np.atleast_1d(value)
+                             for value in self.model.parameters]
+        # a 25x25 fit_shape
+        yy, xx = np.mgrid[0:25, 0:25] - 12.0
+        self.xx = xx.ravel()
+        self.yy = yy.ravel()
+
+    def time_evaluate(self, model):
+        for _ in range(100):
+            self.model.evaluate(self.xx, self.yy, *self.param_values)
+
+    def time_fit_deriv(self, model):
+        for _ in range(100):
+            self.model.fit_deriv(self.xx, self.yy, *self.param_values)
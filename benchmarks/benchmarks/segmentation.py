@@ -0,0 +1,37 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Benchmarks for the segmentation subpackage.
+"""
+
+from photutils.segmentation import (SourceCatalog, deblend_sources,
+                                    detect_sources)
+
+from .common import make_star_image
+
+
+class _SegmentationBase:
+    params = ([500, 2000], [100, 1000])
+    param_names = ('size', 'n_sources')
+
+    def setup(self, size, n_sources):
+        data, _ = make_star_image(size, n_sources)
+        self.data = data - 5.0  # subtract the background
+        self.threshold = 3.0 * 2.0
+        self.npixels = 5
+        self.segm = detect_sources(self.data, self.threshold, self.npixels)
+
+
+class TimeDetectSources(_SegmentationBase):
+    def time_detect_sources(self, size, n_sources):
+        detect_sources(self.data, self.threshold, self.npixels)
+
+
+class TimeDeblendSources(_SegmentationBase):
+    def time_deblend_sources(self, size, n_sources):
+        deblend_sources(self.data, self.segm, self.npixels,
+                        progress_bar=False)
+
+
+class TimeSourceCatalog(_SegmentationBase):
+    def time_source_catalog_to_table(self, size, n_sources):
+        SourceCatalog(self.data, self.segm).to_table()
@@ -6,6 +6,7 @@ pixel and sky coordinates.
 
 import math
 
+import numpy as np
 from astropy.utils import lazyproperty
 
 from photutils.aperture.attributes import (PixelPositions, PositiveScalar,
@@ -13,7 +14,7 @@ from photutils.aperture.attributes import (PixelPositions, PositiveScalar,
                                            SkyCoordPositions)
 from photutils.aperture.core import PixelAperture, SkyAperture
 from photutils.aperture.mask import ApertureMask
-from photutils.geometry import circular_overlap_grid
+from photutils.geometry import circular_overlap_grid, circular_overlap_sums
 
 __all__ = [
     'CircularAnnulus',
@@ -105,6 +106,58 @@ class CircularMaskMixin:
 
         return masks
 
+    def _do_photometry(self, data, error=None, mask=None, method='exact',
+                       subpixels=5):
+        """
+        Perform aperture photometry on the input data.
+
+        The aperture weights are computed and applied for all positions
+        in a single call to the low-level `photutils.geometry` functions
+        without creating `~photutils.aperture.ApertureMask` objects.
+        The results are identical (to within floating-point precision)
+        to those computed using the aperture masks.
+
+        Returns
+        -------
+        aperture_sums : `~numpy.ndarray`
+            The sums within each aperture.
+
+        aperture_sum_errs : `~numpy.ndarray`
+            The errors on the sums within each aperture.
+        """
+        if isinstance(data, np.ma.MaskedArray):
+            return super()._do_photometry(data, error=error, mask=mask,
+                                          method=method, subpixels=subpixels)
+
+        use_exact, subpixels = self._translate_mask_mode(method, subpixels)
+
+        if mask is not None:
+            mask = np.asanyarray(mask)
+            if mask.shape != data.shape:
+                raise ValueError('mask and data must have the same shape')
+            mask = mask.astype(bool, copy=False).view(np.uint8)
+
+        if error is not None:
+            error = error.astype(float, copy=False)
+
+        # r_in is zero for a circular aperture
+        r_out = self.r if hasattr(self, 'r') else self.r_out
+        r_in = getattr(self, 'r_in', 0.0)
+
+        xpos, ypos = self._positions.astype(float).T
+        aperture_sums, variances = circular_overlap_sums(
+            data.astype(float, copy=False), error, mask, xpos, ypos, r_in,
+            r_out, use_exact, subpixels)
+
+        if error is None:
+            # consistent with the aperture-mask implementation, where
+            # only apertures with no overlap have a (NaN) error
+            aperture_sum_errs = variances[np.isnan(variances)]
+        else:
+            aperture_sum_errs = np.sqrt(variances)
+
+        return aperture_sums, aperture_sum_errs
+
 
 class CircularAperture(CircularMaskMixin, PixelAperture):
     """
@@ -192,14 +192,10 @@ class PixelAperture(Aperture):
         return mpl_params
 
     @staticmethod
-    def _translate_mask_mode(mode, subpixels, rectangle=False):
+    def _translate_mask_mode(mode, subpixels):
         if mode not in ('center', 'subpixel', 'exact'):
             raise ValueError(f'Invalid mask mode: {mode}')
 
-        if rectangle and mode == 'exact':
-            mode = 'subpixel'
-            subpixels = 32
-
         if ((mode == 'subpixel')
                 and (not isinstance(subpixels, int) or subpixels <= 0)):
             raise ValueError('subpixels must be a strictly positive integer')
@@ -509,16 +505,10 @@ class PixelAperture(Aperture):
 
         Notes
         -----
-        `RectangularAperture` and `RectangularAnnulus` photometry with
-        the "exact" method uses a subpixel approximation by subdividing
-        each data pixel by a factor of 1024 (``subpixels = 32``). For
-        rectangular aperture widths and heights in the range from
-        2 to 100 pixels, this subpixel approximation gives results
-        typically within 0.001 percent or better of the exact value.
-        The differences can be larger for smaller apertures (e.g.,
-        aperture sizes of one pixel or smaller). For such small sizes,
-        it is recommend to set ``method='subpixel'`` with a larger
-        ``subpixels`` size.
+        For `CircularAperture` and `CircularAnnulus`, the aperture
+        weights for all positions are computed and applied in a single
+        compiled loop without creating the
+        `~photutils.aperture.ApertureMask` objects.
         """
         data = np.asanyarray(data)
         if data.ndim != 2:
@@ -545,6 +535,34 @@ class PixelAperture(Aperture):
             if error is not None:
                 error = error.value
 
+        aperture_sums, aperture_sum_errs = self._do_photometry(
+            data, error=error, mask=mask, method=method, subpixels=subpixels)
+
+        # apply units
+        if unit is not None:
+            aperture_sums <<= unit
+            aperture_sum_errs <<= unit
+
+        return aperture_sums, aperture_sum_errs
+
+    def _do_photometry(self, data, error=None, mask=None, method='exact',
+                       subpixels=5):
+        """
+        Perform aperture photometry on the input data using the aperture
+        masks.
+
+        The ``data`` and ``error`` inputs must not have units.
+        Subclasses may override this method to provide a faster
+        implementation that does not create the aperture masks.
+
+        Returns
+        -------
+        aperture_sums : `~numpy.ndarray`
+            The sums within each aperture.
+
+        aperture_sum_errs : `~numpy.ndarray`
+            The errors on the sums within each aperture.
+        """
         apermasks = self.to_mask(method=method, subpixels=subpixels)
         if self.isscalar:
             apermasks = (apermasks,)
@@ -576,11 +594,6 @@ class PixelAperture(Aperture):
         aperture_sums = np.array(aperture_sums)
         aperture_sum_errs = np.array(aperture_sum_errs)
 
-        # apply units
-        if unit is not None:
-            aperture_sums <<= unit
-            aperture_sum_errs <<= unit
-
         return aperture_sums, aperture_sum_errs
 
     @staticmethod
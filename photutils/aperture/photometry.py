@@ -136,16 +136,6 @@ def aperture_photometry(data, apertures, error=None, mask=None,
     `~regions.Region` objects are converted to `Aperture` objects using
     the :func:`region_to_aperture` function.
 
-    `RectangularAperture` and `RectangularAnnulus` photometry with the
-    "exact" method uses a subpixel approximation by subdividing each
-    data pixel by a factor of 1024 (``subpixels = 32``). For rectangular
-    aperture widths and heights in the range from 2 to 100 pixels, this
-    subpixel approximation gives results typically within 0.001 percent
-    or better of the exact value. The differences can be larger for
-    smaller apertures (e.g., aperture sizes of one pixel or smaller).
-    For such small sizes, it is recommend to set ``method='subpixel'``
-    with a larger ``subpixels`` size.
-
     If the input ``data`` is a `~astropy.nddata.NDData` instance,
     then the ``error``, ``mask``, and ``wcs`` keyword inputs are
     ignored. Instead, these values should be defined as attributes in
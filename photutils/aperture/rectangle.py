@@ -78,8 +78,7 @@ class RectangularMaskMixin:
             otherwise a list of `~photutils.aperture.ApertureMask` is
             returned.
         """
-        _, subpixels = self._translate_mask_mode(method, subpixels,
-                                                 rectangle=True)
+        use_exact, subpixels = self._translate_mask_mode(method, subpixels)
 
         if hasattr(self, 'w'):
             w = self.w
@@ -95,15 +94,16 @@ class RectangularMaskMixin:
             ny, nx = bbox.shape
             mask = rectangular_overlap_grid(edges[0], edges[1], edges[2],
                                             edges[3], nx, ny, w, h,
-                                            self._theta_radians, 0, subpixels)
+                                            self._theta_radians, use_exact,
+                                            subpixels)
 
             # subtract the inner circle for an annulus
             if hasattr(self, 'w_in'):
                 mask -= rectangular_overlap_grid(edges[0], edges[1], edges[2],
                                                  edges[3], nx, ny, self.w_in,
                                                  self.h_in,
-                                                 self._theta_radians, 0,
-                                                 subpixels)
+                                                 self._theta_radians,
+                                                 use_exact, subpixels)
 
             masks.append(ApertureMask(mask, bbox))
 
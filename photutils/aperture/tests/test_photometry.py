@@ -19,6 +19,7 @@ from photutils.aperture.circle import (CircularAnnulus, CircularAperture,
 from photutils.aperture.ellipse import (EllipticalAnnulus, EllipticalAperture,
                                         SkyEllipticalAnnulus,
                                         SkyEllipticalAperture)
+from photutils.aperture.core import PixelAperture
 from photutils.aperture.photometry import aperture_photometry
 from photutils.aperture.rectangle import (RectangularAnnulus,
                                           RectangularAperture,
@@ -813,6 +814,36 @@ def test_nan_in_bbox():
     assert_allclose(tbl3['aperture_sum_err'], tbl4['aperture_sum_err'])
 
 
+@pytest.mark.parametrize('aperture', [
+    CircularAperture([(-10.0, 50.0), (20.3, 30.7), (99.5, 0.2),
+                      (500.0, 20.0)], r=4.3),
+    CircularAnnulus([(-10.0, 50.0), (20.3, 30.7), (99.5, 0.2),
+                     (500.0, 20.0)], r_in=2.1, r_out=6.2),
+    CircularAperture((40.1, 50.8), r=0.4)])
+@pytest.mark.parametrize('method', ['exact', 'center', 'subpixel'])
+@pytest.mark.parametrize('with_error', [False, True])
+def test_batched_photometry(aperture, method, with_error):
+    """
+    Test that the circular aperture photometry computed without
+    aperture masks matches the results using the aperture masks.
+    """
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(101, 111))
+    data[30, 20] = np.nan
+    mask = rng.random(data.shape) < 0.05
+    error = np.abs(data) if with_error else None
+
+    for mask_ in (None, mask):
+        result1 = aperture.do_photometry(data, error=error, mask=mask_,
+                                         method=method, subpixels=7)
+        result2 = PixelAperture._do_photometry(aperture, data, error=error,
+                                               mask=mask_, method=method,
+                                               subpixels=7)
+        for arr1, arr2 in zip(result1, result2, strict=True):
+            assert arr1.shape == arr2.shape
+            assert_allclose(arr1, arr2, rtol=1e-12, equal_nan=True)
+
+
 def test_scalar_skycoord():
     """
     Regression test to check that scalar SkyCoords are added to the
@@ -0,0 +1,285 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+# cython: language_level=3
+"""
+This module provides a compiled function to compute the sigma-clipped
+background and background RMS statistics of many boxes in a single
+pass over the data.
+"""
+
+import numpy as np
+
+cimport cython
+cimport numpy as np
+from libc.math cimport NAN, fabs, sqrt
+
+__all__ = ['sigma_clipped_box_stats']
+
+# background statistics
+cdef enum:
+    BKG_MEAN
+    BKG_MEDIAN
+    BKG_MODE
+    BKG_SEXTRACTOR
+
+# background RMS statistics
+cdef enum:
+    RMS_STD
+    RMS_MAD_STD
+
+# the conversion factor from the MAD to the standard deviation for a
+# normal distribution (as used by astropy.stats.mad_std)
+cdef double MAD_STD_FACTOR = 1.482602218505602
+
+BKG_STATS = {'mean': BKG_MEAN, 'median': BKG_MEDIAN, 'mode': BKG_MODE,
+             'sextractor': BKG_SEXTRACTOR}
+RMS_STATS = {'std': RMS_STD, 'mad_std': RMS_MAD_STD}
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def sigma_clipped_box_stats(const cython.floating[:, :] data,
+                            double sigma_lower, double sigma_upper,
+                            int maxiters, bkg_stat, rms_stat,
+                            double median_factor=3.0,
+                            double mean_factor=2.0):
+    """
+    sigma_clipped_box_stats(data, sigma_lower, sigma_upper, maxiters,
+                            bkg_stat, rms_stat, median_factor=3.0,
+                            mean_factor=2.0)
+
+    Sigma-clipped background and background RMS statistics along the
+    last axis of a 2D array.
+
+    Each row of ``data`` holds the pixel values of one box, where NaN
+    values are ignored. The rows are sigma clipped in the same way
+    as `~astropy.stats.SigmaClip` with ``cenfunc='median'`` and
+    ``stdfunc='std'``, and the statistics are then computed from the
+    remaining values. The rows are sorted once (NaN values are sorted
+    to the end), after which the clipped values always form a contiguous
+    range of the sorted values, so no temporary arrays with NaN values
+    are created by the sigma clipping.
+
+    Parameters
+    ----------
+    data : 2D `~numpy.ndarray` (float)
+        The box data, with one box per row.
+    sigma_lower, sigma_upper : float
+        The number of standard deviations to use for the lower and
+        upper clipping limits.
+    maxiters : int
+        The maximum number of sigma-clipping iterations. If negative,
+        the clipping is iterated until convergence. Set to zero for no
+        sigma clipping.
+    bkg_stat : {'mean', 'median', 'mode', 'sextractor'}
+        The background statistic. The ``'mode'`` statistic is
+        ``(median_factor * median) - (mean_factor * mean)``.
+    rms_stat : {'std', 'mad_std'}
+        The background RMS statistic.
+    median_factor, mean_factor : float, optional
+        The factors used by the ``'mode'`` background statistic.
+
+    Returns
+    -------
+    bkg : 1D `~numpy.ndarray` (float)
+        The background statistic for each box. The value is NaN if all
+        values in the box are NaN.
+    bkgrms : 1D `~numpy.ndarray` (float)
+        The background RMS statistic for each box. The value is NaN if
+        all values in the box are NaN.
+    ngood : 1D `~numpy.ndarray` (int)
+        The number of values remaining after sigma clipping.
+    """
+
+    cdef Py_ssize_t k, n, npix, lo, hi
+    cdef int ibkg = BKG_STATS[bkg_stat]
+    cdef int irms = RMS_STATS[rms_stat]
+    cdef double median, mean, std
+    cdef const cython.floating *values
+
+    # numpy's vectorized sort is much faster than sorting each row here
+    cdef const cython.floating[:, ::1] sorted_data = np.sort(data, axis=-1)
+
+    n = sorted_data.shape[0]
+    npix = sorted_data.shape[1]
+
+    bkg = np.empty(n, dtype=float)
+    bkgrms = np.empty(n, dtype=float)
+    ngood = np.empty(n, dtype=np.intp)
+    cdef double[::1] bkg_view = bkg
+    cdef double[::1] bkgrms_view = bkgrms
+    cdef Py_ssize_t[::1] ngood_view = ngood
+
+    if npix == 0:
+        bkg[:] = np.nan
+        bkgrms[:] = np.nan
+        ngood[:] = 0
+        return bkg, bkgrms, ngood
+
+    with nogil:
+        for k in range(n):
+            values = &sorted_data[k, 0]
+
+            # exclude the NaN values at the end of the row
+            hi = count_non_nan(values, npix)
+            lo = sigma_clip_sorted(values, 0, &hi, sigma_lower, sigma_upper,
+                                   maxiters)
+
+            ngood_view[k] = hi - lo
+            if hi == lo:
+                bkg_view[k] = NAN
+                bkgrms_view[k] = NAN
+                continue
+
+            median = median_sorted(values, lo, hi)
+            mean_std(values, lo, hi, &mean, &std)
+
+            if ibkg == BKG_MEAN:
+                bkg_view[k] = mean
+            elif ibkg == BKG_MEDIAN:
+                bkg_view[k] = median
+            elif ibkg == BKG_MODE:
+                bkg_view[k] = median_factor * median - mean_factor * mean
+            else:
+                bkg_view[k] = sextractor_mode(median, mean, std)
+
+            if irms == RMS_STD:
+                bkgrms_view[k] = std
+            else:
+                bkgrms_view[k] = MAD_STD_FACTOR * mad_sorted(values, lo, hi,
+                                                             median)
+
+    return bkg, bkgrms, ngood
+
+
+# NOTE: The following functions use cdef because they are not intended
+# to be called from the Python code. They operate on a range [lo, hi)
+# of an array of sorted values.
+
+
+cdef Py_ssize_t count_non_nan(const cython.floating *values,
+                              Py_ssize_t npix) noexcept nogil:
+    """
+    The number of non-NaN values, which are sorted before the NaN
+    values, found using a binary search.
+    """
+
+    cdef Py_ssize_t lo = 0, hi = npix, mid
+    while lo < hi:
+        mid = (lo + hi) // 2
+        if values[mid] == values[mid]:
+            lo = mid + 1
+        else:
+            hi = mid
+    return lo
+
+
+cdef Py_ssize_t sigma_clip_sorted(const cython.floating *values,
+                                  Py_ssize_t lo, Py_ssize_t *hi,
+                                  double sigma_lower, double sigma_upper,
+                                  int maxiters) noexcept nogil:
+    """
+    Iteratively sigma clip the sorted values, returning the new lower
+    index of the range and updating the upper index in place.
+    """
+
+    cdef int niter = 0
+    cdef Py_ssize_t new_lo, new_hi
+    cdef double median, mean, std, min_value, max_value
+
+    while hi[0] > lo and (maxiters < 0 or niter < maxiters):
+        niter += 1
+        median = median_sorted(values, lo, hi[0])
+        mean_std(values, lo, hi[0], &mean, &std)
+        min_value = median - (std * sigma_lower)
+        max_value = median + (std * sigma_upper)
+
+        # values < min_value and values > max_value are clipped
+        new_lo = lo
+        while new_lo < hi[0] and values[new_lo] < min_value:
+            new_lo += 1
+        new_hi = hi[0]
+        while new_hi > new_lo and values[new_hi - 1] > max_value:
+            new_hi -= 1
+
+        if new_lo == lo and new_hi == hi[0]:
+            break
+
+        lo = new_lo
+        hi[0] = new_hi
+
+    return lo
+
+
+cdef double median_sorted(const cython.floating *values, Py_ssize_t lo,
+                          Py_ssize_t hi) noexcept nogil:
+    cdef Py_ssize_t n = hi - lo
+    if n % 2 == 1:
+        return values[lo + n // 2]
+    return 0.5 * (<double>values[lo + n // 2 - 1] + values[lo + n // 2])
+
+
+cdef void mean_std(const cython.floating *values, Py_ssize_t lo,
+                   Py_ssize_t hi, double *mean, double *std) noexcept nogil:
+    cdef Py_ssize_t i
+    cdef double total = 0.0
+    cdef double delta
+
+    for i in range(lo, hi):
+        total += values[i]
+    mean[0] = total / (hi - lo)
+
+    total = 0.0
+    for i in range(lo, hi):
+        delta = values[i] - mean[0]
+        total += delta * delta
+    std[0] = sqrt(total / (hi - lo))
+
+
+cdef double mad_sorted(const cython.floating *values, Py_ssize_t lo,
+                       Py_ssize_t hi, double median) noexcept nogil:
+    """
+    Median absolute deviation of the sorted values.
+
+    The absolute deviations are merged in increasing order from the
+    values below and above the median.
+    """
+
+    cdef Py_ssize_t n = hi - lo
+    cdef Py_ssize_t k1 = (n - 1) // 2
+    cdef Py_ssize_t k2 = n // 2
+    cdef Py_ssize_t t, left, right
+    cdef double dev, dev1 = 0.0, dev2 = 0.0
+
+    right = lo
+    while right < hi and values[right] < median:
+        right += 1
+    left = right - 1
+
+    for t in range(k2 + 1):
+        if left >= lo and (right >= hi or
+                           median - values[left] <= values[right] - median):
+            dev = median - values[left]
+            left -= 1
+        else:
+            dev = values[right] - median
+            right += 1
+        if t == k1:
+            dev1 = dev
+        if t == k2:
+            dev2 = dev
+
+    return 0.5 * (dev1 + dev2)
+
+
+cdef double sextractor_mode(double median, double mean,
+                            double std) noexcept nogil:
+    """
+    The SourceExtractor background estimate (see
+    `~photutils.background.SExtractorBackground`).
+    """
+
+    if std == 0:
+        return mean
+    if fabs(mean - median) / std >= 0.3:
+        return median
+    return (2.5 * median) - (1.5 * mean)
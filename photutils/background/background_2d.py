@@ -4,7 +4,11 @@ This module defines classes to estimate the 2D background and background
 RMS in an image.
 """
 
+import copy
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from functools import partial
+from os import cpu_count
 
 import astropy.units as u
 import numpy as np
@@ -16,6 +20,7 @@ from astropy.utils.exceptions import AstropyUserWarning
 from scipy.ndimage import generic_filter
 
 from photutils.aperture import RectangularAperture
+from photutils.background._box_stats import sigma_clipped_box_stats
 from photutils.background.core import SExtractorBackground, StdBackgroundRMS
 from photutils.background.interpolators import (BkgIDWInterpolator,
                                                 BkgZoomInterpolator)
@@ -28,6 +33,27 @@ __all__ = ['Background2D']
 
 __doctest_skip__ = ['Background2D']
 
+# the maximum number of data pixels in a band of box rows used to
+# compute the box statistics
+_BAND_NPIXELS = 2**24
+
+
+def _get_fused_stat(estimator, method_name):
+    """
+    Return the name of the statistic computed by the compiled fused box
+    statistics function for a background or background RMS estimator.
+
+    `None` is returned if the estimator does not support the fused
+    function or if ``method_name`` is overridden in a subclass of the
+    class that defines the statistic.
+    """
+    for cls in type(estimator).__mro__:
+        if method_name in vars(cls) and '_fused_stat' not in vars(cls):
+            return None
+        if '_fused_stat' in vars(cls):
+            return vars(cls)['_fused_stat']
+    return None
+
 
 class Background2D:
     """
@@ -199,6 +225,15 @@ class Background2D:
         is an instance of `BkgZoomInterpolator`, which uses the
         `scipy.ndimage.zoom` function.
 
+    n_jobs : int or `None`, optional
+        The number of threads used to compute the box statistics. The
+        rows of boxes are split into bands that are processed in
+        parallel by a thread pool, where each thread holds a copy of
+        only one band of the data at a time. The results are identical
+        to the serial computation. If set to 1, then a serial
+        implementation is used. If `None`, then the number of threads
+        will be set to the number of CPUs detected on the machine.
+
     Notes
     -----
     Better performance will generally be obtained if you have the
@@ -218,7 +253,7 @@ class Background2D:
                  sigma_clip=SigmaClip(sigma=3.0, maxiters=10),
                  bkg_estimator=SExtractorBackground(sigma_clip=None),
                  bkgrms_estimator=StdBackgroundRMS(sigma_clip=None),
-                 interpolator=BkgZoomInterpolator()):
+                 interpolator=BkgZoomInterpolator(), n_jobs=1):
 
         if isinstance(data, (u.Quantity, NDData)):  # includes CCDData
             self._unit = data.unit
@@ -252,6 +287,13 @@ class Background2D:
         self.edge_method = edge_method
         self.sigma_clip = sigma_clip
         self.interpolator = interpolator
+        if n_jobs is None:
+            n_jobs = cpu_count()  # pragma: no cover
+        if (not isinstance(n_jobs, (int, np.integer))
+                or isinstance(n_jobs, bool) or n_jobs < 1):
+            raise ValueError('n_jobs must be a strictly-positive integer '
+                             'or None.')
+        self.n_jobs = int(n_jobs)
 
         # we perform sigma clipping as a separate step to avoid
         # calling it twice for the background and background RMS
@@ -264,7 +306,8 @@ class Background2D:
         self._params = ('box_size', 'coverage_mask',
                         'fill_value', 'exclude_percentile', 'filter_size',
                         'filter_threshold', 'edge_method', 'sigma_clip',
-                        'bkg_estimator', 'bkgrms_estimator', 'interpolator')
+                        'bkg_estimator', 'bkgrms_estimator', 'interpolator',
+                        'n_jobs')
 
         # store the interpolator keyword arguments for later use
         # (before self._data is deleted in self._calculate_stats)
@@ -279,19 +322,7 @@ class Background2D:
          self._bkgrms_stats,
          self._ngood) = self._calculate_stats()
 
-        # this is used to selectively filter the low-resolution maps
-        self._min_bkg_stats = nanmin(self._bkg_stats)
-
-        # store a mask of the excluded mesh values (NaNs) in the
-        # low-resolution maps
-        self._mesh_nan_mask = np.isnan(self._bkg_stats)
-
-        # add keyword arguments needed for BkgZoomInterpolator
-        # BkgIDWInterpolator upscales the mesh based only on the good
-        # pixels in the low-resolution mesh
-        if isinstance(self.interpolator, BkgIDWInterpolator):
-            self._interp_kwargs['mesh_yxcen'] = self._calculate_mesh_yxcen()
-            self._interp_kwargs['mesh_nan_mask'] = self._mesh_nan_mask
+        self._prepare_mesh()
 
     def __repr__(self):
         ellipsis = ('coverage_mask',)
@@ -335,44 +366,65 @@ class Background2D:
             data <<= self._unit
         return data
 
-    def _combine_input_masks(self):
+    def _combine_input_masks(self, rows):
         """
-        Combine the input mask and coverage_mask.
+        Combine the input mask and coverage_mask for the given band of
+        rows.
         """
-        if self._mask is None and self.coverage_mask is None:
+        masks = [np.asarray(mask[rows]) for mask in (self._mask,
+                                                     self.coverage_mask)
+                 if mask is not None]
+        if not masks:
             return None
-        if self._mask is None:
-            return self.coverage_mask
-        if self.coverage_mask is None:
-            return self._mask
+        if len(masks) == 1:
+            return masks[0]
+        return np.logical_or(*masks)
 
-        mask = np.logical_or(self._mask, self.coverage_mask)
-        del self._mask
-        return mask
-
-    def _combine_all_masks(self, mask):
-        """
-        Combine the input masks (mask and coverage_mask) with the mask
-        of invalid data values.
+    def _prepare_data(self, rows):
         """
-        input_mask = self._combine_input_masks()
+        Prepare a band of rows of the input data for computing the box
+        statistics.
 
-        msg = ('Input data contains invalid values (NaNs or infs), which '
-               'were automatically masked.')
+        The returned data is a float copy of the input data, where
+        masked pixels (from the input masks) and invalid data values
+        (NaNs or infs) are set to NaN. Only the requested rows are read
+        from the input data (e.g., for a `~numpy.memmap`).
 
-        if input_mask is None:
-            if np.any(mask):
-                warnings.warn(msg, AstropyUserWarning)
-            return mask
+        Parameters
+        ----------
+        rows : slice
+            The slice of data rows to prepare.
+
+        Returns
+        -------
+        data : 2D `~numpy.ndarray`
+            The prepared data.
+
+        has_invalid : bool
+            Whether the data contains invalid values that were not
+            masked by the input masks.
+        """
+        data = self._data[rows]
+        if isinstance(data, np.memmap):
+            data = data.view(np.ndarray)
 
-        total_mask = np.logical_or(input_mask, mask)
+        # copy the data to a float array to insert NaNs; the copy is
+        # also needed to avoid modifying the original data array
+        dtype = data.dtype if data.dtype.kind == 'f' else np.float32
+        data = data.astype(dtype)
 
-        if input_mask is not None:
-            condition = np.logical_and(np.logical_not(input_mask), mask)
-            if np.any(condition):
-                warnings.warn(msg, AstropyUserWarning)
+        # automatically mask non-finite values that aren't already
+        # masked and combine all masks
+        mask = ~np.isfinite(data)
+        input_mask = self._combine_input_masks(rows)
+        if input_mask is None:
+            has_invalid = np.any(mask)
+        else:
+            has_invalid = np.any(mask & ~input_mask)
+            mask |= input_mask
+        data[mask] = np.nan
 
-        return total_mask
+        return data, has_invalid
 
     @lazyproperty
     def _good_npixels_threshold(self):
@@ -388,7 +440,54 @@ class Background2D:
         """
         return (1 - (self.exclude_percentile / 100.0)) * self._box_npixels
 
-    def _sigmaclip_boxes(self, data, axis):
+    @lazyproperty
+    def _fused_stats_kwargs(self):
+        """
+        The keyword arguments for the compiled fused sigma-clipped box
+        statistics function, or `None` if the sigma clipping or the
+        estimators are not supported by it.
+
+        The fused function supports the built-in estimators (but not
+        subclasses that override their statistics) and sigma clipping
+        with ``cenfunc='median'``, ``stdfunc='std'``, and no ``grow``.
+        """
+        bkg_stat = _get_fused_stat(self.bkg_estimator, 'calc_background')
+        rms_stat = _get_fused_stat(self.bkgrms_estimator,
+                                   'calc_background_rms')
+        if bkg_stat is None or rms_stat is None:
+            return None
+
+        sigma_clip = self.sigma_clip
+        if sigma_clip is None:
+            sigma_lower = sigma_upper = 0.0
+            maxiters = 0
+        else:
+            if (not isinstance(sigma_clip.cenfunc, str)
+                    or not isinstance(sigma_clip.stdfunc, str)
+                    or sigma_clip.cenfunc != 'median'
+                    or sigma_clip.stdfunc != 'std' or sigma_clip.grow):
+                return None
+            sigma_lower = sigma_clip.sigma_lower
+            if sigma_lower is None:
+                sigma_lower = sigma_clip.sigma
+            sigma_upper = sigma_clip.sigma_upper
+            if sigma_upper is None:
+                sigma_upper = sigma_clip.sigma
+            # SigmaClip stores maxiters=None as infinity
+            maxiters = sigma_clip.maxiters
+            if maxiters is None or np.isinf(maxiters):
+                maxiters = -1
+
+        kwargs = {'sigma_lower': sigma_lower, 'sigma_upper': sigma_upper,
+                  'maxiters': maxiters, 'bkg_stat': bkg_stat,
+                  'rms_stat': rms_stat}
+        if bkg_stat == 'mode':
+            kwargs['median_factor'] = self.bkg_estimator.median_factor
+            kwargs['mean_factor'] = self.bkg_estimator.mean_factor
+
+        return kwargs
+
+    def _sigmaclip_boxes(self, data, axis, catch_warnings=True):
         """
         Sigma clip the boxes along the specified axis.
 
@@ -410,20 +509,30 @@ class Background2D:
         axis : int or tuple of int
             The axis or axes along which to sigma clip the data.
 
+        catch_warnings : bool, optional
+            Whether to ignore the
+            `~astropy.utils.exceptions.AstropyUserWarning` warnings
+            raised during sigma clipping. This must be `False` when
+            called from a thread because the warning filters are not
+            thread-safe. In that case, the caller must set the warning
+            filters.
+
         Returns
         -------
         data : `~numpy.ndarray`
             The sigma-clipped data.
         """
+        if self.sigma_clip is None:
+            return data
+
+        if not catch_warnings:
+            return self.sigma_clip(data, axis=axis, masked=False, copy=False)
+
         with warnings.catch_warnings():
             warnings.simplefilter('ignore', category=AstropyUserWarning)
-            if self.sigma_clip is not None:
-                data = self.sigma_clip(data, axis=axis, masked=False,
-                                       copy=False)
+            return self.sigma_clip(data, axis=axis, masked=False, copy=False)
 
-        return data
-
-    def _compute_box_statistics(self, data, axis=None):
+    def _compute_box_statistics(self, data, axis=None, catch_warnings=True):
         """
         Compute the background and background RMS statistics in each
         box.
@@ -436,6 +545,10 @@ class Background2D:
         axis : int or tuple of int, optional
             The axis or axes along which to compute the statistics.
 
+        catch_warnings : bool, optional
+            Whether to ignore the sigma-clipping warnings in this
+            method. See ``_sigmaclip_boxes``.
+
         Returns
         -------
         bkg : 2D `~numpy.ndarray` or float
@@ -444,14 +557,33 @@ class Background2D:
         bkgrms : 2D `~numpy.ndarray` or float
             The background RMS statistics in each box.
         """
-        data = self._sigmaclip_boxes(data, axis=axis)
+        fused_kwargs = self._fused_stats_kwargs
+        if fused_kwargs is not None and data.dtype in (np.float32,
+                                                       np.float64):
+            # sigma clip and compute the statistics of all boxes in a
+            # single pass without any temporary arrays
+            npixels = data.size if axis is None else data.shape[-1]
+            bkg, bkgrms, ngood = sigma_clipped_box_stats(
+                data.reshape(-1, npixels), **fused_kwargs)
+            bkg = bkg.astype(data.dtype)
+            bkgrms = bkgrms.astype(data.dtype)
+            if axis is None:
+                bkg, bkgrms, ngood = bkg[0], bkgrms[0], ngood[0]
+            else:
+                bkg = bkg.reshape(data.shape[:-1])
+                bkgrms = bkgrms.reshape(data.shape[:-1])
+                ngood = ngood.reshape(data.shape[:-1])
+        else:
+            data = self._sigmaclip_boxes(data, axis=axis,
+                                         catch_warnings=catch_warnings)
+
+            # make 2D arrays of the box statistics
+            bkg = self.bkg_estimator(data, axis=axis)
+            bkgrms = self.bkgrms_estimator(data, axis=axis)
 
-        # make 2D arrays of the box statistics
-        bkg = self.bkg_estimator(data, axis=axis)
-        bkgrms = self.bkgrms_estimator(data, axis=axis)
+            # mask boxes with too few unmasked pixels
+            ngood = np.count_nonzero(~np.isnan(data), axis=axis)
 
-        # mask boxes with too few unmasked pixels
-        ngood = np.count_nonzero(~np.isnan(data), axis=axis)
         box_mask = ngood <= self._good_npixels_threshold
 
         if np.ndim(bkg) == 0:
@@ -467,6 +599,63 @@ class Background2D:
 
         return bkg, bkgrms, ngood
 
+    def _calculate_band_stats(self, rows, x1, extra_col,
+                              catch_warnings=True):
+        """
+        Calculate the background and background RMS statistics in each
+        box of a band of box rows.
+
+        Parameters
+        ----------
+        rows : slice
+            The slice of data rows in the band. The number of rows must
+            be an integer multiple of the box size along the y axis.
+
+        x1 : int
+            The end column of the core boxes (i.e., the part of the data
+            array that is an integer multiple of the box size).
+
+        extra_col : bool
+            Whether to include an extra column of boxes for the data
+            columns after ``x1``.
+
+        catch_warnings : bool, optional
+            Whether to ignore the sigma-clipping warnings in this
+            method. See ``_sigmaclip_boxes``.
+
+        Returns
+        -------
+        stats : list of 2D `~numpy.ndarray`
+            The background and background RMS statistics and the number
+            of unmasked pixels in each box.
+
+        has_invalid : bool
+            Whether the data contains invalid values that were not
+            masked by the input masks.
+        """
+        data, has_invalid = self._prepare_data(rows)
+
+        # core boxes - the part of the data array that is an integer
+        # multiple of the box size
+        # combine the last two axes for performance
+        core = reshape_as_blocks(data[:, :x1], self.box_size)
+        core = core.reshape((*core.shape[:2], -1))
+        stats = self._compute_box_statistics(core, axis=-1,
+                                             catch_warnings=catch_warnings)
+
+        if extra_col:
+            # extra column of boxes
+            # move the axes and combine the last two for performance
+            col_data = reshape_as_blocks(data[:, x1:], (self.box_size[0], 1))
+            col_data = np.transpose(col_data, (0, 3, 1, 2))
+            col_data = col_data.reshape((*col_data.shape[:-2], -1))
+            col_stats = self._compute_box_statistics(
+                col_data, axis=-1, catch_warnings=catch_warnings)
+            stats = [np.hstack(stat) for stat in
+                     zip(stats, col_stats, strict=True)]
+
+        return stats, has_invalid
+
     def _calculate_stats(self):
         """
         Calculate the background and background RMS statistics in each
@@ -490,92 +679,87 @@ class Background2D:
         ngood : 2D `~numpy.ndarray`
             The number of unmasked pixels in each box.
         """
-        # if needed, copy the data to a float32 array to insert NaNs
-        if self._data.dtype.kind != 'f':
-            self._data = self._data.astype(np.float32)
-
-        # automatically mask non-finite values that aren't already
-        # masked and combine all masks
-        mask = self._combine_all_masks(~np.isfinite(self._data))
-
         self._box_npixels = np.prod(self.box_size)
         nboxes = self._data.shape // self.box_size
         y1, x1 = nboxes * self.box_size
-
-        # core boxes - the part of the data array that is an integer
-        # multiple of the box size
-        # combine the last two axes for performance
-        # Below we transform both the data and mask arrays to avoid
-        # making multiple copies of the data (one to insert NaN and
-        # another for the reshape). Only one copy of the data and mask
-        # array is made (except for the extra corner). The boolean mask
-        # copy is much smaller than the data array.
-        # An explicit copy of the data array is needed to avoid
-        # modifying the original data array if the shape of the data
-        # array is (y1, x1) (i.e., box_size = data.shape).
-        core = reshape_as_blocks(self._data[:y1, :x1].copy(), self.box_size)
-        core_mask = reshape_as_blocks(mask[:y1, :x1], self.box_size)
-        core = core.reshape((*nboxes, -1))
-        core_mask = core_mask.reshape((*nboxes, -1))
-        core[core_mask] = np.nan
-        bkg, bkgrms, ngood = self._compute_box_statistics(core, axis=-1)
-
         extra_row = y1 < self._data.shape[0]
         extra_col = x1 < self._data.shape[1]
-        if self.edge_method == 'pad' and (extra_row or extra_col):
-            if extra_row:
-                # extra row of boxes
-                # here we need to make a copy of the data array to avoid
-                # modifying the original data array
-                # move the axes and combine the last two for performance
-                row_data = self._data[y1:, :x1].copy()
-                row_mask = mask[y1:, :x1]
-                row_data[row_mask] = np.nan
-                row_data = reshape_as_blocks(row_data, (1, self.box_size[1]))
-                row_data = np.moveaxis(row_data, 0, -1)
-                row_data = row_data.reshape((*row_data.shape[:-2], -1))
-                row_bkg, row_bkgrms, row_ngood = self._compute_box_statistics(
-                    row_data, axis=-1)
+        pad = self.edge_method == 'pad'
+
+        # the data are processed in bands of box rows to limit the
+        # memory usage for large images; only one band of the data is
+        # copied (and read, e.g., from a memmap) at a time (per thread)
+        band_nboxes = max(
+            _BAND_NPIXELS // (self.box_size[0] * self._data.shape[1]), 1)
+        if self.n_jobs > 1:
+            # use at least one band per thread
+            band_nboxes = min(band_nboxes, -(-nboxes[0] // self.n_jobs))
+        band_nrows = band_nboxes * self.box_size[0]
+        bands = [slice(ystart, min(ystart + band_nrows, y1))
+                 for ystart in range(0, y1, band_nrows)]
+
+        calc_band_stats = partial(self._calculate_band_stats, x1=x1,
+                                  extra_col=pad and extra_col)
+        if self.n_jobs == 1 or len(bands) == 1:
+            results = [calc_band_stats(rows) for rows in bands]
+        else:
+            # the warning filters are process-global state that is not
+            # thread-safe, so they are set here once (in the calling
+            # thread) and restored after all threads have finished
+            calc_band_stats = partial(calc_band_stats, catch_warnings=False)
+            with warnings.catch_warnings():
+                warnings.simplefilter('ignore', category=AstropyUserWarning)
+                with ThreadPoolExecutor(max_workers=self.n_jobs) as executor:
+                    results = list(executor.map(calc_band_stats, bands))
+
+        has_invalid = any(result[1] for result in results)
+        bkg = [result[0][0] for result in results]
+        bkgrms = [result[0][1] for result in results]
+        ngood = [result[0][2] for result in results]
+
+        if pad and extra_row:
+            data, invalid = self._prepare_data(slice(y1, None))
+            has_invalid |= invalid
+
+            # extra row of boxes
+            # move the axes and combine the last two for performance
+            row_data = reshape_as_blocks(data[:, :x1], (1, self.box_size[1]))
+            row_data = np.moveaxis(row_data, 0, -1)
+            row_data = row_data.reshape((*row_data.shape[:-2], -1))
+            row_stats = [stats[:, 0] for stats in
+                         self._compute_box_statistics(row_data, axis=-1)]
 
             if extra_col:
-                # extra column of boxes
-                # here we need to make a copy of the data array to avoid
-                # modifying the original data array
-                # move the axes and combine the last two for performance
-                col_data = self._data[:y1, x1:].copy()
-                col_mask = mask[:y1, x1:]
-                col_data[col_mask] = np.nan
-                col_data = reshape_as_blocks(col_data, (self.box_size[0], 1))
-                col_data = np.transpose(col_data, (0, 3, 1, 2))
-                col_data = col_data.reshape((*col_data.shape[:-2], -1))
-                col_bkg, col_bkgrms, col_ngood = self._compute_box_statistics(
-                    col_data, axis=-1)
-
-            if extra_row and extra_col:
-                # extra corner box -- append to extra column
-                # here we need to make a copy of the data array to avoid
-                # modifying the original data array
-                corner_data = self._data[y1:, x1:].copy()
-                corner_mask = mask[y1:, x1:]
-                corner_data[corner_mask] = np.nan
-                crn_bkg, crn_bkgrms, crn_ngood = self._compute_box_statistics(
-                    corner_data, axis=None)
-                col_bkg = np.vstack((col_bkg, crn_bkg))
-                col_bkgrms = np.vstack((col_bkgrms, crn_bkgrms))
-                col_ngood = np.vstack((col_ngood, crn_ngood))
-
-            # combine the core and extra boxes to construct the
-            # complete 2D bkg and bkgrms arrays
-            if extra_row:
-                bkg = np.vstack([bkg, row_bkg[:, 0]])
-                bkgrms = np.vstack([bkgrms, row_bkgrms[:, 0]])
-                ngood = np.vstack([ngood, row_ngood[:, 0]])
+                # extra corner box -- append to extra row
+                crn_stats = self._compute_box_statistics(data[:, x1:],
+                                                         axis=None)
+                row_stats = [np.hstack(stats) for stats in
+                             zip(row_stats, crn_stats, strict=True)]
 
-            if extra_col:
-                bkg = np.hstack([bkg, col_bkg])
-                bkgrms = np.hstack([bkgrms, col_bkgrms])
-                ngood = np.hstack([ngood, col_ngood])
+            bkg.append(row_stats[0])
+            bkgrms.append(row_stats[1])
+            ngood.append(row_stats[2])
+
+        bkg = np.vstack(bkg)
+        bkgrms = np.vstack(bkgrms)
+        ngood = np.vstack(ngood)
+
+        if has_invalid:
+            warnings.warn('Input data contains invalid values (NaNs or '
+                          'infs), which were automatically masked.',
+                          AstropyUserWarning)
 
+        self._check_box_stats(bkg)
+
+        # we no longer need the input data array
+        del self._data
+
+        return bkg, bkgrms, ngood
+
+    def _check_box_stats(self, bkg):
+        """
+        Check that at least one box was not excluded.
+        """
         if np.all(np.isnan(bkg)):
             raise ValueError('All boxes contain <= '
                              f'{self._good_npixels_threshold} good pixels. '
@@ -583,10 +767,135 @@ class Background2D:
                              '"exclude_percentile" to allow more boxes to '
                              'be included.')
 
-        # we no longer need the copy of the input array
-        del self._data
+    def _prepare_mesh(self):
+        """
+        Set the attributes derived from the low-resolution box
+        statistics that are used to filter and interpolate the mesh.
+        """
+        # this is used to selectively filter the low-resolution maps
+        self._min_bkg_stats = nanmin(self._bkg_stats)
 
-        return bkg, bkgrms, ngood
+        # store a mask of the excluded mesh values (NaNs) in the
+        # low-resolution maps
+        self._mesh_nan_mask = np.isnan(self._bkg_stats)
+
+        # add keyword arguments needed for BkgZoomInterpolator
+        # BkgIDWInterpolator upscales the mesh based only on the good
+        # pixels in the low-resolution mesh
+        if isinstance(self.interpolator, BkgIDWInterpolator):
+            self._interp_kwargs['mesh_yxcen'] = self._calculate_mesh_yxcen()
+            self._interp_kwargs['mesh_nan_mask'] = self._mesh_nan_mask
+
+    def _calculate_changed_boxes(self, mask):
+        """
+        Calculate a 2D boolean array of the mesh boxes that contain
+        pixels where ``mask`` differs from the input mask.
+        """
+        shape = self._interp_kwargs['shape']
+        old_mask = (np.zeros(shape, dtype=bool) if self._mask is None
+                    else np.asarray(self._mask, dtype=bool))
+        new_mask = (np.zeros(shape, dtype=bool) if mask is None
+                    else np.asarray(mask, dtype=bool))
+        changed = old_mask != new_mask
+
+        # the reduction is over all pixels in the box (including the
+        # partial boxes at the edges)
+        ystarts = np.arange(self._ngood.shape[0]) * self.box_size[0]
+        xstarts = np.arange(self._ngood.shape[1]) * self.box_size[1]
+        changed = np.logical_or.reduceat(changed, ystarts, axis=0)
+        return np.logical_or.reduceat(changed, xstarts, axis=1)
+
+    def _update_box_stats(self, changed_boxes):
+        """
+        Recalculate the background and background RMS statistics of the
+        changed boxes in place.
+
+        Only the bands of box rows that contain changed boxes are
+        prepared, and the boxes are grouped by shape (the boxes at the
+        edges of the data may be partial boxes) to compute their
+        statistics in a single call per shape.
+        """
+        shape = self._interp_kwargs['shape']
+        by, bx = self.box_size
+        for iy in np.nonzero(np.any(changed_boxes, axis=1))[0]:
+            rows = slice(iy * by, min((iy + 1) * by, shape[0]))
+            with warnings.catch_warnings():
+                # invalid values were reported by the initial calculation
+                warnings.simplefilter('ignore', AstropyUserWarning)
+                data, _ = self._prepare_data(rows)
+
+            boxes = {}
+            for ix in np.nonzero(changed_boxes[iy])[0]:
+                box = data[:, ix * bx:(ix + 1) * bx]
+                boxes.setdefault(box.shape, []).append((ix, box.ravel()))
+
+            for box_data in boxes.values():
+                idx = [ix for ix, _ in box_data]
+                stats = self._compute_box_statistics(
+                    np.array([box for _, box in box_data]), axis=-1)
+                for mesh, stat in zip((self._bkg_stats, self._bkgrms_stats,
+                                       self._ngood), stats, strict=True):
+                    mesh[iy, idx] = stat
+
+    def with_mask(self, data, mask):
+        """
+        Return a new `Background2D` object for the same data but with a
+        different input ``mask``.
+
+        Only the statistics of the boxes that contain pixels where
+        the new ``mask`` differs from the input ``mask`` are
+        recalculated. The statistics of all other boxes are reused, and
+        the low-resolution mesh is then filtered and interpolated again.
+        This is much faster than creating a new `Background2D` object
+        when the masks differ in only a fraction of the boxes, e.g.,
+        when adding a (dilated) source mask to a first-pass background
+        estimate.
+
+        Parameters
+        ----------
+        data : array_like or `~astropy.nddata.NDData`
+            The same 2D array that was used to create this object.
+            Only the rows of boxes with a changed mask are read (e.g.,
+            for a `~numpy.memmap`).
+
+        mask : array_like (bool) or `None`
+            The new boolean mask, with the same shape as ``data``, where
+            a `True` value indicates the corresponding element of
+            ``data`` is masked. The ``coverage_mask`` is unchanged.
+
+        Returns
+        -------
+        result : `Background2D`
+            The new `Background2D` object.
+        """
+        if isinstance(data, (u.Quantity, NDData)):  # includes CCDData
+            data = data.data
+
+        result = copy.copy(self)
+
+        # remove the cached lazy properties
+        for key in list(result.__dict__):
+            if isinstance(getattr(type(result), key, None), lazyproperty):
+                del result.__dict__[key]
+
+        result._data = result._validate_array(data, 'data', shape=False)
+        if result._data.shape != self._interp_kwargs['shape']:
+            raise ValueError('data must have the same shape as the input '
+                             'data.')
+        result._mask = result._validate_array(mask, 'mask')
+
+        result._interp_kwargs = self._interp_kwargs.copy()
+        result._bkg_stats = self._bkg_stats.copy()
+        result._bkgrms_stats = self._bkgrms_stats.copy()
+        result._ngood = self._ngood.copy()
+
+        result._update_box_stats(self._calculate_changed_boxes(result._mask))
+        result._check_box_stats(result._bkg_stats)
+        del result._data
+
+        result._prepare_mesh()
+
+        return result
 
     def _interpolate_grid(self, data, n_neighbors=10, eps=0.0, power=1.0,
                           reg=0.0):
@@ -742,9 +1051,6 @@ class Background2D:
         background map check image in SourceExtractor.
         """
         data = self._interpolate_grid(self._bkg_stats)
-        if ('background_rms_mesh' in self.__dict__
-                or self.filter_threshold is None):
-            self._bkg_stats = None  # delete to save memory
         return self._apply_units(self._filter_grid(data))
 
     @lazyproperty
@@ -756,7 +1062,6 @@ class Background2D:
         background rms map check image in SourceExtractor.
         """
         data = self._interpolate_grid(self._bkgrms_stats)
-        self._bkgrms_stats = None  # delete to save memory
         return self._apply_units(self._filter_grid(data))
 
     @property
@@ -853,6 +1158,70 @@ class Background2D:
 
         return self._apply_units(data)
 
+    def write_background(self, out, *, rms=False, nrows=None):
+        """
+        Compute the full-sized background (or background RMS) image and
+        write it to an output array.
+
+        The image is computed and written in bands of rows such that
+        the full-sized image is never held in memory. This is useful
+        for very large images, where ``out`` can be, e.g., a writeable
+        `~numpy.memmap`. The input ``data`` can also be a
+        `~numpy.memmap`, which is read in bands of box rows when
+        computing the low-resolution mesh.
+
+        The output values are equal (to within floating-point precision)
+        to those of the `background` (or `background_rms`) image. Units
+        are not applied to ``out``. If a custom ``interpolator`` is
+        used, the full-sized image is computed in memory and then copied
+        to ``out``.
+
+        Parameters
+        ----------
+        out : 2D `~numpy.ndarray`
+            The output array. It must have the same shape as the input
+            ``data``.
+
+        rms : bool, optional
+            If `True`, write the background RMS image instead of the
+            background image.
+
+        nrows : int, optional
+            The number of image rows to compute and write at a time. If
+            `None`, then bands of about 16 million pixels are used.
+
+        Returns
+        -------
+        out : 2D `~numpy.ndarray`
+            The output array.
+        """
+        shape = self._interp_kwargs['shape']
+        if out.shape != shape:
+            raise ValueError('out must have the same shape as the input '
+                             'data.')
+        if nrows is None:
+            nrows = max(_BAND_NPIXELS // shape[1], 1)
+        elif nrows < 1:
+            raise ValueError('nrows must be a strictly-positive integer.')
+
+        mesh = self.background_rms_mesh if rms else self.background_mesh
+        resize_rows = getattr(self.interpolator, '_resize_rows', None)
+        if resize_rows is None:
+            image = self.interpolator(mesh, **self._interp_kwargs)
+
+        for ystart in range(0, shape[0], nrows):
+            rows = slice(ystart, min(ystart + nrows, shape[0]))
+            if resize_rows is None:
+                band = image[rows]
+            else:
+                band = resize_rows(mesh, rows, **self._interp_kwargs)
+            out[rows] = band
+            if self.coverage_mask is not None:
+                out[rows][np.asarray(self.coverage_mask[rows])] = (
+                    self.fill_value)
+
+        return out
+
     @property
     def background(self):
         """
@@ -44,6 +44,11 @@ class BackgroundBase(metaclass=abc.ABCMeta):
         ``sigma=3.0`` and ``maxiters=5``.
     """
 
+    # the name of the statistic computed by the compiled fused box
+    # statistics function used by Background2D, or `None` if the
+    # estimator is not supported
+    _fused_stat = None
+
     def __init__(self, sigma_clip=SIGMA_CLIP):
         if not isinstance(sigma_clip, SigmaClip) and sigma_clip is not None:
             raise TypeError('sigma_clip must be an astropy SigmaClip '
@@ -99,6 +104,11 @@ class BackgroundRMSBase(metaclass=abc.ABCMeta):
         ``sigma=3.0`` and ``maxiters=5``.
     """
 
+    # the name of the statistic computed by the compiled fused box
+    # statistics function used by Background2D, or `None` if the
+    # estimator is not supported
+    _fused_stat = None
+
     def __init__(self, sigma_clip=SIGMA_CLIP):
         if not isinstance(sigma_clip, SigmaClip) and sigma_clip is not None:
             raise TypeError('sigma_clip must be an astropy SigmaClip '
@@ -177,6 +187,8 @@ class MeanBackground(BackgroundBase):
     49.5
     """
 
+    _fused_stat = 'mean'
+
     def calc_background(self, data, axis=None, masked=False):
         if self.sigma_clip is not None:
             data = self.sigma_clip(data, axis=axis, masked=False)
@@ -230,6 +242,8 @@ class MedianBackground(BackgroundBase):
     49.5
     """
 
+    _fused_stat = 'median'
+
     def calc_background(self, data, axis=None, masked=False):
         if self.sigma_clip is not None:
             data = self.sigma_clip(data, axis=axis, masked=False)
@@ -291,6 +305,8 @@ class ModeEstimatorBackground(BackgroundBase):
     49.5
     """
 
+    _fused_stat = 'mode'
+
     def __init__(self, median_factor=3.0, mean_factor=2.0,
                  sigma_clip=SIGMA_CLIP):
         super().__init__(sigma_clip=sigma_clip)
@@ -407,6 +423,8 @@ class SExtractorBackground(BackgroundBase):
     49.5
     """
 
+    _fused_stat = 'sextractor'
+
     def calc_background(self, data, axis=None, masked=False):
         if self.sigma_clip is not None:
             data = self.sigma_clip(data, axis=axis, masked=False)
@@ -553,6 +571,8 @@ class StdBackgroundRMS(BackgroundRMSBase):
     28.86607004772212
     """
 
+    _fused_stat = 'std'
+
     def calc_background_rms(self, data, axis=None, masked=False):
         if self.sigma_clip is not None:
             data = self.sigma_clip(data, axis=axis, masked=False)
@@ -618,6 +638,8 @@ class MADStdBackgroundRMS(BackgroundRMSBase):
     37.06505546264005
     """
 
+    _fused_stat = 'mad_std'
+
     def calc_background_rms(self, data, axis=None, masked=False):
         if self.sigma_clip is not None:
             data = self.sigma_clip(data, axis=axis, masked=False)
@@ -6,7 +6,7 @@ This module defines interpolator classes for Background2D.
 import numpy as np
 from astropy.units import Quantity
 from astropy.utils.decorators import deprecated_renamed_argument
-from scipy.ndimage import zoom
+from scipy.ndimage import map_coordinates, zoom
 
 from photutils.utils import ShepardIDWInterpolator
 from photutils.utils._repr import make_repr
@@ -115,6 +115,68 @@ class BkgZoomInterpolator:
 
         return result
 
+    def _resize_rows(self, data, rows, **kwargs):
+        """
+        Resize the 2D mesh array, returning only the given band of rows
+        of the resized image.
+
+        The values are equal (to within floating-point precision) to the
+        same rows of the image returned by ``__call__``, but the
+        full-sized image is never created.
+
+        Parameters
+        ----------
+        data : 2D `~numpy.ndarray`
+            The low-resolution 2D mesh array.
+
+        rows : slice
+            The slice of rows of the resized image to return.
+
+        **kwargs : dict
+            Additional keyword arguments passed to the interpolator.
+
+        Returns
+        -------
+        result : 2D `~numpy.ndarray`
+            The band of rows of the resized background or background RMS
+            image.
+        """
+        data = np.asanyarray(data)
+        if isinstance(data, Quantity):
+            data = data.value
+
+        shape = kwargs['shape']
+        yidx = np.arange(shape[0])[rows]
+        xidx = np.arange(shape[1])
+        if np.ptp(data) == 0:
+            return np.full((yidx.size, xidx.size), np.min(data),
+                           dtype=kwargs['dtype'])
+
+        # compute the mesh coordinates of the output pixels in the same
+        # way as scipy.ndimage.zoom
+        coords = []
+        for idx, insize, box_size, size in zip((yidx, xidx), data.shape,
+                                               kwargs['box_size'], shape,
+                                               strict=True):
+            if kwargs['edge_method'] == 'pad':
+                if self.grid_mode:
+                    coords.append((idx + 0.5) / box_size - 0.5)
+                    continue
+                size = insize * box_size
+            scale = (insize - 1) / (size - 1) if size > 1 else 0.0
+            coords.append(idx * scale)
+
+        coords = np.meshgrid(*coords, indexing='ij')
+        result = map_coordinates(data, coords, order=self.order,
+                                 mode=self.mode, cval=self.cval)
+
+        if self.clip:
+            minval = np.min(data)
+            maxval = np.max(data)
+            np.clip(result, minval, maxval, out=result)  # clip in place
+
+        return result
+
 
 class BkgIDWInterpolator:
     """
@@ -171,12 +233,38 @@ class BkgIDWInterpolator:
         result : 2D `~numpy.ndarray`
             The resized background or background RMS image.
         """
+        return self._resize_rows(data, slice(None), **kwargs)
+
+    def _resize_rows(self, data, rows, **kwargs):
+        """
+        Resize the 2D mesh array, returning only the given band of rows
+        of the resized image.
+
+        Parameters
+        ----------
+        data : 2D `~numpy.ndarray`
+            The low-resolution 2D mesh array.
+
+        rows : slice
+            The slice of rows of the resized image to return.
+
+        **kwargs : dict
+            Additional keyword arguments passed to the interpolator.
+
+        Returns
+        -------
+        result : 2D `~numpy.ndarray`
+            The band of rows of the resized background or background RMS
+            image.
+        """
         data = np.asanyarray(data)
         if isinstance(data, Quantity):
             data = data.value
+
+        yidx = np.arange(kwargs['shape'][0])[rows]
+        shape = (yidx.size, kwargs['shape'][1])
         if np.ptp(data) == 0:
-            return np.full(kwargs['shape'], np.min(data),
-                           dtype=kwargs['dtype'])
+            return np.full(shape, np.min(data), dtype=kwargs['dtype'])
 
         # we create the interpolator from only the good mesh points
         yxcen = np.column_stack(kwargs['mesh_yxcen'])
@@ -186,9 +274,9 @@ class BkgIDWInterpolator:
                                              leafsize=self.leafsize)
 
         # the position coordinates used when calling the interpolator
-        yi, xi = np.mgrid[0:kwargs['shape'][0], 0:kwargs['shape'][1]]
+        yi, xi = np.meshgrid(yidx, np.arange(shape[1]), indexing='ij')
         yx_indices = np.column_stack((yi.ravel(), xi.ravel()))
         data = interp_func(yx_indices, n_neighbors=self.n_neighbors,
                            power=self.power, reg=self.reg)
 
-        return data.reshape(kwargs['shape'])
+        return data.reshape(shape)
@@ -3,16 +3,24 @@
 Tests for the background_2d module.
 """
 
+from contextlib import nullcontext
+
 import astropy.units as u
 import numpy as np
 import pytest
 from astropy.nddata import CCDData, NDData
+from astropy.stats import SigmaClip
 from astropy.utils.exceptions import (AstropyDeprecationWarning,
                                       AstropyUserWarning)
 from numpy.testing import assert_allclose, assert_equal
 
+from photutils.background import background_2d
 from photutils.background.background_2d import Background2D
-from photutils.background.core import MeanBackground, SExtractorBackground
+from photutils.background.core import (BiweightLocationBackground,
+                                       MADStdBackgroundRMS, MeanBackground,
+                                       MedianBackground, MMMBackground,
+                                       SExtractorBackground,
+                                       StdBackgroundRMS)
 from photutils.background.interpolators import (BkgIDWInterpolator,
                                                 BkgZoomInterpolator)
 from photutils.utils._optional_deps import HAS_MATPLOTLIB
@@ -510,3 +518,195 @@ class TestBackground2D:
         bkgim = bkg.background
         assert bkgim.shape == shape
         assert_equal(data, data_orig)
+
+    def test_bands(self, monkeypatch):
+        """
+        Test that the box statistics do not depend on the size of the
+        bands of box rows used to compute them.
+        """
+        rng = np.random.default_rng(0)
+        data = rng.normal(10.0, 2.0, (203, 151))
+        data[rng.random(data.shape) < 0.01] = np.nan
+        mask = rng.random(data.shape) < 0.05
+        with pytest.warns(AstropyUserWarning):
+            bkg1 = Background2D(data, (20, 25), mask=mask)
+
+        # two box rows per band
+        monkeypatch.setattr(background_2d, '_BAND_NPIXELS', 40 * 151)
+        with pytest.warns(AstropyUserWarning):
+            bkg2 = Background2D(data, (20, 25), mask=mask)
+        assert_equal(bkg1.background_mesh, bkg2.background_mesh)
+        assert_equal(bkg1.background_rms_mesh, bkg2.background_rms_mesh)
+        assert_equal(bkg1.npixels_mesh, bkg2.npixels_mesh)
+        assert_equal(bkg1.background, bkg2.background)
+
+    @pytest.mark.parametrize('interpolator', INTERPOLATORS)
+    @pytest.mark.parametrize('edge_method', ['pad', 'crop'])
+    def test_write_background(self, tmp_path, interpolator, edge_method):
+        yy, xx = np.mgrid[0:203, 0:151]
+        data = 10.0 + 0.02 * xx + 5.0 * np.sin(yy / 30.0)
+        filename = tmp_path / 'data.dat'
+        data_mmap = np.memmap(filename, dtype=float, mode='w+',
+                              shape=data.shape)
+        data_mmap[:] = data
+        coverage_mask = np.zeros(data.shape, dtype=bool)
+        coverage_mask[0:10, 0:20] = True
+
+        if edge_method == 'crop':
+            ctx = pytest.warns(AstropyDeprecationWarning)
+            kwargs = {'edge_method': edge_method}
+        else:
+            ctx = nullcontext()
+            kwargs = {}
+        with ctx:
+            bkg = Background2D(data_mmap, (20, 25),
+                               coverage_mask=coverage_mask, fill_value=-1.0,
+                               interpolator=interpolator, **kwargs)
+
+        out = np.memmap(tmp_path / 'bkg.dat', dtype=float, mode='w+',
+                        shape=data.shape)
+        result = bkg.write_background(out, nrows=17)
+        assert result is out
+        assert_allclose(out, bkg.background, rtol=0, atol=1e-12)
+        assert_equal(out[coverage_mask], -1.0)
+
+        out = np.zeros(data.shape)
+        bkg.write_background(out, rms=True)
+        assert_allclose(out, bkg.background_rms, rtol=0, atol=1e-12)
+
+    def test_write_background_custom_interpolator(self):
+        bkg = Background2D(DATA, (25, 25),
+                           interpolator=lambda data, **kwargs: np.ones(
+                               kwargs['shape']))
+        out = np.zeros(DATA.shape)
+        bkg.write_background(out, nrows=7)
+        assert_equal(out, 1.0)
+
+    def test_write_background_invalid(self):
+        bkg = Background2D(DATA, (25, 25))
+        match = 'out must have the same shape as the input data'
+        with pytest.raises(ValueError, match=match):
+            bkg.write_background(np.zeros((10, 10)))
+        match = 'nrows must be a strictly-positive integer'
+        with pytest.raises(ValueError, match=match):
+            bkg.write_background(np.zeros(DATA.shape), nrows=0)
+
+    @pytest.mark.parametrize('box_size', [(20, 25), (7, 9)])
+    def test_n_jobs(self, box_size):
+        rng = np.random.default_rng(0)
+        data = rng.normal(10.0, 2.0, (203, 151))
+        mask = rng.random(data.shape) < 0.05
+        bkg1 = Background2D(data, box_size, mask=mask)
+        bkg2 = Background2D(data, box_size, mask=mask, n_jobs=4)
+        assert_equal(bkg1.background_mesh, bkg2.background_mesh)
+        assert_equal(bkg1.background_rms_mesh, bkg2.background_rms_mesh)
+        assert_equal(bkg1.npixels_mesh, bkg2.npixels_mesh)
+        assert_equal(bkg1.background, bkg2.background)
+
+        data[0, 0:50] = np.nan
+        match = 'Input data contains invalid values'
+        with pytest.warns(AstropyUserWarning, match=match):
+            Background2D(data, box_size, n_jobs=4)
+
+    @pytest.mark.parametrize('n_jobs', [0, 1.5, True])
+    def test_invalid_n_jobs(self, n_jobs):
+        match = 'n_jobs must be a strictly-positive integer or None'
+        with pytest.raises(ValueError, match=match):
+            Background2D(DATA, (25, 25), n_jobs=n_jobs)
+
+    @pytest.mark.parametrize('bkg_estimator',
+                             [MeanBackground(), MedianBackground(),
+                              MMMBackground(), SExtractorBackground()])
+    @pytest.mark.parametrize('bkgrms_estimator',
+                             [StdBackgroundRMS(), MADStdBackgroundRMS()])
+    @pytest.mark.parametrize('sigma_clip',
+                             [SigmaClip(sigma=3.0, maxiters=10), None,
+                              SigmaClip(sigma_lower=2.0, sigma_upper=2.5,
+                                        maxiters=None)])
+    @pytest.mark.parametrize('dtype', [np.float32, np.float64])
+    def test_fused_stats(self, monkeypatch, bkg_estimator, bkgrms_estimator,
+                         sigma_clip, dtype):
+        rng = np.random.default_rng(0)
+        data = rng.normal(10.0, 2.0, (103, 81)).astype(dtype)
+        data[10, 10] = 1.0e4
+        mask = np.zeros(data.shape, dtype=bool)
+        mask[20:40, 30:50] = True
+        kwargs = {'mask': mask, 'bkg_estimator': bkg_estimator,
+                  'bkgrms_estimator': bkgrms_estimator,
+                  'sigma_clip': sigma_clip, 'exclude_percentile': 50}
+        bkg1 = Background2D(data, (20, 25), **kwargs)
+        assert bkg1._fused_stats_kwargs is not None
+
+        # disable the fused statistics
+        monkeypatch.setattr(Background2D, '_fused_stats_kwargs', None)
+        bkg2 = Background2D(data, (20, 25), **kwargs)
+
+        rtol = 1.0e-5 if dtype == np.float32 else 1.0e-12
+        for attr in ('background_mesh', 'background_rms_mesh'):
+            mesh1 = getattr(bkg1, attr)
+            mesh2 = getattr(bkg2, attr)
+            assert mesh1.dtype == mesh2.dtype
+            assert_allclose(mesh1, mesh2, rtol=rtol)
+        assert_equal(bkg1.npixels_mesh, bkg2.npixels_mesh)
+
+    def test_fused_stats_unsupported(self):
+        class CustomBackground(MeanBackground):
+            def calc_background(self, data, axis=None, masked=False):
+                return super().calc_background(data, axis=axis,
+                                               masked=masked)
+
+        bkg = Background2D(DATA, (25, 25),
+                           bkg_estimator=BiweightLocationBackground())
+        assert bkg._fused_stats_kwargs is None
+        bkg = Background2D(DATA, (25, 25), bkg_estimator=CustomBackground())
+        assert bkg._fused_stats_kwargs is None
+        assert_allclose(bkg.background_mesh, BKG_MESH)
+        sigma_clip = SigmaClip(sigma=3.0, cenfunc='mean')
+        bkg = Background2D(DATA, (25, 25), sigma_clip=sigma_clip)
+        assert bkg._fused_stats_kwargs is None
+
+    @pytest.mark.parametrize('edge_method', ['pad', 'crop'])
+    @pytest.mark.parametrize('interpolator', INTERPOLATORS)
+    def test_with_mask(self, edge_method, interpolator):
+        rng = np.random.default_rng(0)
+        data = rng.normal(10.0, 2.0, (213, 157))
+        mask1 = rng.random(data.shape) < 0.001
+        mask2 = mask1.copy()
+        mask2[100:130, 20:60] = True
+        mask2[205:, 150:] = True
+        coverage_mask = np.zeros(data.shape, dtype=bool)
+        coverage_mask[:, :3] = True
+        kwargs = {'coverage_mask': coverage_mask,
+                  'interpolator': interpolator, 'filter_threshold': 10.0}
+        if edge_method == 'crop':
+            kwargs['edge_method'] = edge_method
+            ctx = pytest.warns(AstropyDeprecationWarning)
+        else:
+            ctx = nullcontext()
+
+        with ctx:
+            bkg1 = Background2D(data, (20, 25), mask=mask1, **kwargs)
+            bkg3 = Background2D(data, (20, 25), mask=mask2, **kwargs)
+            bkg5 = Background2D(data, (20, 25), **kwargs)
+        background1 = bkg1.background
+        bkg2 = bkg1.with_mask(data, mask2)
+
+        for attr in ('background_mesh', 'background_rms_mesh',
+                     'npixels_mesh', 'background', 'background_rms'):
+            assert_allclose(getattr(bkg2, attr), getattr(bkg3, attr))
+        assert_equal(bkg1.background, background1)
+
+        bkg4 = bkg2.with_mask(data, None)
+        assert_allclose(bkg4.background, bkg5.background)
+
+    def test_with_mask_invalid(self):
+        bkg = Background2D(DATA, (25, 25))
+        match = 'data must have the same shape as the input data'
+        with pytest.raises(ValueError, match=match):
+            bkg.with_mask(DATA[:50], None)
+        match = 'data and mask must have the same shape'
+        with pytest.raises(ValueError, match=match):
+            bkg.with_mask(DATA, np.zeros((50, 50), dtype=bool))
+        match = 'All boxes contain'
+        with pytest.raises(ValueError, match=match):
+            bkg.with_mask(DATA, np.ones(DATA.shape, dtype=bool))
@@ -142,7 +142,10 @@ def make_model_image(shape, model, params_table, *, model_shape=None,
         to the image. The progress bar requires that the `tqdm
         <https://tqdm.github.io/>`_ optional dependency be installed.
         Note that the progress bar does not currently work in the
-        Jupyter console due to limitations in ``tqdm``.
+        Jupyter console due to limitations in ``tqdm``. For models
+        that render the sources in batches (e.g.,
+        `~photutils.psf.GriddedPSFModel`), the progress bar is updated
+        once per batch of sources.
 
     Returns
     -------
@@ -255,6 +258,21 @@ def make_model_image(shape, model, params_table, *, model_shape=None,
     # copy the input model to leave it unchanged
     model = model.copy()
 
+    # models that can evaluate many sources at once (e.g.,
+    # GriddedPSFModel) are rendered in batches instead of per source
+    if (discretize_method == 'center' and not variable_shape
+            and hasattr(model, 'evaluate_sources')
+            and not any(isinstance(params_table[param], u.Quantity)
+                        for param in params_to_set)
+            and not isinstance(local_bkg, u.Quantity)):
+        if model_shape is None:
+            model_shape = _model_shape_from_bbox(model,
+                                                 bbox_factor=bbox_factor)
+        return _make_model_image_batched(shape, model, params_table,
+                                         model_shape, local_bkg,
+                                         x_name=x_name, y_name=y_name,
+                                         progress_bar=progress_bar)
+
     if progress_bar:  # pragma: no cover
         desc = 'Add model sources'
         params_table = add_progress_bar(params_table, desc=desc)
@@ -306,6 +324,92 @@ def make_model_image(shape, model, params_table, *, model_shape=None,
     return image
 
 
+def _make_model_image_batched(shape, model, params_table, model_shape,
+                              local_bkg, *, x_name='x_0', y_name='y_0',
+                              chunk_size=1000, progress_bar=False):
+    """
+    Make a 2D image of model sources using the model
+    ``evaluate_sources`` method.
+
+    The models of many sources are evaluated at once (in chunks of
+    ``chunk_size`` sources) on their ``model_shape`` cutouts instead of
+    evaluating each source individually. The cutouts are defined in
+    the same way as `~astropy.nddata.overlap_slices` and only the
+    pixels that overlap with the output image are added to the image.
+
+    Parameters
+    ----------
+    shape : 2-tuple of int
+        The shape of the output image.
+
+    model : 2D `astropy.modeling.Model`
+        The 2D model to be used to render the sources. The model must
+        have an ``evaluate_sources`` method.
+
+    params_table : `~astropy.table.Table`
+        A table containing the model parameters for each source.
+
+    model_shape : 2-tuple of int
+        The shape around the (x, y) center of each source that will
+        used to evaluate the ``model``.
+
+    local_bkg : 1D `~numpy.ndarray`
+        The per-pixel local background value of each source.
+
+    x_name, y_name : str, optional
+        The names of the ``model`` parameters that correspond to the x
+        and y positions of the sources.
+
+    chunk_size : int, optional
+        The maximum number of sources to evaluate at once.
+
+    progress_bar : bool, optional
+        Whether to display a progress bar while adding the batches of
+        sources to the image.
+
+    Returns
+    -------
+    array : 2D `~numpy.ndarray`
+        The rendered image containing the model sources.
+    """
+    nsources = len(params_table)
+    params = {}
+    for param in model.param_names:
+        if param in params_table.colnames:
+            params[param] = np.asarray(params_table[param], dtype=float)
+        else:
+            params[param] = np.full(nsources, getattr(model, param).value,
+                                    dtype=float)
+    local_bkg = np.broadcast_to(np.asarray(local_bkg, dtype=float),
+                                nsources)
+
+    # the lower-left cutout pixel of each source, as defined in
+    # astropy.nddata.overlap_slices
+    ny, nx = model_shape
+    ymin = np.ceil(params[y_name] - (ny / 2.0)).astype(int)
+    xmin = np.ceil(params[x_name] - (nx / 2.0)).astype(int)
+    yoffsets, xoffsets = np.mgrid[0:ny, 0:nx]
+
+    starts = range(0, nsources, chunk_size)
+    if progress_bar:  # pragma: no cover
+        desc = 'Add model source batches'
+        starts = add_progress_bar(starts, desc=desc)
+
+    image = np.zeros(shape, dtype=float)
+    for start in starts:
+        slc = slice(start, start + chunk_size)
+        yy = ymin[slc, None, None] + yoffsets
+        xx = xmin[slc, None, None] + xoffsets
+        stamps = model.evaluate_sources(
+            xx, yy, *(params[param][slc] for param in model.param_names))
+        stamps += local_bkg[slc, None, None]
+
+        mask = (yy >= 0) & (yy < shape[0]) & (xx >= 0) & (xx < shape[1])
+        np.add.at(image, (yy[mask], xx[mask]), stamps[mask])
+
+    return image
+
+
 def _model_shape_from_bbox(model, bbox_factor=None):
     """
     Calculate the model shape from the model bounding box.
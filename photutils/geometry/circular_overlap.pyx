@@ -8,15 +8,21 @@ overlap of a rectangle and a circle (written by Thomas Robitaille).
 import numpy as np
 cimport numpy as np
 
-__all__ = ['circular_overlap_grid']
+__all__ = ['circular_overlap_grid', 'circular_overlap_grids',
+           'circular_overlap_sums']
 
 
-cdef extern from "math.h":
+cdef extern from "math.h" nogil:
 
     double asin(double x)
+    double ceil(double x)
+    double floor(double x)
     double sin(double x)
     double sqrt(double x)
 
+cimport cython
+from cython.parallel cimport prange
+
 
 DTYPE = np.float64
 ctypedef np.float64_t DTYPE_t
@@ -58,13 +64,172 @@ def circular_overlap_grid(double xmin, double xmax, double ymin, double ymax,
         2-d array of shape (ny, nx) giving the fraction of the overlap.
     """
 
-    cdef unsigned int i, j
-    cdef double x, y, dx, dy, d, pixel_radius
-    cdef double bxmin, bxmax, bymin, bymax
-    cdef double pxmin, pxcen, pxmax, pymin, pycen, pymax
+    # Define output array
+    frac = np.zeros([ny, nx], dtype=DTYPE)
+    cdef double[:, ::1] frac_view = frac
+
+    with nogil:
+        circular_overlap_fill(frac_view, xmin, xmax, ymin, ymax, nx, ny, r,
+                              use_exact, subpixels)
+
+    return frac
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def circular_overlap_grids(xmin, xmax, ymin, ymax, nx, ny, r, int use_exact,
+                           int subpixels):
+    """
+    circular_overlap_grids(xmin, xmax, ymin, ymax, nx, ny, r, use_exact,
+                           subpixels)
+
+    Area of overlap between many circles and their pixel grids. Each
+    circle is centered on the origin of its own grid.
+
+    The grids are computed without holding the GIL, in parallel over
+    the circles when photutils is compiled with OpenMP support.
+
+    Parameters
+    ----------
+    xmin, xmax, ymin, ymax : array_like (float)
+        Extent of each grid in the x and y direction.
+    nx, ny : array_like (int)
+        Dimensions of each grid.
+    r : array_like (float)
+        The radius of each circle.
+    use_exact : 0 or 1
+        If ``1`` calculates exact overlap, if ``0`` uses ``subpixel`` number
+        of subpixels to calculate the overlap.
+    subpixels : int
+        Each pixel resampled by this factor in each dimension, thus each
+        pixel is divided into ``subpixels ** 2`` subpixels.
+
+    Returns
+    -------
+    frac : `~numpy.ndarray` (float)
+        3-d array of shape (n, max(ny), max(nx)) giving the fraction of
+        the overlap. The grid for circle ``k`` is ``frac[k, :ny[k],
+        :nx[k]]``. The remaining values are zero.
+    """
+
+    cdef Py_ssize_t k, n
+
+    arrays = np.broadcast_arrays(*[np.asarray(arr, dtype=DTYPE)
+                                   for arr in (xmin, xmax, ymin, ymax, r)])
+    cdef const double[:] xmin_view = np.ravel(arrays[0])
+    cdef const double[:] xmax_view = np.ravel(arrays[1])
+    cdef const double[:] ymin_view = np.ravel(arrays[2])
+    cdef const double[:] ymax_view = np.ravel(arrays[3])
+    cdef const double[:] r_view = np.ravel(arrays[4])
+    n = xmin_view.shape[0]
+    nx, ny = np.broadcast_arrays(np.asarray(nx, dtype=np.intp),
+                                 np.asarray(ny, dtype=np.intp), arrays[0])[:2]
+    cdef const Py_ssize_t[:] nx_view = np.ravel(nx)
+    cdef const Py_ssize_t[:] ny_view = np.ravel(ny)
 
     # Define output array
-    cdef np.ndarray[DTYPE_t, ndim=2] frac = np.zeros([ny, nx], dtype=DTYPE)
+    frac = np.zeros([n, np.max(ny, initial=0), np.max(nx, initial=0)],
+                    dtype=DTYPE)
+    cdef double[:, :, ::1] frac_view = frac
+
+    for k in prange(n, nogil=True, schedule='guided'):
+        circular_overlap_fill(frac_view[k], xmin_view[k], xmax_view[k],
+                              ymin_view[k], ymax_view[k], nx_view[k],
+                              ny_view[k], r_view[k], use_exact, subpixels)
+
+    return frac
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def circular_overlap_sums(const double[:, :] data, const double[:, :] error,
+                          const np.uint8_t[:, :] mask, const double[:] xpos,
+                          const double[:] ypos, double r_in, double r_out,
+                          int use_exact, int subpixels):
+    """
+    circular_overlap_sums(data, error, mask, xpos, ypos, r_in, r_out,
+                          use_exact, subpixels)
+
+    Sums of the data and variance values weighted by the area of overlap
+    between circles (or circular annuli) and a pixel grid, for many
+    circle positions at once.
+
+    The overlap weights are identical to those computed by
+    `circular_overlap_grid` over the minimal bounding box of each
+    circle, but they are never stored in an array.
+
+    Parameters
+    ----------
+    data : 2D `~numpy.ndarray` (float)
+        The data array.
+    error : 2D `~numpy.ndarray` (float) or `None`
+        The 1-sigma errors of the data array. If `None`, then the
+        returned variance sums are zero.
+    mask : 2D `~numpy.ndarray` (uint8) or `None`
+        The pixel mask, where a non-zero value indicates a masked pixel.
+    xpos, ypos : 1D `~numpy.ndarray` (float)
+        The pixel coordinates of the circle centers.
+    r_in : float
+        The inner radius of the circular annulus. Set to zero for a
+        circle.
+    r_out : float
+        The radius of the circle (or outer radius of the circular
+        annulus).
+    use_exact : 0 or 1
+        If ``1`` calculates exact overlap, if ``0`` uses ``subpixel`` number
+        of subpixels to calculate the overlap.
+    subpixels : int
+        Each pixel resampled by this factor in each dimension, thus each
+        pixel is divided into ``subpixels ** 2`` subpixels.
+
+    Returns
+    -------
+    sums : `~numpy.ndarray` (float)
+        1-d array of the weighted data sums. The value is NaN for
+        circles whose bounding box does not overlap the data.
+    variances : `~numpy.ndarray` (float)
+        1-d array of the weighted variance sums. The value is NaN for
+        circles whose bounding box does not overlap the data.
+    """
+
+    cdef Py_ssize_t k, n
+    cdef bint has_error = error is not None
+    cdef bint has_mask = mask is not None
+
+    n = xpos.shape[0]
+    sums = np.full(n, np.nan, dtype=DTYPE)
+    variances = np.full(n, np.nan, dtype=DTYPE)
+    cdef double[::1] sums_view = sums
+    cdef double[::1] variances_view = variances
+
+    for k in prange(n, nogil=True, schedule='guided'):
+        circular_overlap_sum(data, error, mask, has_error, has_mask,
+                             xpos[k], ypos[k], r_in, r_out, use_exact,
+                             subpixels, &sums_view[k], &variances_view[k])
+
+    return sums, variances
+
+
+# NOTE: The following functions use cdef because they are not intended
+# to be called from the Python code. Using def makes them callable from
+# outside, but also slower. In any case, these aren't useful to call
+# from outside because they only operate on a single pixel.
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void circular_overlap_fill(double[:, ::1] frac, double xmin,
+                                double xmax, double ymin, double ymax,
+                                Py_ssize_t nx, Py_ssize_t ny, double r,
+                                int use_exact, int subpixels) noexcept nogil:
+    """
+    Fill the first ``ny`` rows and ``nx`` columns of ``frac`` with the
+    fraction of overlap between a circle centered on the origin and
+    each pixel of the grid.
+    """
+
+    cdef Py_ssize_t i, j
+    cdef double dx, dy, pixel_radius
 
     # Find the width of each element in x and y
     dx = (xmax - xmin) / nx
@@ -73,59 +238,126 @@ def circular_overlap_grid(double xmin, double xmax, double ymin, double ymax,
     # Find the radius of a single pixel
     pixel_radius = 0.5 * sqrt(dx * dx + dy * dy)
 
-    # Define bounding box
-    bxmin = -r - 0.5 * dx
-    bxmax = +r + 0.5 * dx
-    bymin = -r - 0.5 * dy
-    bymax = +r + 0.5 * dy
-
     for i in range(nx):
-        pxmin = xmin + i * dx  # lower end of pixel
-        pxcen = pxmin + dx * 0.5
-        pxmax = pxmin + dx  # upper end of pixel
-        if pxmax > bxmin and pxmin < bxmax:
-            for j in range(ny):
-                pymin = ymin + j * dy
-                pycen = pymin + dy * 0.5
-                pymax = pymin + dy
-                if pymax > bymin and pymin < bymax:
-
-                    # Distance from circle center to pixel center.
-                    d = sqrt(pxcen * pxcen + pycen * pycen)
-
-                    # If pixel center is "well within" circle, count full
-                    # pixel.
-                    if d < r - pixel_radius:
-                        frac[j, i] = 1.0
-
-                    # If pixel center is "close" to circle border, find
-                    # overlap.
-                    elif d < r + pixel_radius:
-
-                        # Either do exact calculation or use subpixel
-                        # sampling:
-                        if use_exact:
-                            frac[j, i] = circular_overlap_single_exact(
-                                pxmin, pymin, pxmax, pymax, r) / (dx * dy)
-                        else:
-                            frac[j, i] = circular_overlap_single_subpixel(
-                                pxmin, pymin, pxmax, pymax, r, subpixels)
-
-                    # Otherwise, it is fully outside circle.
-                    # No action needed.
+        for j in range(ny):
+            frac[j, i] = circular_overlap_pixel(xmin + i * dx, ymin + j * dy,
+                                                dx, dy, r, pixel_radius,
+                                                use_exact, subpixels)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void circular_overlap_sum(const double[:, :] data,
+                               const double[:, :] error,
+                               const np.uint8_t[:, :] mask, bint has_error,
+                               bint has_mask, double x, double y,
+                               double r_in, double r_out, int use_exact,
+                               int subpixels, double *sum_out,
+                               double *var_out) noexcept nogil:
+    """
+    Compute the weighted data and variance sums for a single circle (or
+    circular annulus) centered at (x, y). The outputs are left untouched
+    if the circle bounding box does not overlap the data.
+    """
 
-    return frac
+    cdef Py_ssize_t i, j
+    cdef Py_ssize_t ixmin, ixmax, iymin, iymax, nx, ny
+    cdef double xmin, xmax, ymin, ymax, dx, dy, pixel_radius
+    cdef double weight, value, sum_, var_sum
+
+    # minimal bounding box (see BoundingBox.from_float)
+    ixmin = <Py_ssize_t>floor(x - r_out + 0.5)
+    ixmax = <Py_ssize_t>ceil(x + r_out + 0.5)
+    iymin = <Py_ssize_t>floor(y - r_out + 0.5)
+    iymax = <Py_ssize_t>ceil(y + r_out + 0.5)
+
+    # no overlap of the bounding box with the data
+    if (ixmin >= data.shape[1] or iymin >= data.shape[0]
+            or ixmax <= 0 or iymax <= 0):
+        return
+
+    # pixel edges after recentering the circle at the origin
+    nx = ixmax - ixmin
+    ny = iymax - iymin
+    xmin = ixmin - 0.5 - x
+    xmax = ixmax - 0.5 - x
+    ymin = iymin - 0.5 - y
+    ymax = iymax - 0.5 - y
+    dx = (xmax - xmin) / nx
+    dy = (ymax - ymin) / ny
+    pixel_radius = 0.5 * sqrt(dx * dx + dy * dy)
 
+    sum_ = 0.0
+    var_sum = 0.0
+    for j in range(max(iymin, 0), min(iymax, data.shape[0])):
+        for i in range(max(ixmin, 0), min(ixmax, data.shape[1])):
+            if has_mask and mask[j, i]:
+                continue
+
+            weight = circular_overlap_pixel(
+                xmin + (i - ixmin) * dx, ymin + (j - iymin) * dy, dx, dy,
+                r_out, pixel_radius, use_exact, subpixels)
+            if r_in > 0:
+                weight -= circular_overlap_pixel(
+                    xmin + (i - ixmin) * dx, ymin + (j - iymin) * dy, dx,
+                    dy, r_in, pixel_radius, use_exact, subpixels)
+
+            if weight > 0:
+                sum_ += data[j, i] * weight
+                if has_error:
+                    value = error[j, i]
+                    var_sum += value * value * weight
+
+    sum_out[0] = sum_
+    var_out[0] = var_sum
+
+
+cdef double circular_overlap_pixel(double pxmin, double pymin, double dx,
+                                   double dy, double r, double pixel_radius,
+                                   int use_exact,
+                                   int subpixels) noexcept nogil:
+    """
+    Return the fraction of overlap between a circle centered on the
+    origin and a single pixel with given lower edges and size.
+    """
+
+    cdef double d, pxcen, pxmax, pycen, pymax
+
+    pxcen = pxmin + dx * 0.5
+    pxmax = pxmin + dx  # upper end of pixel
+    pycen = pymin + dy * 0.5
+    pymax = pymin + dy
+
+    # Pixel is outside of the circle bounding box
+    if (pxmax <= -r - 0.5 * dx or pxmin >= r + 0.5 * dx
+            or pymax <= -r - 0.5 * dy or pymin >= r + 0.5 * dy):
+        return 0.0
+
+    # Distance from circle center to pixel center.
+    d = sqrt(pxcen * pxcen + pycen * pycen)
+
+    # If pixel center is "well within" circle, count full pixel.
+    if d < r - pixel_radius:
+        return 1.0
+
+    # If pixel center is "close" to circle border, find overlap.
+    if d < r + pixel_radius:
+        # Either do exact calculation or use subpixel sampling:
+        if use_exact:
+            return circular_overlap_single_exact(
+                pxmin, pymin, pxmax, pymax, r) / (dx * dy)
+        else:
+            return circular_overlap_single_subpixel(
+                pxmin, pymin, pxmax, pymax, r, subpixels)
 
-# NOTE: The following two functions use cdef because they are not
-# intended to be called from the Python code. Using def makes them
-# callable from outside, but also slower. In any case, these aren't useful
-# to call from outside because they only operate on a single pixel.
+    # Otherwise, it is fully outside circle.
+    return 0.0
 
 
 cdef double circular_overlap_single_subpixel(double x0, double y0,
                                              double x1, double y1,
-                                             double r, int subpixels):
+                                             double r,
+                                             int subpixels) noexcept nogil:
     """Return the fraction of overlap between a circle and a single pixel
     with given extent, using a sub-pixel sampling method."""
 
@@ -151,7 +383,7 @@ cdef double circular_overlap_single_subpixel(double x0, double y0,
 
 cdef double circular_overlap_single_exact(double xmin, double ymin,
                                           double xmax, double ymax,
-                                          double r):
+                                          double r) noexcept nogil:
     """
     Area of overlap of a rectangle and a circle
     """
@@ -186,7 +418,7 @@ cdef double circular_overlap_single_exact(double xmin, double ymin,
 
 
 cdef double circular_overlap_core(double xmin, double ymin, double xmax, double ymax,
-                          double r):
+                          double r) noexcept nogil:
     """
     Assumes that the center of the circle is <= xmin,
     ymin (can always modify input to conform to this).
@@ -9,15 +9,14 @@ import numpy as np
 cimport numpy as np
 
 
-cdef extern from "math.h":
+cdef extern from "math.h" nogil:
 
     double asin(double x)
     double sin(double x)
     double cos(double x)
     double sqrt(double x)
     double fabs(double x)
-
-from cpython cimport bool
+    double M_PI
 
 DTYPE = np.float64
 ctypedef np.float64_t DTYPE_t
@@ -34,7 +33,7 @@ ctypedef struct intersections:
     point p2
 
 
-cdef double floor_sqrt(double x):
+cdef double floor_sqrt(double x) noexcept nogil:
     """
     In some of the geometrical functions, we have to take the sqrt of a number
     and we know that the number should be >= 0. However, in some cases the
@@ -56,7 +55,7 @@ cdef double floor_sqrt(double x):
 # still use 'def' for now.
 
 
-cdef double distance(double x1, double y1, double x2, double y2):
+cdef double distance(double x1, double y1, double x2, double y2) noexcept nogil:
     """
     Distance between two points in two dimensions.
 
@@ -76,7 +75,7 @@ cdef double distance(double x1, double y1, double x2, double y2):
     return sqrt((x2 - x1) ** 2 + (y2 - y1) ** 2)
 
 
-cdef double area_arc(double x1, double y1, double x2, double y2, double r):
+cdef double area_arc(double x1, double y1, double x2, double y2, double r) noexcept nogil:
     """
     Area of a circle arc with radius r between points (x1, y1) and (x2, y2).
 
@@ -92,14 +91,14 @@ cdef double area_arc(double x1, double y1, double x2, double y2, double r):
 
 
 cdef double area_triangle(double x1, double y1, double x2, double y2, double x3,
-                  double y3):
+                  double y3) noexcept nogil:
     """
     Area of a triangle defined by three vertices.
     """
     return 0.5 * abs(x1 * (y2 - y3) + x2 * (y3 - y1) + x3 * (y1 - y2))
 
 
-cdef double area_arc_unit(double x1, double y1, double x2, double y2):
+cdef double area_arc_unit(double x1, double y1, double x2, double y2) noexcept nogil:
     """
     Area of a circle arc with radius R between points (x1, y1) and (x2, y2)
 
@@ -113,7 +112,7 @@ cdef double area_arc_unit(double x1, double y1, double x2, double y2):
     return 0.5 * (theta - sin(theta))
 
 
-cdef int in_triangle(double x, double y, double x1, double y1, double x2, double y2, double x3, double y3):
+cdef int in_triangle(double x, double y, double x1, double y1, double x2, double y2, double x3, double y3) noexcept nogil:
     """
     Check if a point (x,y) is inside a triangle
     """
@@ -126,7 +125,7 @@ cdef int in_triangle(double x, double y, double x1, double y1, double x2, double
     return c % 2 == 1
 
 
-cdef intersections circle_line(double x1, double y1, double x2, double y2):
+cdef intersections circle_line(double x1, double y1, double x2, double y2) noexcept nogil:
     """Intersection of a line defined by two points with a unit circle"""
 
     cdef double a, b, delta, dx, dy
@@ -192,7 +191,7 @@ cdef intersections circle_line(double x1, double y1, double x2, double y2):
     return inter
 
 
-cdef point circle_segment_single2(double x1, double y1, double x2, double y2):
+cdef point circle_segment_single2(double x1, double y1, double x2, double y2) noexcept nogil:
     """
     The intersection of a line with the unit circle. The intersection the
     closest to (x2, y2) is chosen.
@@ -227,7 +226,7 @@ cdef point circle_segment_single2(double x1, double y1, double x2, double y2):
     return pt
 
 
-cdef intersections circle_segment(double x1, double y1, double x2, double y2):
+cdef intersections circle_segment(double x1, double y1, double x2, double y2) noexcept nogil:
     """
     Intersection(s) of a segment with the unit circle. Discard any
     solution not on the segment.
@@ -256,17 +255,19 @@ cdef intersections circle_segment(double x1, double y1, double x2, double y2):
     return inter_new
 
 
-cdef double overlap_area_triangle_unit_circle(double x1, double y1, double x2, double y2, double x3, double y3):
+cdef double overlap_area_triangle_unit_circle(double x1, double y1, double x2, double y2, double x3, double y3) except? -1 nogil:
     """
     Given a triangle defined by three points (x1, y1), (x2, y2), and
     (x3, y3), find the area of overlap with the unit circle.
     """
 
     cdef double d1, d2, d3
-    cdef bool in1, in2, in3
-    cdef bool on1, on2, on3
+    cdef bint in1, in2, in3
+    cdef bint on1, on2, on3
+    cdef bint intersect13, intersect23
+    cdef double xp, yp
     cdef double area
-    cdef double PI = np.pi
+    cdef double PI = M_PI
     cdef intersections inter
     cdef point pt1, pt2, pt3, pt4, pt5, pt6, pt_tmp
 
@@ -293,7 +294,8 @@ cdef double overlap_area_triangle_unit_circle(double x1, double y1, double x2, d
             x1, y1, d1, x2, y2, d2, x3, y3, d3 = x3, y3, d3, x2, y2, d2, x1, y1, d1
 
     if d1 > d2 or d2 > d3 or d1 > d3:
-        raise Exception("ERROR: vertices did not sort correctly")
+        with gil:
+            raise Exception("ERROR: vertices did not sort correctly")
 
     # Determine number of vertices inside circle
     in1 = d1 < 1
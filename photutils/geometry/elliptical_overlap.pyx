@@ -12,22 +12,21 @@ import numpy as np
 
 cimport numpy as np
 
-__all__ = ['elliptical_overlap_grid']
+__all__ = ['elliptical_overlap_grid', 'elliptical_overlap_grids']
 
 
-cdef extern from "math.h":
+cdef extern from "math.h" nogil:
 
     double asin(double x)
     double sin(double x)
     double cos(double x)
     double sqrt(double x)
 
-from cpython cimport bool
-
 DTYPE = np.float64
 ctypedef np.float64_t DTYPE_t
 
 cimport cython
+from cython.parallel cimport prange
 
 # NOTE: Here we need to make sure we use cimport to import the C functions from
 # core (since these were defined with cdef). This also requires the core.pxd
@@ -71,15 +70,111 @@ def elliptical_overlap_grid(double xmin, double xmax, double ymin, double ymax,
         2-d array giving the fraction of the overlap.
     """
 
-    cdef unsigned int i, j
-    cdef double x, y, dx, dy
+    # Define output array
+    frac = np.zeros([ny, nx], dtype=DTYPE)
+    cdef double[:, ::1] frac_view = frac
+
+    with nogil:
+        elliptical_overlap_fill(frac_view, xmin, xmax, ymin, ymax, nx, ny,
+                                rx, ry, theta, use_exact, subpixels)
+
+    return frac
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def elliptical_overlap_grids(xmin, xmax, ymin, ymax, nx, ny, rx, ry, theta,
+                             int use_exact, int subpixels):
+    """
+    elliptical_overlap_grids(xmin, xmax, ymin, ymax, nx, ny, rx, ry, theta,
+                             use_exact, subpixels)
+
+    Area of overlap between many ellipses and their pixel grids. Each
+    ellipse is centered on the origin of its own grid.
+
+    The grids are computed without holding the GIL, in parallel over
+    the ellipses when photutils is compiled with OpenMP support.
+
+    Parameters
+    ----------
+    xmin, xmax, ymin, ymax : array_like (float)
+        Extent of each grid in the x and y direction.
+    nx, ny : array_like (int)
+        Dimensions of each grid.
+    rx : array_like (float)
+        The semimajor axis of each ellipse.
+    ry : array_like (float)
+        The semiminor axis of each ellipse.
+    theta : array_like (float)
+        The position angle of the semimajor axis of each ellipse in
+        radians (counterclockwise).
+    use_exact : 0 or 1
+        If set to 1, calculates the exact overlap, while if set to 0, uses a
+        subpixel sampling method with ``subpixel`` subpixels in each direction.
+    subpixels : int
+        If ``use_exact`` is 0, each pixel is resampled by this factor in each
+        dimension. Thus, each pixel is divided into ``subpixels ** 2``
+        subpixels.
+
+    Returns
+    -------
+    frac : `~numpy.ndarray`
+        3-d array of shape (n, max(ny), max(nx)) giving the fraction of
+        the overlap. The grid for ellipse ``k`` is ``frac[k, :ny[k],
+        :nx[k]]``. The remaining values are zero.
+    """
+
+    cdef Py_ssize_t k, n
+
+    arrays = np.broadcast_arrays(*[np.asarray(arr, dtype=DTYPE)
+                                   for arr in (xmin, xmax, ymin, ymax, rx, ry,
+                                               theta)])
+    cdef const double[:] xmin_view = np.ravel(arrays[0])
+    cdef const double[:] xmax_view = np.ravel(arrays[1])
+    cdef const double[:] ymin_view = np.ravel(arrays[2])
+    cdef const double[:] ymax_view = np.ravel(arrays[3])
+    cdef const double[:] rx_view = np.ravel(arrays[4])
+    cdef const double[:] ry_view = np.ravel(arrays[5])
+    cdef const double[:] theta_view = np.ravel(arrays[6])
+    n = xmin_view.shape[0]
+    nx, ny = np.broadcast_arrays(np.asarray(nx, dtype=np.intp),
+                                 np.asarray(ny, dtype=np.intp), arrays[0])[:2]
+    cdef const Py_ssize_t[:] nx_view = np.ravel(nx)
+    cdef const Py_ssize_t[:] ny_view = np.ravel(ny)
+
+    # Define output array
+    frac = np.zeros([n, np.max(ny, initial=0), np.max(nx, initial=0)],
+                    dtype=DTYPE)
+    cdef double[:, :, ::1] frac_view = frac
+
+    for k in prange(n, nogil=True, schedule='guided'):
+        elliptical_overlap_fill(frac_view[k], xmin_view[k], xmax_view[k],
+                                ymin_view[k], ymax_view[k], nx_view[k],
+                                ny_view[k], rx_view[k], ry_view[k],
+                                theta_view[k], use_exact, subpixels)
+
+    return frac
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef int elliptical_overlap_fill(double[:, ::1] frac, double xmin,
+                                 double xmax, double ymin, double ymax,
+                                 Py_ssize_t nx, Py_ssize_t ny, double rx,
+                                 double ry, double theta, int use_exact,
+                                 int subpixels) except -1 nogil:
+    """
+    Fill the first ``ny`` rows and ``nx`` columns of ``frac`` with the
+    fraction of overlap between an ellipse centered on the origin and
+    each pixel of the grid.
+    """
+
+    cdef Py_ssize_t i, j
+    cdef double r, dx, dy
     cdef double bxmin, bxmax, bymin, bymax
     cdef double pxmin, pxmax, pymin, pymax
     cdef double norm
 
-    # Define output array
-    cdef np.ndarray[DTYPE_t, ndim=2] frac = np.zeros([ny, nx], dtype=DTYPE)
-
     # Find the width of each element in x and y
     dx = (xmax - xmin) / nx
     dy = (ymax - ymin) / ny
@@ -113,10 +208,11 @@ def elliptical_overlap_grid(double xmin, double xmax, double ymin, double ymax,
                         frac[j, i] = elliptical_overlap_single_subpixel(
                             pxmin, pymin, pxmax, pymax, rx, ry, theta,
                             subpixels)
-    return frac
+
+    return 0
 
 
-# NOTE: The following two functions use cdef because they are not
+# NOTE: The following functions use cdef because they are not
 # intended to be called from the Python code. Using def makes them
 # callable from outside, but also slower. In any case, these aren't useful
 # to call from outside because they only operate on a single pixel.
@@ -125,7 +221,8 @@ def elliptical_overlap_grid(double xmin, double xmax, double ymin, double ymax,
 cdef double elliptical_overlap_single_subpixel(double x0, double y0,
                                                double x1, double y1,
                                                double rx, double ry,
-                                               double theta, int subpixels):
+                                               double theta,
+                                               int subpixels) noexcept nogil:
     """
     Return the fraction of overlap between a ellipse and a single pixel with
     given extent, using a sub-pixel sampling method.
@@ -166,7 +263,7 @@ cdef double elliptical_overlap_single_subpixel(double x0, double y0,
 cdef double elliptical_overlap_single_exact(double xmin, double ymin,
                                             double xmax, double ymax,
                                             double rx, double ry,
-                                            double theta):
+                                            double theta) except? -1 nogil:
     """
     Given a rectangle defined by (xmin, ymin, xmax, ymax) and an ellipse
     with major and minor axes rx and ry respectively, position angle theta,
@@ -176,6 +273,7 @@ cdef double elliptical_overlap_single_exact(double xmin, double ymin,
     cdef double cos_m_theta = cos(-theta)
     cdef double sin_m_theta = sin(-theta)
     cdef double scale
+    cdef double x1, y1, x2, y2, x3, y3, x4, y4
 
     # Find scale by which the areas will be shrunk
     scale = rx * ry
@@ -8,10 +8,10 @@ rectangle and a pixel grid.
 import numpy as np
 cimport numpy as np
 
-__all__ = ['rectangular_overlap_grid']
+__all__ = ['rectangular_overlap_grid', 'rectangular_overlap_grids']
 
 
-cdef extern from "math.h":
+cdef extern from "math.h" nogil:
 
     double asin(double x)
     double sin(double x)
@@ -19,12 +19,11 @@ cdef extern from "math.h":
     double sqrt(double x)
     double fabs(double x)
 
-from cpython cimport bool
-
 DTYPE = np.float64
 ctypedef np.float64_t DTYPE_t
 
 cimport cython
+from cython.parallel cimport prange
 
 
 def rectangular_overlap_grid(double xmin, double xmax, double ymin,
@@ -64,41 +63,157 @@ def rectangular_overlap_grid(double xmin, double xmax, double ymin,
         2-d array giving the fraction of the overlap.
     """
 
-    cdef unsigned int i, j
-    cdef double x, y, dx, dy
-    cdef double pxmin, pxmax, pymin, pymax
+    # Define output array
+    frac = np.zeros([ny, nx], dtype=DTYPE)
+    cdef double[:, ::1] frac_view = frac
+
+    with nogil:
+        rectangular_overlap_fill(frac_view, xmin, xmax, ymin, ymax, nx, ny,
+                                 width, height, theta, use_exact, subpixels)
+
+    return frac
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+def rectangular_overlap_grids(xmin, xmax, ymin, ymax, nx, ny, width, height,
+                              theta, int use_exact, int subpixels):
+    """
+    rectangular_overlap_grids(xmin, xmax, ymin, ymax, nx, ny, width,
+                              height, theta, use_exact, subpixels)
+
+    Area of overlap between many rectangles and their pixel grids. Each
+    rectangle is centered on the origin of its own grid.
+
+    The grids are computed without holding the GIL, in parallel over
+    the rectangles when photutils is compiled with OpenMP support.
+
+    Parameters
+    ----------
+    xmin, xmax, ymin, ymax : array_like (float)
+        Extent of each grid in the x and y direction.
+    nx, ny : array_like (int)
+        Dimensions of each grid.
+    width : array_like (float)
+        The width of each rectangle.
+    height : array_like (float)
+        The height of each rectangle.
+    theta : array_like (float)
+        The position angle of each rectangle in radians
+        (counterclockwise).
+    use_exact : 0 or 1
+        If set to 1, calculates the exact overlap, while if set to 0, uses a
+        subpixel sampling method with ``subpixel`` subpixels in each direction.
+    subpixels : int
+        If ``use_exact`` is 0, each pixel is resampled by this factor in each
+        dimension. Thus, each pixel is divided into ``subpixels ** 2``
+        subpixels.
+
+    Returns
+    -------
+    frac : `~numpy.ndarray`
+        3-d array of shape (n, max(ny), max(nx)) giving the fraction of
+        the overlap. The grid for rectangle ``k`` is ``frac[k, :ny[k],
+        :nx[k]]``. The remaining values are zero.
+    """
+
+    cdef Py_ssize_t k, n
+
+    arrays = np.broadcast_arrays(*[np.asarray(arr, dtype=DTYPE)
+                                   for arr in (xmin, xmax, ymin, ymax, width,
+                                               height, theta)])
+    cdef const double[:] xmin_view = np.ravel(arrays[0])
+    cdef const double[:] xmax_view = np.ravel(arrays[1])
+    cdef const double[:] ymin_view = np.ravel(arrays[2])
+    cdef const double[:] ymax_view = np.ravel(arrays[3])
+    cdef const double[:] width_view = np.ravel(arrays[4])
+    cdef const double[:] height_view = np.ravel(arrays[5])
+    cdef const double[:] theta_view = np.ravel(arrays[6])
+    n = xmin_view.shape[0]
+    nx, ny = np.broadcast_arrays(np.asarray(nx, dtype=np.intp),
+                                 np.asarray(ny, dtype=np.intp), arrays[0])[:2]
+    cdef const Py_ssize_t[:] nx_view = np.ravel(nx)
+    cdef const Py_ssize_t[:] ny_view = np.ravel(ny)
 
     # Define output array
-    cdef np.ndarray[DTYPE_t, ndim=2] frac = np.zeros([ny, nx], dtype=DTYPE)
+    frac = np.zeros([n, np.max(ny, initial=0), np.max(nx, initial=0)],
+                    dtype=DTYPE)
+    cdef double[:, :, ::1] frac_view = frac
+
+    for k in prange(n, nogil=True, schedule='guided'):
+        rectangular_overlap_fill(frac_view[k], xmin_view[k], xmax_view[k],
+                                 ymin_view[k], ymax_view[k], nx_view[k],
+                                 ny_view[k], width_view[k], height_view[k],
+                                 theta_view[k], use_exact, subpixels)
+
+    return frac
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+cdef void rectangular_overlap_fill(double[:, ::1] frac, double xmin,
+                                   double xmax, double ymin, double ymax,
+                                   Py_ssize_t nx, Py_ssize_t ny, double width,
+                                   double height, double theta,
+                                   int use_exact,
+                                   int subpixels) noexcept nogil:
+    """
+    Fill the first ``ny`` rows and ``nx`` columns of ``frac`` with the
+    fraction of overlap between a rectangle centered on the origin and
+    each pixel of the grid.
+    """
 
-    if use_exact == 1:
-        raise NotImplementedError("Exact mode has not been implemented for "
-                                  "rectangular apertures")
+    cdef Py_ssize_t i, j
+    cdef double dx, dy, norm
+    cdef double bxmin, bxmax, bymin, bymax
+    cdef double pxmin, pxmax, pymin, pymax
+    cdef double half_xextent, half_yextent
+    cdef double cos_theta = cos(theta)
+    cdef double sin_theta = sin(theta)
 
     # Find the width of each element in x and y
     dx = (xmax - xmin) / nx
     dy = (ymax - ymin) / ny
 
-    # TODO: can implement a bounding box here for efficiency (as for the
-    # circular and elliptical aperture photometry)
+    norm = 1.0 / (dx * dy)
+
+    # Define the bounding box of the rotated rectangle
+    half_xextent = 0.5 * (fabs(width * cos_theta) + fabs(height * sin_theta))
+    half_yextent = 0.5 * (fabs(width * sin_theta) + fabs(height * cos_theta))
+    bxmin = -half_xextent
+    bxmax = half_xextent
+    bymin = -half_yextent
+    bymax = half_yextent
 
     for i in range(nx):
         pxmin = xmin + i * dx  # lower end of pixel
         pxmax = pxmin + dx  # upper end of pixel
-        for j in range(ny):
-            pymin = ymin + j * dy
-            pymax = pymin + dy
-            frac[j, i] = rectangular_overlap_single_subpixel(
-                pxmin, pymin, pxmax, pymax, width, height, theta,
-                subpixels)
+        if pxmax > bxmin and pxmin < bxmax:
+            for j in range(ny):
+                pymin = ymin + j * dy
+                pymax = pymin + dy
+                if pymax > bymin and pymin < bymax:
+                    if use_exact:
+                        frac[j, i] = rectangular_overlap_single_exact(
+                            pxmin, pymin, pxmax, pymax, width, height,
+                            theta) * norm
+                    else:
+                        frac[j, i] = rectangular_overlap_single_subpixel(
+                            pxmin, pymin, pxmax, pymax, width, height, theta,
+                            subpixels)
 
-    return frac
+
+# NOTE: The following functions use cdef because they are not intended
+# to be called from the Python code. Using def makes them callable from
+# outside, but also slower. In any case, these aren't useful to call
+# from outside because they only operate on a single pixel.
 
 
 cdef double rectangular_overlap_single_subpixel(double x0, double y0,
                                                 double x1, double y1,
                                                 double width, double height,
-                                                double theta, int subpixels):
+                                                double theta,
+                                                int subpixels) noexcept nogil:
     """
     Return the fraction of overlap between a rectangle and a single pixel with
     given extent, using a sub-pixel sampling method.
@@ -110,6 +225,7 @@ cdef double rectangular_overlap_single_subpixel(double x0, double y0,
     cdef double cos_theta = cos(theta)
     cdef double sin_theta = sin(theta)
     cdef double half_width, half_height
+    cdef double dx, dy, x_tr, y_tr
 
     half_width = width / 2.0
     half_height = height / 2.0
@@ -132,3 +248,120 @@ cdef double rectangular_overlap_single_subpixel(double x0, double y0,
                 frac += 1.0
 
     return frac / (subpixels * subpixels)
+
+
+cdef double rectangular_overlap_single_exact(double xmin, double ymin,
+                                             double xmax, double ymax,
+                                             double width, double height,
+                                             double theta) noexcept nogil:
+    """
+    Area of overlap of a pixel defined by (xmin, ymin, xmax, ymax) and
+    a rectangle with the given width, height, and position angle theta
+    centered at the origin.
+
+    The rectangle polygon is clipped by the four pixel edges
+    (Sutherland-Hodgman algorithm) and the area of the resulting
+    convex polygon is computed with the shoelace formula.
+    """
+
+    # Each clip of a convex polygon by a half-plane adds at most one
+    # vertex, so the clipped polygon has at most 8 vertices (the arrays
+    # are larger to allow for floating-point degeneracies).
+    cdef double xa[16]
+    cdef double ya[16]
+    cdef double xb[16]
+    cdef double yb[16]
+    cdef int i, n
+    cdef double cos_theta = cos(theta)
+    cdef double sin_theta = sin(theta)
+    cdef double half_width = 0.5 * width
+    cdef double half_height = 0.5 * height
+    cdef double area = 0.0
+
+    # Pixel is fully within the rectangle
+    if (inside_rectangle(xmin, ymin, half_width, half_height, cos_theta,
+                         sin_theta)
+            and inside_rectangle(xmax, ymin, half_width, half_height,
+                                 cos_theta, sin_theta)
+            and inside_rectangle(xmax, ymax, half_width, half_height,
+                                 cos_theta, sin_theta)
+            and inside_rectangle(xmin, ymax, half_width, half_height,
+                                 cos_theta, sin_theta)):
+        return (xmax - xmin) * (ymax - ymin)
+
+    # Vertices of the rectangle (counterclockwise)
+    xa[0] = half_width * cos_theta - half_height * sin_theta
+    ya[0] = half_width * sin_theta + half_height * cos_theta
+    xa[1] = -half_width * cos_theta - half_height * sin_theta
+    ya[1] = -half_width * sin_theta + half_height * cos_theta
+    xa[2] = -xa[0]
+    ya[2] = -ya[0]
+    xa[3] = -xa[1]
+    ya[3] = -ya[1]
+
+    n = clip_polygon(xa, ya, 4, xb, yb, 0, xmin, 1)
+    n = clip_polygon(xb, yb, n, xa, ya, 0, xmax, -1)
+    n = clip_polygon(xa, ya, n, xb, yb, 1, ymin, 1)
+    n = clip_polygon(xb, yb, n, xa, ya, 1, ymax, -1)
+
+    for i in range(n):
+        area += xa[i] * ya[(i + 1) % n] - xa[(i + 1) % n] * ya[i]
+
+    return 0.5 * fabs(area)
+
+
+cdef bint inside_rectangle(double x, double y, double half_width,
+                           double half_height, double cos_theta,
+                           double sin_theta) noexcept nogil:
+    """
+    Return whether the point (x, y) is within the rectangle centered at
+    the origin.
+    """
+
+    return (fabs(y * sin_theta + x * cos_theta) <= half_width
+            and fabs(y * cos_theta - x * sin_theta) <= half_height)
+
+
+cdef int clip_polygon(double *xin, double *yin, int nin, double *xout,
+                      double *yout, int axis, double value,
+                      int sign) noexcept nogil:
+    """
+    Clip a convex polygon by the half-plane where ``sign * (coord -
+    value) >= 0``, where ``coord`` is the x (``axis=0``) or y
+    (``axis=1``) coordinate.
+
+    The clipped polygon vertices are written to ``xout`` and ``yout``
+    and the number of vertices is returned.
+    """
+
+    cdef int i, nout = 0
+    cdef double xp, yp, xc, yc, dp, dc, t
+
+    if nin == 0:
+        return 0
+
+    xp = xin[nin - 1]
+    yp = yin[nin - 1]
+    dp = sign * ((xp if axis == 0 else yp) - value)
+    for i in range(nin):
+        xc = xin[i]
+        yc = yin[i]
+        dc = sign * ((xc if axis == 0 else yc) - value)
+
+        # add the intersection point if the edge crosses the line
+        if (dc >= 0) != (dp >= 0):
+            t = dp / (dp - dc)
+            xout[nout] = xp + t * (xc - xp)
+            yout[nout] = yp + t * (yc - yp)
+            nout += 1
+
+        if dc >= 0:
+            xout[nout] = xc
+            yout[nout] = yc
+            nout += 1
+
+        xp = xc
+        yp = yc
+        dp = dc
+
+    return nout
@@ -0,0 +1,31 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Build the geometry overlap extensions with OpenMP support.
+"""
+
+import os
+
+import numpy as np
+from extension_helpers import add_openmp_flags_if_available
+from setuptools import Extension
+
+GEOMETRY_ROOT = os.path.relpath(os.path.dirname(__file__))
+
+
+def get_extensions():
+    """
+    Return the overlap extensions, which are compiled with OpenMP
+    support when it is available so that the batched overlap functions
+    run in parallel.
+    """
+    extensions = []
+    for name in ('circular_overlap', 'elliptical_overlap',
+                 'rectangular_overlap'):
+        extension = Extension(
+            name=f'photutils.geometry.{name}',
+            sources=[os.path.join(GEOMETRY_ROOT, f'{name}.pyx')],
+            include_dirs=[np.get_include()])
+        add_openmp_flags_if_available(extension)
+        extensions.append(extension)
+
+    return extensions
@@ -3,10 +3,12 @@
 Tests for the circular_overlap_grid module.
 """
 
+import numpy as np
 import pytest
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_equal
 
-from photutils.geometry import circular_overlap_grid
+from photutils.geometry import (circular_overlap_grid, circular_overlap_grids,
+                                circular_overlap_sums)
 
 grid_sizes = [50, 500, 1000]
 circ_sizes = [0.2, 0.4, 0.8]
@@ -26,3 +28,67 @@ def test_circular_overlap_grid(grid_size, circ_size, use_exact, subsample):
     g = circular_overlap_grid(-1.0, 1.0, -1.0, 1.0, grid_size, grid_size,
                               circ_size, use_exact, subsample)
     assert_allclose(g.max(), 1.0)
+
+
+@pytest.mark.parametrize('use_exact', use_exacts)
+@pytest.mark.parametrize('subsample', subsamples)
+def test_circular_overlap_sums(use_exact, subsample):
+    """
+    Test that the sums match those computed using the overlap grids.
+    """
+    data = np.arange(400.0).reshape(20, 20)
+    error = np.sqrt(data)
+    xpos = np.array([10.3, 0.0, -1.0, 25.0])
+    ypos = np.array([9.6, 19.2, 5.0, 5.0])
+    r_in = 1.2
+    r_out = 3.1
+    sums, variances = circular_overlap_sums(data, error, None, xpos, ypos,
+                                            r_in, r_out, use_exact,
+                                            subsample)
+
+    for i, (xcen, ycen) in enumerate(zip(xpos, ypos, strict=True)):
+        ixmin = int(np.floor(xcen - r_out + 0.5))
+        ixmax = int(np.ceil(xcen + r_out + 0.5))
+        iymin = int(np.floor(ycen - r_out + 0.5))
+        iymax = int(np.ceil(ycen + r_out + 0.5))
+        if ixmin >= data.shape[1] or ixmax <= 0:
+            assert np.isnan(sums[i])
+            assert np.isnan(variances[i])
+            continue
+
+        edges = (ixmin - 0.5 - xcen, ixmax - 0.5 - xcen,
+                 iymin - 0.5 - ycen, iymax - 0.5 - ycen)
+        nx = ixmax - ixmin
+        ny = iymax - iymin
+        weights = (circular_overlap_grid(*edges, nx, ny, r_out, use_exact,
+                                         subsample)
+                   - circular_overlap_grid(*edges, nx, ny, r_in, use_exact,
+                                           subsample))
+        weights = np.pad(weights, 20)
+        yslc = slice(20 - iymin, 40 - iymin)
+        xslc = slice(20 - ixmin, 40 - ixmin)
+        weights = weights[yslc, xslc]
+        assert_allclose(sums[i], np.sum(data * weights))
+        assert_allclose(variances[i], np.sum(error**2 * weights))
+
+
+@pytest.mark.parametrize('use_exact', use_exacts)
+def test_circular_overlap_grids(use_exact):
+    """
+    Test that the batched overlap grids match the single grids.
+    """
+    xmin = np.array([-2.1, -3.4, -1.0])
+    ymin = np.array([-2.6, -3.0, -0.7])
+    nx = np.array([5, 7, 2])
+    ny = np.array([5, 6, 2])
+    radius = np.array([2.0, 3.1, 0.6])
+    grids = circular_overlap_grids(xmin, xmin + nx, ymin, ymin + ny, nx, ny,
+                                   radius, use_exact, 5)
+    assert grids.shape == (3, 6, 7)
+    for i in range(3):
+        grid = circular_overlap_grid(xmin[i], xmin[i] + nx[i], ymin[i],
+                                     ymin[i] + ny[i], nx[i], ny[i],
+                                     radius[i], use_exact, 5)
+        assert_equal(grids[i, :ny[i], :nx[i]], grid)
+    assert np.all(grids[2, 2:] == 0)
+    assert np.all(grids[2, :, 2:] == 0)
@@ -3,10 +3,12 @@
 Tests for the elliptical_overlap_grid module.
 """
 
+import numpy as np
 import pytest
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_equal
 
-from photutils.geometry import elliptical_overlap_grid
+from photutils.geometry import (elliptical_overlap_grid,
+                                elliptical_overlap_grids)
 
 grid_sizes = [50, 500, 1000]
 maj_sizes = [0.2, 0.4, 0.8]
@@ -32,3 +34,27 @@ def test_elliptical_overlap_grid(grid_size, maj_size, min_size, angle,
                                 maj_size, min_size, angle, use_exact,
                                 subsample)
     assert_allclose(g.max(), 1.0)
+
+
+@pytest.mark.parametrize('use_exact', use_exacts)
+def test_elliptical_overlap_grids(use_exact):
+    """
+    Test that the batched overlap grids match the single grids.
+    """
+    xmin = np.array([-2.1, -3.4, -1.0])
+    ymin = np.array([-2.6, -3.0, -0.7])
+    nx = np.array([5, 7, 2])
+    ny = np.array([5, 6, 2])
+    a = np.array([2.0, 3.1, 0.6])
+    b = np.array([1.0, 2.5, 0.6])
+    theta = np.array([0.3, 1.2, 0.0])
+    grids = elliptical_overlap_grids(xmin, xmin + nx, ymin, ymin + ny, nx, ny,
+                                     a, b, theta, use_exact, 5)
+    assert grids.shape == (3, 6, 7)
+    for i in range(3):
+        grid = elliptical_overlap_grid(xmin[i], xmin[i] + nx[i], ymin[i],
+                                       ymin[i] + ny[i], nx[i], ny[i], a[i],
+                                       b[i], theta[i], use_exact, 5)
+        assert_equal(grids[i, :ny[i], :nx[i]], grid)
+    assert np.all(grids[2, 2:] == 0)
+    assert np.all(grids[2, :, 2:] == 0)
@@ -3,10 +3,12 @@
 Tests for the rectangular_overlap_grid module.
 """
 
+import numpy as np
 import pytest
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_equal
 
-from photutils.geometry import rectangular_overlap_grid
+from photutils.geometry import (rectangular_overlap_grid,
+                                rectangular_overlap_grids)
 
 grid_sizes = [50, 500, 1000]
 rect_sizes = [0.2, 0.4, 0.8]
@@ -26,3 +28,47 @@ def test_rectangular_overlap_grid(grid_size, rect_size, angle, subsample):
     g = rectangular_overlap_grid(-1.0, 1.0, -1.0, 1.0, grid_size, grid_size,
                                  rect_size, rect_size, angle, 0, subsample)
     assert_allclose(g.max(), 1.0)
+
+
+@pytest.mark.parametrize('angle', angles)
+def test_rectangular_overlap_grid_exact(angle):
+    """
+    Test that the exact overlap grid sums to the rectangle area and
+    agrees with a finely-sampled subpixel grid.
+    """
+    width = 3.7
+    height = 1.9
+    g = rectangular_overlap_grid(-3.2, 2.8, -2.9, 3.1, 6, 6, width, height,
+                                 angle, 1, 1)
+    assert_allclose(g.sum(), width * height)
+    assert g.min() >= 0.0
+    assert g.max() <= 1.0
+
+    g2 = rectangular_overlap_grid(-3.2, 2.8, -2.9, 3.1, 6, 6, width, height,
+                                  angle, 0, 100)
+    assert_allclose(g, g2, atol=2.0e-4)
+
+
+@pytest.mark.parametrize('use_exact', [0, 1])
+def test_rectangular_overlap_grids(use_exact):
+    """
+    Test that the batched overlap grids match the single grids.
+    """
+    xmin = np.array([-2.1, -3.4, -1.0])
+    ymin = np.array([-2.6, -3.0, -0.7])
+    nx = np.array([5, 7, 2])
+    ny = np.array([5, 6, 2])
+    width = np.array([2.0, 3.1, 0.6])
+    height = np.array([1.0, 2.5, 0.6])
+    theta = np.array([0.3, 1.2, 0.0])
+    grids = rectangular_overlap_grids(xmin, xmin + nx, ymin, ymin + ny, nx,
+                                      ny, width, height, theta, use_exact, 5)
+    assert grids.shape == (3, 6, 7)
+    for i in range(3):
+        grid = rectangular_overlap_grid(xmin[i], xmin[i] + nx[i], ymin[i],
+                                        ymin[i] + ny[i], nx[i], ny[i],
+                                        width[i], height[i], theta[i],
+                                        use_exact, 5)
+        assert_equal(grids[i, :ny[i], :nx[i]], grid)
+    assert np.all(grids[2, 2:] == 0)
+    assert np.all(grids[2, :, 2:] == 0)
@@ -6,6 +6,7 @@ photometry.
 
 from .epsf import *  # noqa: F401, F403
 from .epsf_stars import *  # noqa: F401, F403
+from .fitters import *  # noqa: F401, F403
 from .functional_models import *  # noqa: F401, F403
 from .gridded_models import *  # noqa: F401, F403
 from .groupers import *  # noqa: F401, F403
@@ -15,4 +16,5 @@ from .model_io import *  # noqa: F401, F403
 from .model_plotting import *  # noqa: F401, F403
 from .photometry import *  # noqa: F401, F403
 from .simulation import *  # noqa: F401, F403
+from .tiled_photometry import *  # noqa: F401, F403
 from .utils import *  # noqa: F401, F403
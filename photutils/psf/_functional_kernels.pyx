@@ -0,0 +1,380 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+# cython: language_level=3
+"""
+This module provides compiled functions to evaluate the built-in
+analytic PSF models (and their derivatives with respect to the model
+parameters) in a single loop over the input pixels without creating
+temporary arrays.
+
+The input ``x`` and ``y`` arrays must be 1D contiguous float64 arrays of
+the same length and all the model parameters must be scalars. The
+functions are called by the ``evaluate`` and ``fit_deriv`` methods of
+the models in `photutils.psf.functional_models`, which convert the
+model parameters (e.g., FWHM, rotation angle in degrees) to the
+parameters used here.
+"""
+
+import numpy as np
+
+cimport cython
+
+__all__ = ['airy_disk_psf', 'airy_disk_psf_deriv', 'circular_gaussian_prf',
+           'circular_gaussian_prf_deriv', 'gaussian_prf', 'gaussian_prf_deriv',
+           'moffat_psf', 'moffat_psf_deriv']
+
+
+cdef extern from "math.h" nogil:
+
+    double cos(double x)
+    double erf(double x)
+    double exp(double x)
+    double log(double x)
+    double pow(double x, double y)
+    double sin(double x)
+    double sqrt(double x)
+
+
+# the Bessel functions of the first kind are POSIX functions (named with
+# a leading underscore in the Microsoft C runtime)
+cdef extern from *:
+    """
+    #if defined(_MSC_VER)
+    #define photutils_j0 _j0
+    #define photutils_j1 _j1
+    #else
+    #define photutils_j0 j0
+    #define photutils_j1 j1
+    #endif
+    """
+    double photutils_j0(double x) nogil
+    double photutils_j1(double x) nogil
+
+
+cdef double PI = 3.141592653589793
+cdef double SQRT2 = 1.4142135623730951
+cdef double TWO_OVER_SQRTPI = 1.1283791670955126
+
+
+@cython.cdivision(True)
+cdef inline void _erf_terms(double delta, double sigma, double *value,
+                            double *deriv, double *sigma_deriv) noexcept nogil:
+    """
+    Compute the 1D pixel-integrated Gaussian term ``erf((delta + 0.5) /
+    (sqrt(2) * sigma)) - erf((delta - 0.5) / (sqrt(2) * sigma))`` and
+    its derivatives with respect to ``delta`` and ``sigma``.
+    """
+    cdef double norm = 1.0 / (SQRT2 * sigma)
+    cdef double a_plus = (delta + 0.5) * norm
+    cdef double a_minus = (delta - 0.5) * norm
+    cdef double g_plus = TWO_OVER_SQRTPI * exp(-a_plus * a_plus)
+    cdef double g_minus = TWO_OVER_SQRTPI * exp(-a_minus * a_minus)
+
+    value[0] = erf(a_plus) - erf(a_minus)
+    deriv[0] = (g_plus - g_minus) * norm
+    sigma_deriv[0] = -(a_plus * g_plus - a_minus * g_minus) / sigma
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def circular_gaussian_prf(const double[::1] x, const double[::1] y,
+                          double flux, double x_0, double y_0, double sigma):
+    """
+    circular_gaussian_prf(x, y, flux, x_0, y_0, sigma)
+
+    Evaluate the circular 2D Gaussian PSF integrated over pixels.
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t npix = x.shape[0]
+    cdef double norm = 1.0 / (SQRT2 * sigma)
+    cdef double amplitude = 0.25 * flux
+    cdef double dx, dy
+
+    result = np.empty(npix, dtype=float)
+    cdef double[::1] out = result
+
+    with nogil:
+        for i in range(npix):
+            dx = x[i] - x_0
+            dy = y[i] - y_0
+            out[i] = (amplitude
+                      * (erf((dx + 0.5) * norm) - erf((dx - 0.5) * norm))
+                      * (erf((dy + 0.5) * norm) - erf((dy - 0.5) * norm)))
+
+    return result
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def circular_gaussian_prf_deriv(const double[::1] x, const double[::1] y,
+                                double flux, double x_0, double y_0,
+                                double sigma):
+    """
+    circular_gaussian_prf_deriv(x, y, flux, x_0, y_0, sigma)
+
+    Evaluate the derivatives of the circular 2D Gaussian PSF integrated
+    over pixels with respect to ``flux``, ``x_0``, ``y_0``, and
+    ``sigma``.
+
+    The output array has a shape of ``(4, len(x))``.
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t npix = x.shape[0]
+    cdef double ex, dex, sex, ey, dey, sey
+
+    result = np.empty((4, npix), dtype=float)
+    cdef double[:, ::1] out = result
+
+    with nogil:
+        for i in range(npix):
+            _erf_terms(x[i] - x_0, sigma, &ex, &dex, &sex)
+            _erf_terms(y[i] - y_0, sigma, &ey, &dey, &sey)
+            out[0, i] = 0.25 * ex * ey
+            out[1, i] = -0.25 * flux * dex * ey
+            out[2, i] = -0.25 * flux * ex * dey
+            out[3, i] = 0.25 * flux * (sex * ey + ex * sey)
+
+    return result
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def gaussian_prf(const double[::1] x, const double[::1] y, double flux,
+                 double x_0, double y_0, double x_sigma, double y_sigma,
+                 double theta):
+    """
+    gaussian_prf(x, y, flux, x_0, y_0, x_sigma, y_sigma, theta)
+
+    Evaluate the 2D Gaussian PSF integrated over pixels, where
+    ``theta`` is in radians.
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t npix = x.shape[0]
+    cdef double xnorm = 1.0 / (SQRT2 * x_sigma)
+    cdef double ynorm = 1.0 / (SQRT2 * y_sigma)
+    cdef double cost = cos(theta)
+    cdef double sint = sin(theta)
+    cdef double amplitude = 0.25 * flux
+    cdef double dx, dy, xr, yr
+
+    result = np.empty(npix, dtype=float)
+    cdef double[::1] out = result
+
+    with nogil:
+        for i in range(npix):
+            dx = x[i] - x_0
+            dy = y[i] - y_0
+            xr = dx * cost + dy * sint
+            yr = -dx * sint + dy * cost
+            out[i] = (amplitude
+                      * (erf((xr + 0.5) * xnorm) - erf((xr - 0.5) * xnorm))
+                      * (erf((yr + 0.5) * ynorm) - erf((yr - 0.5) * ynorm)))
+
+    return result
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def gaussian_prf_deriv(const double[::1] x, const double[::1] y, double flux,
+                       double x_0, double y_0, double x_sigma,
+                       double y_sigma, double theta):
+    """
+    gaussian_prf_deriv(x, y, flux, x_0, y_0, x_sigma, y_sigma, theta)
+
+    Evaluate the derivatives of the 2D Gaussian PSF integrated over
+    pixels with respect to ``flux``, ``x_0``, ``y_0``, ``x_sigma``,
+    ``y_sigma``, and ``theta`` (in radians).
+
+    The output array has a shape of ``(6, len(x))``.
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t npix = x.shape[0]
+    cdef double cost = cos(theta)
+    cdef double sint = sin(theta)
+    cdef double amplitude = 0.25 * flux
+    cdef double dx, dy, xr, yr, ex, dex, sex, ey, dey, sey
+
+    result = np.empty((6, npix), dtype=float)
+    cdef double[:, ::1] out = result
+
+    with nogil:
+        for i in range(npix):
+            dx = x[i] - x_0
+            dy = y[i] - y_0
+            xr = dx * cost + dy * sint
+            yr = -dx * sint + dy * cost
+            _erf_terms(xr, x_sigma, &ex, &dex, &sex)
+            _erf_terms(yr, y_sigma, &ey, &dey, &sey)
+            out[0, i] = 0.25 * ex * ey
+            out[1, i] = amplitude * (-dex * cost * ey + ex * dey * sint)
+            out[2, i] = amplitude * (-dex * sint * ey - ex * dey * cost)
+            out[3, i] = amplitude * sex * ey
+            out[4, i] = amplitude * ex * sey
+            out[5, i] = amplitude * (dex * yr * ey - ex * dey * xr)
+
+    return result
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def moffat_psf(const double[::1] x, const double[::1] y, double flux,
+               double x_0, double y_0, double alpha, double beta):
+    """
+    moffat_psf(x, y, flux, x_0, y_0, alpha, beta)
+
+    Evaluate the 2D Moffat PSF.
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t npix = x.shape[0]
+    cdef double alpha2 = alpha * alpha
+    cdef double amplitude = flux * (beta - 1.0) / (PI * alpha2)
+    cdef double dx, dy
+
+    result = np.empty(npix, dtype=float)
+    cdef double[::1] out = result
+
+    with nogil:
+        for i in range(npix):
+            dx = x[i] - x_0
+            dy = y[i] - y_0
+            out[i] = amplitude * pow(1.0 + (dx * dx + dy * dy) / alpha2,
+                                     -beta)
+
+    return result
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def moffat_psf_deriv(const double[::1] x, const double[::1] y, double flux,
+                     double x_0, double y_0, double alpha, double beta):
+    """
+    moffat_psf_deriv(x, y, flux, x_0, y_0, alpha, beta)
+
+    Evaluate the derivatives of the 2D Moffat PSF with respect to
+    ``flux``, ``x_0``, ``y_0``, ``alpha``, and ``beta``.
+
+    The output array has a shape of ``(5, len(x))``.
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t npix = x.shape[0]
+    cdef double alpha2 = alpha * alpha
+    cdef double norm = 1.0 / (PI * alpha2)
+    cdef double dx, dy, q, base, value, dpos
+
+    result = np.empty((5, npix), dtype=float)
+    cdef double[:, ::1] out = result
+
+    with nogil:
+        for i in range(npix):
+            dx = x[i] - x_0
+            dy = y[i] - y_0
+            q = (dx * dx + dy * dy) / alpha2
+            base = pow(1.0 + q, -beta)
+            value = flux * (beta - 1.0) * norm * base
+            dpos = 2.0 * beta * value / (alpha2 * (1.0 + q))
+            out[0, i] = (beta - 1.0) * norm * base
+            out[1, i] = dpos * dx
+            out[2, i] = dpos * dy
+            out[3, i] = 2.0 * value / alpha * (beta * q / (1.0 + q) - 1.0)
+            out[4, i] = flux * norm * base - value * log(1.0 + q)
+
+    return result
+
+
+@cython.cdivision(True)
+cdef inline double _airy_h(double t, double g) noexcept nogil:
+    """
+    Compute ``2 * (J0(t) - g) / t**2``, where ``g = 2 * J1(t) / t``.
+
+    This is the derivative of ``g`` with respect to ``t`` divided by
+    ``t``. A series expansion is used for small ``t`` to avoid
+    cancellation.
+    """
+    cdef double t2
+    if t < 0.1:
+        t2 = t * t
+        return -0.25 + t2 * (1.0 / 48.0 + t2 * (-1.0 / 1536.0
+                                                + t2 / 92160.0))
+    return 2.0 * (photutils_j0(t) - g) / (t * t)
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def airy_disk_psf(const double[::1] x, const double[::1] y, double flux,
+                  double x_0, double y_0, double width):
+    """
+    airy_disk_psf(x, y, flux, x_0, y_0, width)
+
+    Evaluate the 2D Airy disk PSF, where ``width`` is the radius of the
+    Airy disk at the first zero divided by the first zero of the Bessel
+    function ``J1`` divided by pi.
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t npix = x.shape[0]
+    cdef double scale = PI / width
+    cdef double amplitude = flux * PI / (4.0 * width * width)
+    cdef double dx, dy, t, g
+
+    result = np.empty(npix, dtype=float)
+    cdef double[::1] out = result
+
+    with nogil:
+        for i in range(npix):
+            dx = x[i] - x_0
+            dy = y[i] - y_0
+            t = scale * sqrt(dx * dx + dy * dy)
+            if t > 0:
+                g = 2.0 * photutils_j1(t) / t
+            else:
+                g = 1.0
+            out[i] = amplitude * g * g
+
+    return result
+
+
+@cython.boundscheck(False)
+@cython.wraparound(False)
+@cython.cdivision(True)
+def airy_disk_psf_deriv(const double[::1] x, const double[::1] y,
+                        double flux, double x_0, double y_0, double width):
+    """
+    airy_disk_psf_deriv(x, y, flux, x_0, y_0, width)
+
+    Evaluate the derivatives of the 2D Airy disk PSF with respect to
+    ``flux``, ``x_0``, ``y_0``, and ``width`` (see `airy_disk_psf`).
+
+    The output array has a shape of ``(4, len(x))``.
+    """
+    cdef Py_ssize_t i
+    cdef Py_ssize_t npix = x.shape[0]
+    cdef double scale = PI / width
+    cdef double norm = PI / (4.0 * width * width)
+    cdef double dx, dy, t, g, j0, dpos
+
+    result = np.empty((4, npix), dtype=float)
+    cdef double[:, ::1] out = result
+
+    with nogil:
+        for i in range(npix):
+            dx = x[i] - x_0
+            dy = y[i] - y_0
+            t = scale * sqrt(dx * dx + dy * dy)
+            if t > 0:
+                g = 2.0 * photutils_j1(t) / t
+                j0 = photutils_j0(t)
+            else:
+                g = 1.0
+                j0 = 1.0
+            dpos = 2.0 * flux * norm * g * _airy_h(t, g) * scale * scale
+            out[0, i] = norm * g * g
+            out[1, i] = -dpos * dx
+            out[2, i] = -dpos * dy
+            out[3, i] = -2.0 * flux * norm / width * g * (2.0 * j0 - g)
+
+    return result
@@ -0,0 +1,608 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+This module provides fitters for simultaneously fitting groups of PSF
+models.
+"""
+
+import numpy as np
+from astropy.modeling import Model
+from scipy.optimize import least_squares
+from scipy.sparse import csr_matrix, diags
+from scipy.sparse.linalg import spsolve
+
+from photutils.psf.utils import _get_psf_model_params
+
+__all__ = ['LinearFluxFitter', 'SparseGroupFitter']
+
+
+class LinearFluxFitter:
+    """
+    Fitter to fit only the fluxes of PSF models using linear least
+    squares.
+
+    If all the PSF model parameters except the flux are fixed (e.g.,
+    for forced photometry at known positions), the model is linear
+    in the fluxes. This fitter builds the sparse design matrix of the
+    unit-flux PSF models and solves for all the fluxes at once with
+    a sparse solver. No iterations or initial flux values are needed.
+
+    When used as the ``fitter`` in `~photutils.psf.PSFPhotometry` or
+    `~photutils.psf.IterativePSFPhotometry`, the fluxes of all the
+    sources in the image are solved in a single sparse linear system
+    (with one block per source group), without creating models for
+    the individual sources or groups. This is orders of magnitude faster
+    than the nonlinear fitters for large numbers of sources. The output
+    table has the same columns.
+
+    Parameters
+    ----------
+    calc_uncertainties : bool, optional
+        Whether to calculate the flux covariance matrices.
+
+    Notes
+    -----
+    The residuals are calculated as ``(model - data) * weights``, which
+    is the same convention used by the Astropy fitters. The residuals,
+    the parameter covariance matrix, and the fit status and message
+    are stored in the ``fit_info`` dictionary attribute using the keys
+    ``'fun'``, ``'param_cov'``, ``'status'``, and ``'message'``,
+    respectively. The fit status is 0 if the PSF model of any source is
+    zero on all its data pixels, in which case its flux is set to zero.
+    """
+
+    _messages = {0: 'The PSF model of one or more sources is zero on all '
+                    'of its data pixels.',
+                 1: 'Linear least-squares solution.'}
+
+    def __init__(self, *, calc_uncertainties=True):
+        self.calc_uncertainties = calc_uncertainties
+        self.fit_info = {}
+
+    @staticmethod
+    def _validate_model(model):
+        """
+        Validate that all the model parameters except the flux are
+        fixed.
+
+        Returns
+        -------
+        flux_name : str
+            The name of the flux parameter.
+        """
+        flux_name = _get_psf_model_params(model)[2]
+        if model.fixed[flux_name]:
+            raise ValueError('LinearFluxFitter requires the PSF model flux '
+                             'parameter to not be fixed.')
+        free_params = [name for name in model.param_names
+                       if name != flux_name and not model.fixed[name]]
+        if free_params:
+            raise ValueError('LinearFluxFitter requires all the PSF model '
+                             'parameters except the flux to be fixed. Free '
+                             f'parameters: {free_params}.')
+        return flux_name
+
+    def __call__(self, model, x, y, z, *, weights=None, maxiter=None):
+        """
+        Fit the flux(es) of the model(s) to the data.
+
+        Parameters
+        ----------
+        model : `~astropy.modeling.Fittable2DModel` or list of \
+                `~astropy.modeling.Fittable2DModel`
+            The model or list of models to fit. All the model parameters
+            except the flux must be fixed.
+
+        x, y : 1D `~numpy.ndarray`
+            The x and y coordinates of the data pixels.
+
+        z : 1D `~numpy.ndarray`
+            The data values.
+
+        weights : 1D `~numpy.ndarray`, optional
+            The weights of the data values (e.g., the inverse of the
+            data errors).
+
+        maxiter : `None`, optional
+            Ignored. This keyword is accepted for compatibility with the
+            other fitters.
+
+        Returns
+        -------
+        result : `~astropy.modeling.Fittable2DModel` or list of \
+                `~astropy.modeling.Fittable2DModel`
+            A copy of the input model (or a list of copies of the input
+            models) with the fitted flux(es).
+        """
+        single_model = isinstance(model, Model)
+        models = [model] if single_model else list(model)
+        if len(models) == 0:
+            raise ValueError('At least one model must be input.')
+
+        x = np.ravel(x).astype(float)
+        y = np.ravel(y).astype(float)
+        z = np.ravel(z).astype(float)
+        scale_cov = weights is None
+        if weights is None:
+            weights = np.ones_like(z)
+        else:
+            weights = np.ravel(weights).astype(float)
+
+        fit_models = []
+        stamps = []
+        for model_ in models:
+            flux_name = self._validate_model(model_)
+            fit_model = model_.copy()
+            setattr(fit_model, flux_name, 1.0)
+            stamps.append(fit_model(x, y))
+            fit_models.append((fit_model, flux_name))
+        design = csr_matrix(np.transpose(stamps))
+
+        fluxes, fun, param_covs, status = self._solve(
+            design, z, weights, np.zeros(len(models), dtype=int),
+            np.zeros(len(z), dtype=int), scale_cov=scale_cov)
+
+        self.fit_info = {'fun': fun, 'param_cov': param_covs[0],
+                         'status': status[0],
+                         'message': self._messages[status[0]]}
+
+        for (fit_model, flux_name), flux in zip(fit_models, fluxes,
+                                                strict=True):
+            setattr(fit_model, flux_name, flux)
+        fit_models = [fit_model for fit_model, _ in fit_models]
+
+        return fit_models[0] if single_model else fit_models
+
+    def _solve(self, design, z, weights, source_groups, pixel_groups,
+               scale_cov=True):
+        """
+        Solve for the fluxes of the sources in one or more independent
+        groups.
+
+        Parameters
+        ----------
+        design : `~scipy.sparse.csr_matrix`
+            The design matrix with a shape of ``(npixels, nsources)``
+            containing the unit-flux model of each source on the data
+            pixels. The matrix must be block diagonal, with one block
+            per source group.
+
+        z, weights : 1D `~numpy.ndarray`
+            The data values and their weights.
+
+        source_groups : 1D int `~numpy.ndarray`
+            The index of the group of each source. The sources must be
+            sorted by group.
+
+        pixel_groups : 1D int `~numpy.ndarray`
+            The index of the group of each data pixel.
+
+        scale_cov : bool, optional
+            Whether to scale the flux covariance matrices by the reduced
+            chi-squared of each group. This should be `False` when the
+            weights are the inverse of the data errors, in which case
+            the covariance matrices are already absolute.
+
+        Returns
+        -------
+        fluxes : 1D `~numpy.ndarray`
+            The fitted fluxes.
+
+        fun : 1D `~numpy.ndarray`
+            The weighted residuals.
+
+        param_covs : list
+            The flux covariance matrix (or `None`) of each group.
+
+        status : 1D int `~numpy.ndarray`
+            The fit status of each group.
+        """
+        weighted_design = diags(weights) @ design
+        normal = (weighted_design.T @ weighted_design).tocsc()
+        rhs = weighted_design.T @ (z * weights)
+
+        # sources whose models are zero on all their pixels cannot be
+        # fit; their fluxes are set to zero
+        ngroups = source_groups.max() + 1
+        bad = normal.diagonal() <= 0
+        status = np.ones(ngroups, dtype=int)
+        if np.any(bad):
+            normal = normal + diags(bad.astype(float), format='csc')
+            status[np.unique(source_groups[bad])] = 0
+
+        fluxes = np.atleast_1d(spsolve(normal, rhs))
+        fun = (design @ fluxes - z) * weights
+
+        param_covs = [None] * ngroups
+        if self.calc_uncertainties:
+            nsources = np.bincount(source_groups, minlength=ngroups)
+            npixels = np.bincount(pixel_groups, minlength=ngroups)
+            sum_sqrs = np.bincount(pixel_groups, weights=fun ** 2,
+                                   minlength=ngroups)
+            dof = npixels - nsources
+            starts = np.cumsum(nsources) - nsources
+            diagonal = normal.diagonal()
+            for group in np.nonzero(dof > 0)[0]:
+                start = starts[group]
+                stop = start + nsources[group]
+                if np.any(bad[start:stop]):
+                    continue
+                if nsources[group] == 1:
+                    cov = np.array([[1.0 / diagonal[start]]])
+                else:
+                    try:
+                        cov = np.linalg.inv(
+                            normal[start:stop, start:stop].toarray())
+                    except np.linalg.LinAlgError:
+                        continue
+                if scale_cov:
+                    cov = cov * sum_sqrs[group] / dof[group]
+                param_covs[group] = cov
+
+        return fluxes, fun, param_covs, status
+
+
+class SparseGroupFitter:
+    """
+    Fitter to simultaneously fit a group of PSF models using a sparse
+    Jacobian.
+
+    Unlike the Astropy fitters, which fit a compound model of all
+    the sources in a group with a dense Jacobian matrix, this fitter
+    fits a list of individual (non-compound) PSF models directly on a
+    flat array of their parameters. Each source model is evaluated only
+    on the data pixels within its bounding box, thus the Jacobian
+    matrix is sparse. The fit is performed with
+    `scipy.optimize.least_squares` using the Trust Region Reflective
+    ('trf') method.
+
+    If the PSF model has a ``fit_deriv`` method, the sparse Jacobian is
+    calculated analytically. Otherwise, it is estimated with finite
+    differences using the ``jac_sparsity`` structure, which requires
+    only a few model evaluations per iteration, independent of the
+    number of sources.
+
+    This fitter can be used as the ``fitter`` in
+    `~photutils.psf.PSFPhotometry` and
+    `~photutils.psf.IterativePSFPhotometry`, in which case the compound
+    model of each source group is not constructed. It is significantly
+    faster than the Astropy fitters for large groups of sources.
+
+    Parameters
+    ----------
+    calc_uncertainties : bool, optional
+        Whether to calculate the parameter covariance matrix.
+
+    padding : float, optional
+        The padding (in pixels) added to the bounding box of each source
+        model (at its initial position) to define the data pixels on
+        which the source model is evaluated. If the x and y parameters
+        of a model are bounded, the padding is increased to include the
+        bounds. Source models that do not have a bounding box are
+        evaluated on all the data pixels.
+
+    Notes
+    -----
+    The residuals are calculated as ``(model - data) * weights``, which
+    is the same convention used by the Astropy fitters. The residuals,
+    the parameter covariance matrix, and the fit status and message
+    are stored in the ``fit_info`` dictionary attribute using the keys
+    ``'fun'``, ``'param_cov'``, ``'status'``, and ``'message'``,
+    respectively.
+
+    Parameters that are fixed, or whose lower and upper bounds are
+    equal, are not fit. Tied parameters are not supported.
+    """
+
+    def __init__(self, *, calc_uncertainties=True, padding=1.0):
+        self.calc_uncertainties = calc_uncertainties
+        self.padding = padding
+        self.fit_info = {}
+
+    def __call__(self, model, x, y, z, *, weights=None, maxiter=100,
+                 acc=1e-7):
+        """
+        Fit the model(s) to the data.
+
+        Parameters
+        ----------
+        model : `~astropy.modeling.Fittable2DModel` or list of \
+                `~astropy.modeling.Fittable2DModel`
+            The model or list of models to fit. The models must not be
+            compound models.
+
+        x, y : 1D `~numpy.ndarray`
+            The x and y coordinates of the data pixels.
+
+        z : 1D `~numpy.ndarray`
+            The data values.
+
+        weights : 1D `~numpy.ndarray`, optional
+            The weights of the data values (e.g., the inverse of the
+            data errors).
+
+        maxiter : int, optional
+            The maximum number of function evaluations.
+
+        acc : float, optional
+            The relative tolerance for the termination by the change of
+            the parameters (the ``xtol`` keyword in
+            `scipy.optimize.least_squares`).
+
+        Returns
+        -------
+        result : `~astropy.modeling.Fittable2DModel` or list of \
+                `~astropy.modeling.Fittable2DModel`
+            A copy of the input model (or a list of copies of the input
+            models) with the fitted parameters.
+        """
+        single_model = isinstance(model, Model)
+        models = [model] if single_model else list(model)
+        self._validate_models(models)
+
+        x = np.ravel(x).astype(float)
+        y = np.ravel(y).astype(float)
+        z = np.ravel(z).astype(float)
+        # the covariance matrix is scaled by the reduced chi-squared
+        # only if no weights (data errors) are input
+        scale_cov = weights is None
+        if weights is None:
+            weights = np.ones_like(z)
+        else:
+            weights = np.ravel(weights).astype(float)
+
+        sources = [_FitSource(model_, x, y, self.padding)
+                   for model_ in models]
+
+        # the index of the first fit parameter of each source in the
+        # flat array of fit parameters
+        offsets = np.cumsum([0] + [len(src.free_idx) for src in sources])
+        nparams = offsets[-1]
+
+        if nparams == 0:
+            values = self._model_values(sources, np.array([]), offsets,
+                                        len(z))
+            self.fit_info = {'fun': (values - z) * weights,
+                             'param_cov': None, 'status': 1,
+                             'message': 'All model parameters are fixed.'}
+            return model.copy() if single_model else [
+                model_.copy() for model_ in models]
+
+        p0 = np.concatenate([src.values[src.free_idx] for src in sources])
+        lower = np.concatenate([src.lower for src in sources])
+        upper = np.concatenate([src.upper for src in sources])
+        # the trf method requires the initial values to be strictly
+        # within the bounds
+        p0 = np.clip(p0, np.nextafter(lower, np.inf),
+                     np.nextafter(upper, -np.inf))
+
+        def residuals(params):
+            values = self._model_values(sources, params, offsets, len(z))
+            return (values - z) * weights
+
+        rows = np.concatenate([np.repeat(src.pix_idx[None, :],
+                                         len(src.free_idx), axis=0).ravel()
+                               for src in sources])
+        cols = np.concatenate([np.repeat(np.arange(offsets[i],
+                                                   offsets[i + 1]),
+                                         len(src.pix_idx))
+                               for i, src in enumerate(sources)])
+        jac_shape = (len(z), nparams)
+
+        kwargs = {}
+        if all(src.fit_deriv is not None for src in sources):
+            def jacobian(params):
+                data = [src.derivatives(params[offsets[i]:offsets[i + 1]])
+                        * weights[src.pix_idx]
+                        for i, src in enumerate(sources)]
+                # the (nfree, npix) blocks of the sources have different
+                # numbers of pixels, so they are flattened separately
+                # (matching the rows and cols order)
+                return csr_matrix((np.concatenate([val.ravel()
+                                                   for val in data]),
+                                   (rows, cols)), shape=jac_shape)
+            jac = jacobian
+        else:
+            jac = '2-point'
+            kwargs['jac_sparsity'] = csr_matrix(
+                (np.ones(len(rows), dtype=bool), (rows, cols)),
+                shape=jac_shape)
+
+        result = least_squares(residuals, p0, jac=jac, bounds=(lower, upper),
+                               method='trf', xtol=acc, max_nfev=maxiter,
+                               **kwargs)
+
+        self.fit_info = {'fun': result.fun, 'param_cov': None,
+                         'status': result.status, 'message': result.message,
+                         'nfev': result.nfev, 'njev': result.njev}
+        if self.calc_uncertainties:
+            self.fit_info['param_cov'] = self._calc_param_cov(
+                sources, result, offsets, scale=scale_cov)
+
+        fit_models = []
+        for i, src in enumerate(sources):
+            fit_models.append(src.fitted_model(
+                result.x[offsets[i]:offsets[i + 1]]))
+
+        return fit_models[0] if single_model else fit_models
+
+    @staticmethod
+    def _validate_models(models):
+        if len(models) == 0:
+            raise ValueError('At least one model must be input.')
+
+        for model in models:
+            if not isinstance(model, Model):
+                raise TypeError('model must be an Astropy Model or a list '
+                                'of Astropy Models.')
+            if model.n_submodels > 1:
+                raise ValueError('SparseGroupFitter does not support '
+                                 'compound models.')
+            if any(model.tied.values()):
+                raise ValueError('SparseGroupFitter does not support tied '
+                                 'parameters.')
+
+    @staticmethod
+    def _model_values(sources, params, offsets, npixels):
+        """
+        Calculate the sum of the source models on the data pixels.
+        """
+        values = np.zeros(npixels)
+        for i, src in enumerate(sources):
+            values[src.pix_idx] += src.evaluate(
+                params[offsets[i]:offsets[i + 1]])
+        return values
+
+    @staticmethod
+    def _calc_param_cov(sources, result, offsets, scale=True):
+        """
+        Calculate the covariance matrix of the model parameters that are
+        not fixed.
+
+        The rows and columns of the parameters that are not fit because
+        their lower and upper bounds are equal are set to NaN.
+
+        If ``scale`` is `True` (i.e., no weights were input), the
+        covariance matrix is scaled by the reduced chi-squared of the
+        fit. Otherwise, the weights are assumed to be absolute (i.e.,
+        the inverse of the data errors), as in the Astropy fitters.
+        """
+        jac = csr_matrix(result.jac)
+        npixels, nparams = jac.shape
+        if npixels <= nparams:
+            return None
+
+        try:
+            cov = np.linalg.inv((jac.T @ jac).toarray())
+        except np.linalg.LinAlgError:
+            return None
+        if scale:
+            cov *= np.sum(result.fun ** 2) / (npixels - nparams)
+
+        # expand the covariance matrix to include all non-fixed model
+        # parameters
+        fit_idx = []
+        nvary = 0
+        for i, src in enumerate(sources):
+            fit_idx.append(nvary + src.vary_to_free)
+            nvary += len(src.vary_idx)
+        fit_idx = np.concatenate(fit_idx)
+        param_cov = np.full((nvary, nvary), np.nan)
+        param_cov[np.ix_(fit_idx, fit_idx)] = cov
+
+        return param_cov
+
+
+class _FitSource:
+    """
+    Class to hold the fit data of a single source model.
+
+    Parameters
+    ----------
+    model : `~astropy.modeling.Fittable2DModel`
+        The source model.
+
+    x, y : 1D `~numpy.ndarray`
+        The x and y coordinates of all the data pixels.
+
+    padding : float
+        The padding (in pixels) added to the model bounding box.
+    """
+
+    def __init__(self, model, x, y, padding):
+        self.model = model
+        self.param_names = model.param_names
+        self.values = np.array([getattr(model, name).value
+                                for name in self.param_names], dtype=float)
+        self.fit_deriv = getattr(model, 'fit_deriv', None)
+
+        # the parameters that are not fixed (vary_idx) and the subset
+        # of those whose bounds allow them to vary (free_idx)
+        self.vary_idx = np.array([i for i, name in
+                                  enumerate(self.param_names)
+                                  if not model.fixed[name]], dtype=int)
+        lower = []
+        upper = []
+        free_idx = []
+        vary_to_free = []
+        for i, idx in enumerate(self.vary_idx):
+            lo, hi = model.bounds[self.param_names[idx]]
+            lo = -np.inf if lo is None else lo
+            hi = np.inf if hi is None else hi
+            if lo == hi:
+                self.values[idx] = lo
+                continue
+            free_idx.append(idx)
+            vary_to_free.append(i)
+            lower.append(lo)
+            upper.append(hi)
+        self.free_idx = np.array(free_idx, dtype=int)
+        self.vary_to_free = np.array(vary_to_free, dtype=int)
+        self.lower = np.array(lower, dtype=float)
+        self.upper = np.array(upper, dtype=float)
+
+        self.pix_idx = self._define_pixels(model, x, y, padding)
+        self.x = x[self.pix_idx]
+        self.y = y[self.pix_idx]
+
+    @staticmethod
+    def _define_pixels(model, x, y, padding):
+        """
+        Define the indices of the data pixels within the padded model
+        bounding box.
+        """
+        try:
+            bbox = model.bounding_box.bounding_box()
+            xname, yname, _ = _get_psf_model_params(model)
+        except (NotImplementedError, ValueError):
+            return np.arange(len(x))
+
+        # include the region where the model can move within its bounds
+        pad = []
+        for name in (yname, xname):
+            param = getattr(model, name)
+            lo, hi = param.bounds
+            if not param.fixed and lo is not None and hi is not None:
+                pad.append(padding + max(param.value - lo, hi - param.value))
+            else:
+                pad.append(padding)
+
+        (ymin, ymax), (xmin, xmax) = bbox
+        return np.nonzero((x >= xmin - pad[1]) & (x <= xmax + pad[1])
+                          & (y >= ymin - pad[0]) & (y <= ymax + pad[0]))[0]
+
+    def _param_values(self, params):
+        values = self.values.copy()
+        values[self.free_idx] = params
+        return values
+
+    def evaluate(self, params):
+        """
+        Evaluate the source model on its data pixels.
+        """
+        return self.model.evaluate(self.x, self.y,
+                                   *self._param_values(params))
+
+    def derivatives(self, params):
+        """
+        Calculate the derivatives of the source model with respect to
+        the fit parameters on its data pixels.
+
+        Returns
+        -------
+        result : 2D `~numpy.ndarray`
+            The derivatives with a shape of ``(nparams, npixels)``.
+        """
+        derivs = self.fit_deriv(self.x, self.y, *self._param_values(params))
+        derivs = np.array([np.broadcast_to(deriv, self.x.shape)
+                           for deriv in derivs])
+        return derivs[self.free_idx]
+
+    def fitted_model(self, params):
+        """
+        Return a copy of the source model with the fitted parameters.
+        """
+        model = self.model.copy()
+        for name, value in zip(self.param_names, self._param_values(params),
+                               strict=True):
+            getattr(model, name).value = value
+        return model
@@ -9,7 +9,12 @@ from astropy.modeling import Fittable2DModel, Parameter
 from astropy.modeling.utils import ellipse_extent
 from astropy.units import UnitsError
 from astropy.utils.decorators import deprecated
-from scipy.special import erf, j1, jn_zeros
+from scipy.special import erf, j0, j1, jn_zeros
+
+try:
+    from photutils.psf import _functional_kernels
+except ImportError:  # pragma: no cover
+    _functional_kernels = None
 
 __all__ = [
     'AiryDiskPSF',
@@ -35,6 +40,167 @@ def _gaussian_amplitude(flux, xsigma, ysigma):
     return flux / (2.0 * np.pi * xsigma * ysigma)
 
 
+def _kernel_inputs(x, y, flux, *params, angle_index=None):
+    """
+    Prepare the inputs for the compiled model kernels.
+
+    The compiled kernels are used only for scalar (i.e., size-1) model
+    parameters. The input ``x`` and ``y`` arrays are broadcast to their
+    common shape and flattened to contiguous float arrays.
+
+    `~astropy.units.Quantity` inputs are evaluated with the compiled
+    kernels on their values (so that the results are identical to those
+    of unitless inputs) if ``x``, ``y``, and the parameters with units
+    (other than ``flux`` and the angle) have the same unit. The angle
+    parameter is converted to degrees.
+
+    Parameters
+    ----------
+    x, y : float or array_like
+        The x and y coordinates at which to evaluate the model.
+
+    flux : float or array_like
+        The flux model parameter value, which defines the output units.
+
+    *params : float or array_like
+        The other model parameter values. The first two parameters must
+        be the x and y positions.
+
+    angle_index : int or `None`, optional
+        The index in ``params`` of the angle parameter (in degrees), if
+        any.
+
+    Returns
+    -------
+    result : tuple or `None`
+        A tuple of the output shape, the input units (see
+        `_kernel_derivs`), the flattened ``x`` and ``y`` arrays, and
+        the model parameters as floats. `None` is returned if the
+        compiled kernels are not available or cannot be used for the
+        inputs.
+    """
+    if _functional_kernels is None:
+        return None
+
+    if any(np.size(param) != 1 for param in (flux, *params)):
+        return None
+
+    units = None
+    if any(isinstance(value, u.Quantity) for value in (x, y, flux, *params)):
+        units = _kernel_units(x, y, flux, params, angle_index)
+        if units is None:
+            return None
+        x, y, flux = (getattr(value, 'value', value) for value in (x, y, flux))
+        params = [param.to_value(u.deg)
+                  if idx == angle_index and isinstance(param, u.Quantity)
+                  else getattr(param, 'value', param)
+                  for idx, param in enumerate(params)]
+
+    shape = np.broadcast_shapes(np.shape(x), np.shape(y),
+                                *(np.shape(param) for param in params))
+    x = np.ascontiguousarray(np.broadcast_to(x, shape), dtype=float).ravel()
+    y = np.ascontiguousarray(np.broadcast_to(y, shape), dtype=float).ravel()
+    params = [np.asarray(param, dtype=float).item()
+              for param in (flux, *params)]
+
+    return (shape, units, x, y, *params)
+
+
+def _kernel_units(x, y, flux, params, angle_index):
+    """
+    Define the units of the `~astropy.units.Quantity` inputs of the
+    compiled model kernels.
+
+    Returns
+    -------
+    units : tuple or `None`
+        A tuple of the output unit (i.e., the ``flux`` unit, or
+        dimensionless if ``flux`` has no units) and a list of the units
+        of ``flux`` and ``params``. `None` is returned if the units
+        cannot be handled by the compiled kernels.
+    """
+    xunit = getattr(x, 'unit', None)
+    if getattr(y, 'unit', None) != xunit:
+        return None
+
+    param_units = [getattr(flux, 'unit', u.dimensionless_unscaled)]
+    for idx, param in enumerate(params):
+        unit = getattr(param, 'unit', None)
+        if idx == angle_index:
+            if unit is not None and not unit.is_equivalent(u.deg):
+                return None
+            param_units.append(u.deg)
+            continue
+
+        if unit == u.dimensionless_unscaled:
+            unit = None
+
+        # the x and y positions must have the same unit as x and y
+        if unit is None and idx < 2 and xunit is not None:
+            return None
+        if unit is not None and unit != xunit:
+            return None
+        param_units.append(u.dimensionless_unscaled if unit is None
+                           else unit)
+
+    return param_units[0], param_units
+
+
+def _kernel_output(values, units):
+    """
+    Add the output units (if any) to the compiled model kernel values.
+    """
+    if units is None:
+        return values
+    return values << units[0]
+
+
+def _kernel_derivs(derivs, units):
+    """
+    Add the units (if any) to the compiled model kernel derivatives.
+
+    The units of the derivative with respect to each parameter are the
+    output units divided by the parameter units.
+    """
+    derivs = list(derivs)
+    if units is None:
+        return derivs
+
+    return [deriv << (units[0] / unit)
+            for deriv, unit in zip(derivs, units[1], strict=True)]
+
+
+def _prf_erf_terms(delta, sigma):
+    """
+    Calculate the 1D pixel-integrated Gaussian term and its derivatives.
+
+    Parameters
+    ----------
+    delta : float or array_like
+        The offset of the pixel center from the Gaussian center.
+
+    sigma : float
+        The standard deviation of the Gaussian.
+
+    Returns
+    -------
+    value, delta_deriv, sigma_deriv : `~numpy.ndarray`
+        The pixel-integrated term and its derivatives with respect to
+        ``delta`` and ``sigma``.
+    """
+    norm = 1.0 / (np.sqrt(2) * sigma)
+    a_plus = (delta + 0.5) * norm
+    a_minus = (delta - 0.5) * norm
+    g_plus = 2.0 / np.sqrt(np.pi) * np.exp(-a_plus ** 2)
+    g_minus = 2.0 / np.sqrt(np.pi) * np.exp(-a_minus ** 2)
+
+    value = erf(a_plus) - erf(a_minus)
+    delta_deriv = (g_plus - g_minus) * norm
+    sigma_deriv = -(a_plus * g_plus - a_minus * g_minus) / sigma
+
+    return value, delta_deriv, sigma_deriv
+
+
 class GaussianPSF(Fittable2DModel):
     r"""
     A 2D Gaussian PSF model.
@@ -943,6 +1109,15 @@ class GaussianPRF(Fittable2DModel):
         result : `~numpy.ndarray`
             The value of the model evaluated at the input coordinates.
         """
+        args = _kernel_inputs(x, y, flux, x_0, y_0, x_fwhm, y_fwhm, theta,
+                              angle_index=4)
+        if args is not None:
+            shape, units, x, y, flux, x_0, y_0, x_fwhm, y_fwhm, theta = args
+            values = _functional_kernels.gaussian_prf(
+                x, y, flux, x_0, y_0, x_fwhm * GAUSSIAN_FWHM_TO_SIGMA,
+                y_fwhm * GAUSSIAN_FWHM_TO_SIGMA, np.deg2rad(theta))
+            return _kernel_output(values.reshape(shape), units)
+
         if not isinstance(theta, u.Quantity):
             theta = np.deg2rad(theta)
 
@@ -965,6 +1140,70 @@ class GaussianPRF(Fittable2DModel):
                    * (erf((y0 + dpix) / (np.sqrt(2) * y_sigma))
                       - erf((y0 - dpix) / (np.sqrt(2) * y_sigma)))))
 
+    @staticmethod
+    def fit_deriv(x, y, flux, x_0, y_0, x_fwhm, y_fwhm, theta):
+        """
+        Calculate the partial derivatives of the 2D Gaussian function
+        with respect to the parameters.
+
+        Parameters
+        ----------
+        x, y : float or array_like
+            The x and y coordinates at which to evaluate the model.
+
+        flux : float
+            Total integrated flux over the entire PSF.
+
+        x_0, y_0 : float
+            Position of the peak along the x and y axes.
+
+        x_fwhm, y_fwhm : float
+            FWHM of the Gaussian along the x and y axes.
+
+        theta : float
+            The counterclockwise rotation angle in degrees.
+
+        Returns
+        -------
+        result : list of `~numpy.ndarray`
+            The list of partial derivatives with respect to each
+            parameter.
+        """
+        args = _kernel_inputs(x, y, flux, x_0, y_0, x_fwhm, y_fwhm, theta,
+                              angle_index=4)
+        if args is not None:
+            shape, units, x, y, flux, x_0, y_0, x_fwhm, y_fwhm, theta = args
+            derivs = _functional_kernels.gaussian_prf_deriv(
+                x, y, flux, x_0, y_0, x_fwhm * GAUSSIAN_FWHM_TO_SIGMA,
+                y_fwhm * GAUSSIAN_FWHM_TO_SIGMA, np.deg2rad(theta))
+            derivs = _kernel_derivs(derivs.reshape((-1, *shape)), units)
+        else:
+            theta = np.deg2rad(theta)
+            cost = np.cos(theta)
+            sint = np.sin(theta)
+            dx = x - x_0
+            dy = y - y_0
+            x0 = dx * cost + dy * sint
+            y0 = -dx * sint + dy * cost
+            ex, dex, sex = _prf_erf_terms(x0, x_fwhm * GAUSSIAN_FWHM_TO_SIGMA)
+            ey, dey, sey = _prf_erf_terms(y0, y_fwhm * GAUSSIAN_FWHM_TO_SIGMA)
+            amplitude = flux / 4.0
+            derivs = [ex * ey / 4.0,
+                      amplitude * (-dex * cost * ey + ex * dey * sint),
+                      amplitude * (-dex * sint * ey - ex * dey * cost),
+                      amplitude * sex * ey,
+                      amplitude * ex * sey,
+                      amplitude * (dex * y0 * ey - ex * dey * x0)]
+
+        # chain rule for change of variables from sigma to fwhm
+        derivs[3] = derivs[3] * GAUSSIAN_FWHM_TO_SIGMA
+        derivs[4] = derivs[4] * GAUSSIAN_FWHM_TO_SIGMA
+        # chain rule for unit change;
+        # theta[rad] => theta[deg] * pi / 180; drad/dtheta = pi / 180
+        derivs[5] = derivs[5] * (np.pi / 180.0)
+
+        return list(derivs)
+
     @property
     def input_units(self):
         """
@@ -1202,6 +1441,13 @@ class CircularGaussianPRF(Fittable2DModel):
         result : `~numpy.ndarray`
             The value of the model evaluated at the input coordinates.
         """
+        args = _kernel_inputs(x, y, flux, x_0, y_0, fwhm)
+        if args is not None:
+            shape, units, x, y, flux, x_0, y_0, fwhm = args
+            values = _functional_kernels.circular_gaussian_prf(
+                x, y, flux, x_0, y_0, fwhm * GAUSSIAN_FWHM_TO_SIGMA)
+            return _kernel_output(values.reshape(shape), units)
+
         x0 = x - x_0
         y0 = y - y_0
         sigma = fwhm * GAUSSIAN_FWHM_TO_SIGMA
@@ -1216,6 +1462,53 @@ class CircularGaussianPRF(Fittable2DModel):
                    * (erf((y0 + dpix) / (np.sqrt(2) * sigma))
                       - erf((y0 - dpix) / (np.sqrt(2) * sigma)))))
 
+    @staticmethod
+    def fit_deriv(x, y, flux, x_0, y_0, fwhm):
+        """
+        Calculate the partial derivatives of the 2D Gaussian function
+        with respect to the parameters.
+
+        Parameters
+        ----------
+        x, y : float or array_like
+            The x and y coordinates at which to evaluate the model.
+
+        flux : float
+            Total integrated flux over the entire PSF.
+
+        x_0, y_0 : float
+            Position of the peak along the x and y axes.
+
+        fwhm : float
+            FWHM of the Gaussian.
+
+        Returns
+        -------
+        result : list of `~numpy.ndarray`
+            The list of partial derivatives with respect to each
+            parameter.
+        """
+        args = _kernel_inputs(x, y, flux, x_0, y_0, fwhm)
+        if args is not None:
+            shape, units, x, y, flux, x_0, y_0, fwhm = args
+            derivs = _functional_kernels.circular_gaussian_prf_deriv(
+                x, y, flux, x_0, y_0, fwhm * GAUSSIAN_FWHM_TO_SIGMA)
+            derivs = _kernel_derivs(derivs.reshape((-1, *shape)), units)
+        else:
+            sigma = fwhm * GAUSSIAN_FWHM_TO_SIGMA
+            ex, dex, sex = _prf_erf_terms(x - x_0, sigma)
+            ey, dey, sey = _prf_erf_terms(y - y_0, sigma)
+            amplitude = flux / 4.0
+            derivs = [ex * ey / 4.0,
+                      -amplitude * dex * ey,
+                      -amplitude * ex * dey,
+                      amplitude * (sex * ey + ex * sey)]
+
+        # chain rule for change of variables from sigma to fwhm
+        derivs[3] = derivs[3] * GAUSSIAN_FWHM_TO_SIGMA
+
+        return list(derivs)
+
     @property
     def input_units(self):
         """
@@ -1797,6 +2090,13 @@ class MoffatPSF(Fittable2DModel):
         result : `~numpy.ndarray`
             The value of the model evaluated at the input coordinates.
         """
+        args = _kernel_inputs(x, y, flux, x_0, y_0, alpha, beta)
+        if args is not None:
+            shape, units, x, y, flux, x_0, y_0, alpha, beta = args
+            values = _functional_kernels.moffat_psf(x, y, flux, x_0, y_0,
+                                                    alpha, beta)
+            return _kernel_output(values.reshape(shape), units)
+
         # output units should match the input flux units
         alpha2 = alpha.copy()
         if isinstance(alpha, u.Quantity):
@@ -1806,6 +2106,59 @@ class MoffatPSF(Fittable2DModel):
         r2 = (x - x_0) ** 2 + (y - y_0) ** 2
         return amp * (1 + (r2 / alpha**2)) ** (-beta)
 
+    @staticmethod
+    def fit_deriv(x, y, flux, x_0, y_0, alpha, beta):
+        """
+        Calculate the partial derivatives of the 2D Moffat function
+        with respect to the parameters.
+
+        Parameters
+        ----------
+        x, y : float or array_like
+            The x and y coordinates at which to evaluate the model.
+
+        flux : float
+            Total integrated flux over the entire PSF.
+
+        x_0, y_0 : float
+            Position of the peak along the x and y axes.
+
+        alpha : float
+            The characteristic radius of the Moffat profile.
+
+        beta : float
+            The asymptotic power-law slope of the Moffat profile wings
+            at large radial distances.
+
+        Returns
+        -------
+        result : list of `~numpy.ndarray`
+            The list of partial derivatives with respect to each
+            parameter.
+        """
+        args = _kernel_inputs(x, y, flux, x_0, y_0, alpha, beta)
+        if args is not None:
+            shape, units, x, y, flux, x_0, y_0, alpha, beta = args
+            derivs = _functional_kernels.moffat_psf_deriv(
+                x, y, flux, x_0, y_0, alpha, beta)
+            return _kernel_derivs(derivs.reshape((-1, *shape)), units)
+
+        dx = x - x_0
+        dy = y - y_0
+        alpha2 = alpha ** 2
+        q1 = 1.0 + (dx ** 2 + dy ** 2) / alpha2
+        base = q1 ** (-beta) / (np.pi * alpha2)
+        value = flux * (beta - 1) * base
+        dpos = 2.0 * beta * value / (alpha2 * q1)
+
+        dg_dflux = (beta - 1) * base
+        dg_dx_0 = dpos * dx
+        dg_dy_0 = dpos * dy
+        dg_dalpha = 2.0 * value / alpha * (beta * (q1 - 1.0) / q1 - 1.0)
+        dg_dbeta = flux * base - value * np.log(q1)
+
+        return [dg_dflux, dg_dx_0, dg_dy_0, dg_dalpha, dg_dbeta]
+
     @property
     def input_units(self):
         """
@@ -2034,6 +2387,13 @@ class AiryDiskPSF(Fittable2DModel):
         result : `~numpy.ndarray`
             The value of the model evaluated at the input coordinates.
         """
+        args = _kernel_inputs(x, y, flux, x_0, y_0, radius)
+        if args is not None:
+            shape, units, x, y, flux, x_0, y_0, radius = args
+            values = _functional_kernels.airy_disk_psf(
+                x, y, flux, x_0, y_0, radius / self._rz)
+            return _kernel_output(values.reshape(shape), units)
+
         r = np.sqrt((x - x_0) ** 2 + (y - y_0) ** 2) / (radius / self._rz)
 
         if isinstance(r, u.Quantity):
@@ -2058,6 +2418,78 @@ class AiryDiskPSF(Fittable2DModel):
 
         return z
 
+    def fit_deriv(self, x, y, flux, x_0, y_0, radius):
+        """
+        Calculate the partial derivatives of the 2D Airy disk function
+        with respect to the parameters.
+
+        Parameters
+        ----------
+        x, y : float or array_like
+            The x and y coordinates at which to evaluate the model.
+
+        flux : float
+            Total integrated flux over the entire PSF.
+
+        x_0, y_0 : float
+            Position of the peak along the x and y axes.
+
+        radius : float
+            The radius of the Airy disk at the first zero.
+
+        Returns
+        -------
+        result : list of `~numpy.ndarray`
+            The list of partial derivatives with respect to each
+            parameter.
+        """
+        args = _kernel_inputs(x, y, flux, x_0, y_0, radius)
+        if args is not None:
+            shape, units, x, y, flux, x_0, y_0, radius = args
+            derivs = _functional_kernels.airy_disk_psf_deriv(
+                x, y, flux, x_0, y_0, radius / self._rz)
+            derivs = _kernel_derivs(derivs.reshape((-1, *shape)), units)
+        else:
+            width = radius / self._rz
+            dx = x - x_0
+            dy = y - y_0
+            rt = np.asarray(np.pi * np.sqrt(dx ** 2 + dy ** 2) / width)
+
+            # the masked assignments below are done on 1D arrays, which
+            # are reshaped back to the input shape (e.g., for scalar
+            # inputs)
+            shape = rt.shape
+            rt = rt.ravel()
+
+            # g = 2 * J1(rt) / rt and h = 2 * (J0(rt) - g) / rt**2,
+            # where h (the derivative of g divided by rt) is computed
+            # from its series expansion at small rt to avoid
+            # cancellation
+            g = np.ones(rt.shape)
+            rt2 = rt ** 2
+            h = -0.25 + rt2 * (1.0 / 48.0 + rt2 * (-1.0 / 1536.0
+                                                   + rt2 / 92160.0))
+            j0_rt = j0(rt)
+            mask = rt > 0
+            g[mask] = 2.0 * j1(rt[mask]) / rt[mask]
+            mask = rt >= 0.1
+            h[mask] = 2.0 * (j0_rt[mask] - g[mask]) / rt2[mask]
+            g = g.reshape(shape)
+            h = h.reshape(shape)
+            j0_rt = j0_rt.reshape(shape)
+
+            norm = np.pi / (4.0 * width ** 2)
+            dpos = 2.0 * flux * norm * g * h * (np.pi / width) ** 2
+            derivs = [norm * g ** 2,
+                      -dpos * dx,
+                      -dpos * dy,
+                      -2.0 * flux * norm / width * g * (2.0 * j0_rt - g)]
+
+        # chain rule for change of variables from width to radius
+        derivs[3] = derivs[3] / self._rz
+
+        return list(derivs)
+
     @property
     def input_units(self):
         """
@@ -5,6 +5,7 @@ This module defines gridded PSF models.
 
 import copy
 import itertools
+from collections import OrderedDict, namedtuple
 
 import numpy as np
 from astropy.io import registry
@@ -88,6 +89,23 @@ class GriddedPSFModel(ModelGridPlotMixin, Fittable2DModel):
         The value to use for points outside of the input pixel grid.
         The default is 0.0.
 
+    cache_size : int, optional
+        The maximum number of spatially-interpolated ePSFs to store
+        in a least-recently-used cache. If greater than zero, the
+        bilinearly-interpolated ePSF (and its spline interpolator)
+        at each quantized ``(x_0, y_0)`` position is computed only
+        once and then reused, e.g., when the same source is evaluated
+        many times during a fit. The positions are quantized to
+        ``1 / cache_subpixels`` pixels. The cache is shared by model
+        copies made with the `copy` method. The default of 0 disables
+        the cache.
+
+    cache_subpixels : int, optional
+        The number of subpixels per pixel used to quantize the
+        ``(x_0, y_0)`` position for the cache. The interpolation
+        weights of the reference ePSFs are computed at the quantized
+        position. This keyword is ignored if ``cache_size`` is 0.
+
     Methods
     -------
     read(*args, **kwargs)
@@ -113,7 +131,8 @@ class GriddedPSFModel(ModelGridPlotMixin, Fittable2DModel):
     read = registry.UnifiedReadWriteMethod(GriddedPSFModelRead)
 
     def __init__(self, nddata, *, flux=flux.default, x_0=x_0.default,
-                 y_0=y_0.default, fill_value=0.0):
+                 y_0=y_0.default, fill_value=0.0, cache_size=0,
+                 cache_subpixels=8):
 
         self.data, self.grid_xypos = self._define_grid(nddata)
         self._meta = nddata.meta.copy()  # _meta to avoid the meta descriptor
@@ -128,6 +147,14 @@ class GriddedPSFModel(ModelGridPlotMixin, Fittable2DModel):
 
         self._interpolator = {}
 
+        if cache_size < 0 or int(cache_size) != cache_size:
+            raise ValueError('cache_size must be a non-negative integer.')
+        if cache_subpixels < 1 or int(cache_subpixels) != cache_subpixels:
+            raise ValueError('cache_subpixels must be a strictly-positive '
+                             'integer.')
+        self._epsf_cache = _LRUCache(int(cache_size))
+        self.cache_subpixels = int(cache_subpixels)
+
         super().__init__(flux, x_0, y_0)
 
     @staticmethod
@@ -302,6 +329,25 @@ class GriddedPSFModel(ModelGridPlotMixin, Fittable2DModel):
         """
         return copy.deepcopy(self)
 
+    def cache_info(self):
+        """
+        Return the statistics of the spatially-interpolated ePSF cache.
+
+        Returns
+        -------
+        result : namedtuple
+            A named tuple with the number of cache ``hits`` and
+            ``misses``, the maximum cache size (``maxsize``), and the
+            current number of cached ePSFs (``currsize``).
+        """
+        return self._epsf_cache.info()
+
+    def cache_clear(self):
+        """
+        Clear the spatially-interpolated ePSF cache and its statistics.
+        """
+        self._epsf_cache.clear()
+
     @property
     def oversampling(self):
         """
@@ -496,6 +542,79 @@ class GriddedPSFModel(ModelGridPlotMixin, Fittable2DModel):
         return np.array([(x1 - xi) * (y1 - yi), (xi - x0) * (y1 - yi),
                          (x1 - xi) * (yi - y0), (xi - x0) * (yi - y0)]) / norm
 
+    def _calc_bilinear_weight_derivs(self, xi, yi, grid_xy):
+        """
+        Calculate the derivatives of the bilinear interpolation weights
+        with respect to the (xi, yi) coordinate.
+
+        The derivatives are zero along the axes where the coordinate is
+        outside of the grid (i.e., where the weights are clipped).
+
+        Parameters
+        ----------
+        xi, yi : float
+            The (x_0, y_0) position of the model.
+
+        grid_xy : `~numpy.ndarray`
+            The x and y coordinates of the four bounding points. The
+            order is left, right, bottom, top.
+
+        Returns
+        -------
+        dweights_dx, dweights_dy : `~numpy.ndarray`
+            The derivatives of the bilinear interpolation weights for
+            the four bounding points with respect to xi and yi. The
+            order is lower-left, lower-right, upper-left, upper-right.
+        """
+        x0, x1, y0, y1 = grid_xy
+        inside_x = x0 <= xi <= x1
+        inside_y = y0 <= yi <= y1
+        xi = np.clip(xi, x0, x1)
+        yi = np.clip(yi, y0, y1)
+
+        norm = (x1 - x0) * (y1 - y0)
+        dweights_dx = np.array([-(y1 - yi), (y1 - yi), -(yi - y0),
+                                (yi - y0)]) / norm
+        dweights_dy = np.array([-(x1 - xi), -(xi - x0), (x1 - xi),
+                                (xi - x0)]) / norm
+
+        return dweights_dx * inside_x, dweights_dy * inside_y
+
+    def _calc_cached_interpolator(self, x_0, y_0):
+        """
+        Calculate the `~scipy.interpolate.RectBivariateSpline`
+        interpolator for the bilinearly-interpolated ePSF at the
+        quantized (x_0, y_0) position, using the ePSF cache.
+
+        Parameters
+        ----------
+        x_0, y_0 : float
+            The (x, y) position of the model.
+
+        Returns
+        -------
+        interp : `~scipy.interpolate.RectBivariateSpline`
+            The interpolator for the spatially-interpolated ePSF.
+        """
+        key = (int(np.round(x_0 * self.cache_subpixels)),
+               int(np.round(y_0 * self.cache_subpixels)))
+        interp = self._epsf_cache.get(key)
+        if interp is not None:
+            return interp
+
+        xq, yq = np.array(key) / self.cache_subpixels
+        grid_idx, grid_xy = self._find_bounding_points(xq, yq)
+        weights = self._calc_bilinear_weights(xq, yq, grid_xy)
+
+        # the splines are linear in the data values, thus interpolating
+        # the blended ePSF is the same as blending the interpolated
+        # reference ePSFs
+        data = np.tensordot(weights, self.data[grid_idx], axes=1)
+        interp = RectBivariateSpline(*self._interp_xyidx, data.T, kx=3, ky=3,
+                                     s=0)
+        self._epsf_cache.put(key, interp)
+        return interp
+
     def _calc_model_values(self, x_0, y_0, xi, yi):
         """
         Calculate the ePSF model at a given (x_0, y_0) model coordinate
@@ -516,6 +635,10 @@ class GriddedPSFModel(ModelGridPlotMixin, Fittable2DModel):
             The interpolated ePSF model at the input (x_0, y_0)
             coordinate.
         """
+        if self._epsf_cache.maxsize > 0:
+            interp = self._calc_cached_interpolator(x_0, y_0)
+            return interp(xi, yi, grid=False)
+
         grid_idx, grid_xy = self._find_bounding_points(x_0, y_0)
         interpolators = np.array([self._calc_interpolator(gidx)
                                   for gidx in grid_idx])
@@ -582,6 +705,247 @@ class GriddedPSFModel(ModelGridPlotMixin, Fittable2DModel):
 
         return evaluated_model
 
+    def fit_deriv(self, x, y, flux, x_0, y_0):
+        """
+        Calculate the partial derivatives of the ePSF model with respect
+        to the model parameters.
+
+        The derivatives are calculated analytically from the
+        derivatives of the interpolating splines and of the bilinear
+        interpolation weights of the reference ePSFs. If the ePSF cache
+        is enabled, the interpolation weights are constant for each
+        quantized (x_0, y_0) position, and thus their derivatives are
+        zero.
+
+        Parameters
+        ----------
+        x, y : float or `~numpy.ndarray`
+            The x and y positions at which to evaluate the model.
+
+        flux : float
+            The flux scaling factor for the model.
+
+        x_0, y_0 : float
+            The (x, y) position of the model.
+
+        Returns
+        -------
+        result : list of `~numpy.ndarray`
+            The derivatives with respect to the ``flux``, ``x_0``, and
+            ``y_0`` parameters.
+        """
+        if not np.isscalar(x_0):
+            x_0 = x_0[0]
+        if not np.isscalar(y_0):
+            y_0 = y_0[0]
+
+        xi = self.oversampling[1] * (np.asarray(x, dtype=float) - x_0)
+        yi = self.oversampling[0] * (np.asarray(y, dtype=float) - y_0)
+        xi += self.origin[0]
+        yi += self.origin[1]
+
+        if self._epsf_cache.maxsize > 0:
+            interpolators = [self._calc_cached_interpolator(x_0, y_0)]
+            weights = np.array([1.0])
+            dweights_dx = dweights_dy = np.array([0.0])
+        else:
+            grid_idx, grid_xy = self._find_bounding_points(x_0, y_0)
+            interpolators = [self._calc_interpolator(gidx)
+                             for gidx in grid_idx]
+            weights = self._calc_bilinear_weights(x_0, y_0, grid_xy)
+            dweights_dx, dweights_dy = self._calc_bilinear_weight_derivs(
+                x_0, y_0, grid_xy)
+
+        values = np.zeros(xi.shape)
+        dvalues_dxi = np.zeros(xi.shape)
+        dvalues_dyi = np.zeros(xi.shape)
+        dweights_x_term = np.zeros(xi.shape)
+        dweights_y_term = np.zeros(xi.shape)
+        for interp, weight, dweight_dx, dweight_dy in zip(
+                interpolators, weights, dweights_dx, dweights_dy,
+                strict=True):
+            if weight == 0 and dweight_dx == 0 and dweight_dy == 0:
+                continue
+            interp_values = interp(xi, yi, grid=False)
+            values += weight * interp_values
+            dvalues_dxi += weight * interp(xi, yi, dx=1, grid=False)
+            dvalues_dyi += weight * interp(xi, yi, dy=1, grid=False)
+            dweights_x_term += dweight_dx * interp_values
+            dweights_y_term += dweight_dy * interp_values
+
+        d_flux = values
+        d_x_0 = flux * (dweights_x_term
+                        - self.oversampling[1] * dvalues_dxi)
+        d_y_0 = flux * (dweights_y_term
+                        - self.oversampling[0] * dvalues_dyi)
+
+        if self.fill_value is not None:
+            # the model is constant outside the input pixel grid
+            ny, nx = self.data.shape[1:]
+            invalid = (xi < 0) | (xi > nx - 1) | (yi < 0) | (yi > ny - 1)
+            for deriv in (d_flux, d_x_0, d_y_0):
+                deriv[invalid] = 0.0
+
+        return [d_flux, d_x_0, d_y_0]
+
+    def evaluate_sources(self, x, y, flux, x_0, y_0):
+        """
+        Calculate the ePSF models of many sources at once.
+
+        Unlike `evaluate`, which evaluates a single model, this
+        method evaluates the models of many sources with different
+        parameters. The sources are grouped by the reference ePSFs
+        of their bounding grid points, such that each reference ePSF
+        interpolator is called at most once for all sources. This is
+        much faster than evaluating the sources individually when
+        rendering (or fitting) many sources.
+
+        Parameters
+        ----------
+        x, y : `~numpy.ndarray`
+            The x and y positions at which to evaluate the models. The
+            first axis of the arrays corresponds to the sources, e.g.,
+            ``x`` and ``y`` can have a shape of ``(n_sources, ny, nx)``
+            to evaluate a cutout image for each source.
+
+        flux : float or 1D `~numpy.ndarray`
+            The flux scaling factors of the sources.
+
+        x_0, y_0 : float or 1D `~numpy.ndarray`
+            The (x, y) positions of the sources.
+
+        Returns
+        -------
+        evaluated_model : `~numpy.ndarray`
+            The evaluated models with the same shape as ``x`` and
+            ``y``.
+        """
+        x = np.asarray(x, dtype=float)
+        y = np.asarray(y, dtype=float)
+        if x.shape != y.shape or x.ndim == 0:
+            raise ValueError('x and y must be arrays with the same shape.')
+        nsources = x.shape[0]
+        flux, x_0, y_0 = (np.broadcast_to(param, nsources)
+                          for param in (flux, x_0, y_0))
+
+        # reshape the source parameters to broadcast with x and y
+        param_shape = (-1,) + (1,) * (x.ndim - 1)
+        x_0 = np.asarray(x_0, dtype=float).reshape(param_shape)
+        y_0 = np.asarray(y_0, dtype=float).reshape(param_shape)
+
+        xi = self.oversampling[1] * (x - x_0) + self.origin[0]
+        yi = self.oversampling[0] * (y - y_0) + self.origin[1]
+
+        # the grid indices of the lower-left bounding grid point of
+        # each source; the grid is sorted first by y and then by x
+        x_0 = x_0.ravel()
+        y_0 = y_0.ravel()
+        nxgrid = len(self._xgrid)
+        xidx = np.clip(np.searchsorted(self._xgrid, x_0) - 1, 0, nxgrid - 2)
+        yidx = np.clip(np.searchsorted(self._ygrid, y_0) - 1, 0,
+                       len(self._ygrid) - 2)
+        grid_xy = np.array((self._xgrid[xidx], self._xgrid[xidx + 1],
+                            self._ygrid[yidx], self._ygrid[yidx + 1]))
+        weights = self._calc_bilinear_weights(x_0, y_0, grid_xy)
+
+        # lower-left, lower-right, upper-left, upper-right
+        lower_left = (yidx * nxgrid) + xidx
+        grid_idx = np.array((lower_left, lower_left + 1,
+                             lower_left + nxgrid, lower_left + nxgrid + 1))
+
+        # the sources sharing each reference ePSF are interpolated
+        # together; a source is never included twice for the same
+        # reference ePSF
+        evaluated_model = np.zeros(x.shape)
+        nonzero = weights != 0
+        for gidx in np.unique(grid_idx[nonzero]):
+            corner, idx = np.nonzero((grid_idx == gidx) & nonzero)
+            values = self._calc_interpolator(gidx)(xi[idx].ravel(),
+                                                   yi[idx].ravel(),
+                                                   grid=False)
+            values = values.reshape(xi[idx].shape)
+            evaluated_model[idx] += (values
+                                     * weights[corner, idx].reshape(
+                                         param_shape))
+
+        evaluated_model *= np.reshape(flux, param_shape)
+
+        if self.fill_value is not None:
+            # set pixels that are outside the input pixel grid to the
+            # fill_value to avoid extrapolation
+            ny, nx = self.data.shape[1:]
+            invalid = (xi < 0) | (xi > nx - 1) | (yi < 0) | (yi > ny - 1)
+            evaluated_model[invalid] = self.fill_value
+
+        return evaluated_model
+
+
+_CacheInfo = namedtuple('CacheInfo', ['hits', 'misses', 'maxsize',
+                                       'currsize'])
+
+
+class _LRUCache:
+    """
+    A bounded least-recently-used cache with hit and miss counters.
+
+    Parameters
+    ----------
+    maxsize : int
+        The maximum number of cached items. If 0, nothing is cached.
+    """
+
+    def __init__(self, maxsize):
+        self.maxsize = maxsize
+        self._data = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key):
+        """
+        Return the cached value for ``key`` (or `None` if it is not
+        cached) and update the cache statistics.
+        """
+        # KeyError can also be raised if the item is discarded by
+        # another thread
+        try:
+            value = self._data[key]
+            self._data.move_to_end(key)
+        except KeyError:
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return value
+
+    def put(self, key, value):
+        """
+        Add a value to the cache, discarding the least-recently-used
+        item if the cache is full.
+        """
+        if self.maxsize <= 0:
+            return
+        self._data[key] = value
+        while len(self._data) > self.maxsize:
+            try:
+                self._data.popitem(last=False)
+            except KeyError:  # pragma: no cover
+                break
+
+    def clear(self):
+        """
+        Clear the cache and its statistics.
+        """
+        self._data.clear()
+        self.hits = 0
+        self.misses = 0
+
+    def info(self):
+        """
+        Return the cache statistics.
+        """
+        return _CacheInfo(self.hits, self.misses, self.maxsize,
+                          len(self._data))
+
 
 class STDPSFGrid(ModelGridPlotMixin):
     """
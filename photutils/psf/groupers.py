@@ -6,7 +6,9 @@ This module provides classes to perform grouping of stars.
 from collections import defaultdict
 
 import numpy as np
-from scipy.cluster.hierarchy import fclusterdata
+from scipy.sparse import coo_matrix
+from scipy.sparse.csgraph import connected_components
+from scipy.spatial import cKDTree
 
 __all__ = ['SourceGrouper']
 
@@ -16,9 +18,14 @@ class SourceGrouper:
     Class to group sources into clusters based on a minimum separation
     distance.
 
-    The groups are formed using hierarchical agglomerative
-    clustering with a distance criterion, calling the
-    `scipy.cluster.hierarchy.fclusterdata` function.
+    The groups are formed using a "friends-of-friends" algorithm,
+    which is equivalent to hierarchical agglomerative clustering
+    with single linkage and a distance criterion (e.g., the
+    `scipy.cluster.hierarchy.fclusterdata` function). All pairs of
+    sources separated by no more than ``min_separation`` are found
+    using a `scipy.spatial.cKDTree` and the groups are the connected
+    components of the resulting graph. This scales as O(N log N) in the
+    number of sources and does not require a pairwise distance matrix.
 
     Parameters
     ----------
@@ -26,10 +33,30 @@ class SourceGrouper:
         The minimum distance (in pixels) such that any two sources
         separated by less than this distance will be placed in the same
         group if the ``min_size`` criteria is also met.
+
+    max_group_size : int or `None`, optional
+        The maximum number of sources in a group. Groups with more
+        sources are recursively split in two at the median position
+        along their longest axis until no group exceeds this size. Note
+        that this means sources closer than ``min_separation`` may be
+        placed in different groups. If `None`, then the groups are not
+        split.
     """
 
-    def __init__(self, min_separation):
+    def __init__(self, min_separation, *, max_group_size=None):
         self.min_separation = min_separation
+        self.max_group_size = self._validate_max_group_size(max_group_size)
+
+    @staticmethod
+    def _validate_max_group_size(max_group_size):
+        if max_group_size is None:
+            return max_group_size
+        if (not np.isscalar(max_group_size)
+                or not np.isfinite(max_group_size) or max_group_size < 1
+                or max_group_size != int(max_group_size)):
+            raise ValueError('max_group_size must be a strictly-positive '
+                             'integer')
+        return int(max_group_size)
 
     def __call__(self, x, y):
         """
@@ -77,10 +104,86 @@ class SourceGrouper:
             return np.array([1])
 
         xypos = np.transpose((x, y))
-        group_id = fclusterdata(xypos, t=self.min_separation,
-                                criterion='distance')
+        group_id = self._find_groups(xypos)
+        if self.max_group_size is not None:
+            group_id = self._split_groups(xypos, group_id)
 
         # reorder the group_ids so that unique group_ids start from 1
         # and increase (this matches the output of DBSCAN)
         mapping = defaultdict(lambda: len(mapping) + 1)
         return np.array([mapping[group] for group in group_id])
+
+    def _find_groups(self, xypos):
+        """
+        Find the friends-of-friends groups of sources.
+
+        Two sources are linked if their separation is less than
+        or equal to ``min_separation`` (the same criterion as
+        `scipy.cluster.hierarchy.fclusterdata`).
+
+        Parameters
+        ----------
+        xypos : 2D `~numpy.ndarray`
+            A (N, 2) array of the (x, y) source positions.
+
+        Returns
+        -------
+        result : 1D int `~numpy.ndarray`
+            A 1D array of the (unordered) group ids.
+        """
+        nsources = len(xypos)
+        pairs = cKDTree(xypos).query_pairs(self.min_separation,
+                                           output_type='ndarray')
+        graph = coo_matrix((np.ones(len(pairs), dtype=bool),
+                           (pairs[:, 0], pairs[:, 1])),
+                          shape=(nsources, nsources))
+        _, group_id = connected_components(graph, directed=False)
+
+        return group_id
+
+    def _split_groups(self, xypos, group_id):
+        """
+        Split the groups that have more than ``max_group_size``
+        sources.
+
+        Large groups are recursively bisected at the median position
+        along their longest axis.
+
+        Parameters
+        ----------
+        xypos : 2D `~numpy.ndarray`
+            A (N, 2) array of the (x, y) source positions.
+
+        group_id : 1D int `~numpy.ndarray`
+            A 1D array of the group ids.
+
+        Returns
+        -------
+        result : 1D int `~numpy.ndarray`
+            A 1D array of the (unordered) group ids.
+        """
+        group_id = group_id.copy()
+        _, inverse, counts = np.unique(group_id, return_inverse=True,
+                                       return_counts=True)
+        large_groups = np.nonzero(counts > self.max_group_size)[0]
+        if len(large_groups) == 0:
+            return group_id
+
+        next_id = group_id.max() + 1
+        stack = [np.nonzero(inverse == idx)[0] for idx in large_groups]
+        while stack:
+            indices = stack.pop()
+            if len(indices) <= self.max_group_size:
+                group_id[indices] = next_id
+                next_id += 1
+                continue
+
+            pos = xypos[indices]
+            axis = np.argmax(np.ptp(pos, axis=0))
+            # a stable sort keeps the split deterministic for sources
+            # with identical coordinates
+            order = np.argsort(pos[:, axis], kind='stable')
+            half = len(indices) // 2
+            stack.extend((indices[order[half:]], indices[order[:half]]))
+
+        return group_id
@@ -339,6 +339,53 @@ class ImagePSF(Fittable2DModel):
 
         return evaluated_model
 
+    def fit_deriv(self, x, y, flux, x_0, y_0):
+        """
+        Calculate the partial derivatives of the image model with
+        respect to the model parameters.
+
+        The derivatives are calculated analytically from the derivatives
+        of the interpolating spline.
+
+        Parameters
+        ----------
+        x, y : float or array_like
+            The x and y coordinates at which to evaluate the model.
+
+        flux : float
+            The total flux of the source, assuming the input image
+            was properly normalized.
+
+        x_0, y_0 : float
+            The x and y positions of the feature in the image in the
+            output coordinate grid on which the model is evaluated.
+
+        Returns
+        -------
+        result : list of `~numpy.ndarray`
+            The derivatives with respect to the ``flux``, ``x_0``, and
+            ``y_0`` parameters.
+        """
+        xi = self.oversampling[1] * (np.asarray(x, dtype=float) - x_0)
+        yi = self.oversampling[0] * (np.asarray(y, dtype=float) - y_0)
+        xi += self._origin[0]
+        yi += self._origin[1]
+
+        d_flux = self.interpolator(xi, yi, grid=False)
+        d_x_0 = (-flux * self.oversampling[1]
+                 * self.interpolator(xi, yi, dx=1, grid=False))
+        d_y_0 = (-flux * self.oversampling[0]
+                 * self.interpolator(xi, yi, dy=1, grid=False))
+
+        if self.fill_value is not None:
+            # the model is constant outside the input pixel grid
+            ny, nx = self.data.shape
+            invalid = (xi < 0) | (xi > nx - 1) | (yi < 0) | (yi > ny - 1)
+            d_flux, d_x_0, d_y_0 = (np.where(invalid, 0.0, deriv)
+                                    for deriv in (d_flux, d_x_0, d_y_0))
+
+        return [d_flux, d_x_0, d_y_0]
+
 
 @deprecated('2.0.0', alternative='`ImagePSF`')
 class FittableImageModel(Fittable2DModel):
@@ -836,6 +883,55 @@ class FittableImageModel(Fittable2DModel):
 
         return evaluated_model
 
+    def fit_deriv(self, x, y, flux, x_0, y_0):
+        """
+        Calculate the partial derivatives of the image model with
+        respect to the model parameters.
+
+        The derivatives are calculated analytically from the derivatives
+        of the interpolating spline.
+
+        Parameters
+        ----------
+        x, y : float or array_like
+            The x and y coordinates at which to evaluate the model.
+
+        flux : float
+            The total flux of the source.
+
+        x_0, y_0 : float
+            The x and y positions of the feature in the image in the
+            output coordinate grid on which the model is evaluated.
+
+        Returns
+        -------
+        result : list of `~numpy.ndarray`
+            The derivatives with respect to the ``flux``, ``x_0``, and
+            ``y_0`` parameters.
+        """
+        xi = self._oversampling[1] * (np.asarray(x) - x_0)
+        yi = self._oversampling[0] * (np.asarray(y) - y_0)
+        xi = xi.astype(float)
+        yi = yi.astype(float)
+        xi += self._x_origin
+        yi += self._y_origin
+
+        norm = self._normalization_constant
+        d_flux = norm * self.interpolator.ev(xi, yi)
+        d_x_0 = (-flux * norm * self._oversampling[1]
+                 * self.interpolator.ev(xi, yi, dx=1))
+        d_y_0 = (-flux * norm * self._oversampling[0]
+                 * self.interpolator.ev(xi, yi, dy=1))
+
+        if self._fill_value is not None:
+            # the model is constant outside the input pixel grid
+            invalid = (((xi < 0) | (xi > self._nx - 1))
+                       | ((yi < 0) | (yi > self._ny - 1)))
+            for deriv in (d_flux, d_x_0, d_y_0):
+                deriv[invalid] = 0.0
+
+        return [d_flux, d_x_0, d_y_0]
+
 
 class _LegacyEPSFModel(Fittable2DModel):
     """
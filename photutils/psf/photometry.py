@@ -7,8 +7,10 @@ import contextlib
 import inspect
 import warnings
 from collections import defaultdict
+from concurrent.futures import Executor
 from copy import deepcopy
-from itertools import chain
+from itertools import chain, pairwise
+from pathlib import Path
 
 import astropy.units as u
 import numpy as np
@@ -18,10 +20,13 @@ from astropy.table import QTable, Table, hstack, join, vstack
 from astropy.utils import lazyproperty
 from astropy.utils.decorators import deprecated_attribute
 from astropy.utils.exceptions import AstropyUserWarning
+from scipy.sparse import csr_matrix
 
 from photutils.aperture import CircularAperture
 from photutils.background import LocalBackground
 from photutils.datasets import make_model_image as _make_model_image
+from photutils.datasets.images import _model_shape_from_bbox
+from photutils.psf.fitters import LinearFluxFitter, SparseGroupFitter
 from photutils.psf.groupers import SourceGrouper
 from photutils.psf.utils import _get_psf_model_params, _validate_psf_model
 from photutils.utils._misc import _get_meta
@@ -229,9 +234,18 @@ class PSFPhotometry(ModelImageMixin):
         ``group_id`` values in ``init_params`` override this keyword. A
         warning is raised if any group size is larger than 25 sources.
 
-    fitter : `~astropy.modeling.fitting.Fitter`, optional
+    fitter : `~astropy.modeling.fitting.Fitter`, \
+            `~photutils.psf.SparseGroupFitter`, or \
+            `~photutils.psf.LinearFluxFitter`, optional
         The fitter object used to perform the fit of the model to the
-        data.
+        data. For large source groups, the
+        `~photutils.psf.SparseGroupFitter` is much faster than the
+        Astropy fitters because it does not create a compound model for
+        each group and uses a sparse Jacobian matrix. For forced
+        photometry, where all the PSF model parameters except the
+        flux are fixed, the `~photutils.psf.LinearFluxFitter` solves
+        for the fluxes of all the sources at once with linear least
+        squares.
 
     fitter_maxiters : int, optional
         The maximum number of iterations in which the ``fitter`` is
@@ -268,6 +282,19 @@ class PSFPhotometry(ModelImageMixin):
         Note that the progress bar does not currently work in the
         Jupyter console due to limitations in ``tqdm``.
 
+    executor : `concurrent.futures.Executor` or `None`, optional
+        The executor used to fit the sources (or groups) in parallel
+        (e.g., a `~concurrent.futures.ThreadPoolExecutor` or
+        `~concurrent.futures.ProcessPoolExecutor`). Each source group
+        is submitted as a separate task. If `None`, then the sources
+        are fit serially. The executor is not shut down by this class.
+        For a `~concurrent.futures.ProcessPoolExecutor`, the PSF model
+        and ``fitter`` must be picklable, and any warnings emitted
+        during the fits are handled by the warning filters of the worker
+        processes. Please note that due to
+        overheads, parallel fitting may be slower than serial fitting if
+        only a small number of sources are to be fit.
+
     Notes
     -----
     The data that will be fit for each source is defined by the
@@ -313,7 +340,9 @@ class PSFPhotometry(ModelImageMixin):
     currently constructed, large groups also require excessively large
     amounts of memory; this will hopefully be fixed in a future Astropy
     version. A warning will be raised if the number of sources in a
-    group exceeds 25.
+    group exceeds 25. Compound models are not created when using the
+    `~photutils.psf.SparseGroupFitter`, which can efficiently fit
+    large groups.
     """
 
     fit_results = deprecated_attribute('fit_results', '2.0.0',
@@ -322,7 +351,7 @@ class PSFPhotometry(ModelImageMixin):
     def __init__(self, psf_model, fit_shape, *, finder=None, grouper=None,
                  fitter=TRFLSQFitter(), fitter_maxiters=100,
                  xy_bounds=None, localbkg_estimator=None, aperture_radius=None,
-                 progress_bar=False):
+                 progress_bar=False, executor=None):
 
         self._param_maps = self._define_param_maps(psf_model)
         self.psf_model = _validate_psf_model(psf_model)
@@ -332,12 +361,15 @@ class PSFPhotometry(ModelImageMixin):
         self.grouper = self._validate_grouper(grouper)
         self.finder = self._validate_callable(finder, 'finder')
         self.fitter = self._validate_callable(fitter, 'fitter')
+        if isinstance(self.fitter, LinearFluxFitter):
+            self.fitter._validate_model(self.psf_model)
         self.localbkg_estimator = self._validate_localbkg(
             localbkg_estimator, 'localbkg_estimator')
         self.fitter_maxiters = self._validate_maxiters(fitter_maxiters)
         self.xy_bounds = self._validate_bounds(xy_bounds)
         self.aperture_radius = self._validate_radius(aperture_radius)
         self.progress_bar = progress_bar
+        self.executor = self._validate_executor(executor)
 
         # be sure to reset these attributes for each __call__
         # (see _reset_results)
@@ -368,6 +400,13 @@ class PSFPhotometry(ModelImageMixin):
             raise ValueError('grouper must be a SourceGrouper instance.')
         return grouper
 
+    @staticmethod
+    def _validate_executor(executor):
+        if executor is not None and not isinstance(executor, Executor):
+            raise TypeError('executor must be a concurrent.futures.Executor '
+                            'instance.')
+        return executor
+
     @staticmethod
     def _define_model_params_map(psf_model):
         # The main parameter names are checked together as a unit in the
@@ -739,10 +778,28 @@ class PSFPhotometry(ModelImageMixin):
         """
         Make a PSF model to fit a single source or several sources
         within a group.
+
+        For the `SparseGroupFitter`, a list of the PSF models of the
+        sources is returned instead of a compound model.
+        """
+        models = self._make_source_models(sources)
+        if isinstance(self.fitter, SparseGroupFitter):
+            return models
+
+        psf_model = models[0]
+        for model in models[1:]:
+            psf_model += model
+
+        return psf_model
+
+    def _make_source_models(self, sources):
+        """
+        Make a list of the PSF models of the input sources.
         """
         init_param_map = self._param_maps['init']
 
-        for index, source in enumerate(sources):
+        models = []
+        for source in sources:
             model = self.psf_model.copy()
             for model_param, init_col in init_param_map.items():
                 value = source[init_col]
@@ -762,12 +819,9 @@ class PSFPhotometry(ModelImageMixin):
                     y_param.bounds = (y_param.value - self.xy_bounds[1],
                                       y_param.value + self.xy_bounds[1])
 
-            if index == 0:
-                psf_model = model
-            else:
-                psf_model += model
+            models.append(model)
 
-        return psf_model
+        return models
 
     @staticmethod
     def _move_column(table, colname, colname_after):
@@ -884,68 +938,99 @@ class PSFPhotometry(ModelImageMixin):
         return hstack([out_params, param_errs])
 
     def _define_fit_data(self, sources, data, mask):
-        yi = []
-        xi = []
-        cutout = []
-        npixfit = []
-        cen_index = []
-        for row in sources:
-            xcen = row[self._param_maps['init_cols']['x']]
-            ycen = row[self._param_maps['init_cols']['y']]
+        """
+        Define the fit data for all the input sources at once.
 
-            try:
-                slc_lg, _ = overlap_slices(data.shape, self.fit_shape,
-                                           (ycen, xcen), mode='trim')
-            except NoOverlapError as exc:  # pragma: no cover
-                # this should never happen because the initial positions
-                # are checked in _prepare_fit_inputs
-                msg = (f'Initial source at ({xcen}, {ycen}) does not '
-                       'overlap with the input data.')
-                raise ValueError(msg) from exc
-
-            yy, xx = np.mgrid[slc_lg]
-
-            if mask is not None:
-                inv_mask = ~mask[yy, xx]
-                if np.count_nonzero(inv_mask) == 0:
-                    msg = (f'Source at ({xcen}, {ycen}) is completely masked. '
-                           'Remove the source from init_params or correct '
-                           'the input mask.')
-                    raise ValueError(msg)
-
-                yy = yy[inv_mask]
-                xx = xx[inv_mask]
-            else:
-                xx = xx.ravel()
-                yy = yy.ravel()
+        The pixel indices of the ``fit_shape`` region of every source
+        are gathered at once using a precomputed template of pixel
+        offsets and fancy indexing. The pixels that are outside of the
+        data or masked are removed. The fit data for all the sources are
+        returned as flat arrays, where the pixels of each source are
+        stored contiguously (in the input source order) in row-major
+        order.
+
+        Parameters
+        ----------
+        sources : `~astropy.table.Table`
+            The table of sources with the initial parameters.
+
+        data : 2D `~numpy.ndarray`
+            The 2D data array.
 
-            xi.append(xx)
-            yi.append(yy)
-            local_bkg = row['local_bkg']
-            if isinstance(local_bkg, u.Quantity):
-                local_bkg = local_bkg.value
-            cutout.append(data[yy, xx] - local_bkg)
-            npixfit.append(len(xx))
+        mask : 2D bool `~numpy.ndarray` or `None`
+            The data mask.
 
-            # this is overlap_slices center pixel index (before any trimming)
-            xcen = np.ceil(xcen - 0.5).astype(int)
-            ycen = np.ceil(ycen - 0.5).astype(int)
+        Returns
+        -------
+        yi, xi : 1D int `~numpy.ndarray`
+            The y and x pixel indices of the fit data.
 
-            idx = np.where((xx == xcen) & (yy == ycen))[0]
-            if len(idx) == 0:
-                idx = [np.nan]
-            cen_index.append(idx[0])
+        cutout : 1D float `~numpy.ndarray`
+            The data values, minus the local background, of the fit
+            data.
 
-        # flatten the lists, which may contain arrays of different lengths
-        # due to masking
-        xi = _flatten(xi)
-        yi = _flatten(yi)
-        cutout = _flatten(cutout)
+        npixfit : 1D int `~numpy.ndarray`
+            The number of fit pixels for each source.
 
-        self._group_results['npixfit'].append(npixfit)
-        self._group_results['psfcenter_indices'].append(cen_index)
+        cen_index : list
+            The index of the initial center pixel of each source within
+            its fit data. The value is NaN if the center pixel was
+            masked.
+        """
+        xcen = np.asarray(sources[self._param_maps['init_cols']['x']],
+                          dtype=float)
+        ycen = np.asarray(sources[self._param_maps['init_cols']['y']],
+                          dtype=float)
+
+        # the lower-left pixel of each fit_shape region, as defined in
+        # overlap_slices, and the template of pixel offsets
+        ny, nx = self.fit_shape
+        ymin = np.ceil(ycen - (ny / 2.0)).astype(int)
+        xmin = np.ceil(xcen - (nx / 2.0)).astype(int)
+        yoffsets, xoffsets = np.mgrid[0:ny, 0:nx]
+        yy = ymin[:, np.newaxis] + yoffsets.ravel()
+        xx = xmin[:, np.newaxis] + xoffsets.ravel()
+
+        valid = ((yy >= 0) & (yy < data.shape[0])
+                 & (xx >= 0) & (xx < data.shape[1]))
+        nooverlap = ~np.any(valid, axis=1)
+        if np.any(nooverlap):  # pragma: no cover
+            # this should never happen because the initial positions
+            # are checked in _prepare_fit_inputs
+            idx = np.flatnonzero(nooverlap)[0]
+            msg = (f'Initial source at ({xcen[idx]}, {ycen[idx]}) does not '
+                   'overlap with the input data.')
+            raise ValueError(msg)
 
-        return yi, xi, cutout
+        if mask is not None:
+            valid[valid] = ~mask[yy[valid], xx[valid]]
+            masked = ~np.any(valid, axis=1)
+            if np.any(masked):
+                idx = np.flatnonzero(masked)[0]
+                msg = (f'Source at ({xcen[idx]}, {ycen[idx]}) is completely '
+                       'masked. Remove the source from init_params or '
+                       'correct the input mask.')
+                raise ValueError(msg)
+
+        yi = yy[valid]
+        xi = xx[valid]
+        npixfit = np.count_nonzero(valid, axis=1)
+
+        local_bkg = sources['local_bkg']
+        if isinstance(local_bkg, u.Quantity):
+            local_bkg = local_bkg.value
+        cutout = data[yi, xi] - np.repeat(np.asarray(local_bkg), npixfit)
+
+        # the overlap_slices center pixel (before any trimming) is at the
+        # center of the (odd) fit_shape template; its index in the fit
+        # data is the number of valid pixels before it
+        cen = (ny // 2) * nx + (nx // 2)
+        cen_rank = np.count_nonzero(valid[:, :cen], axis=1)
+        cen_index = [int(rank) if is_valid else np.nan
+                     for rank, is_valid in zip(cen_rank, valid[:, cen],
+                                               strict=True)]
+
+        return yi, xi, cutout, npixfit, cen_index
 
     @staticmethod
     def _split_compound_model(model, chunk_size):
@@ -998,8 +1083,10 @@ class PSFPhotometry(ModelImageMixin):
         fit_param_errs = []
         nfitparam = len(self._param_maps['fit_params'].keys())
         for model, fit_info in zip(group_models, group_fit_infos, strict=True):
-            model_nsub = model.n_submodels
-            npsf_models = model_nsub // psf_nsub
+            if isinstance(model, list):  # SparseGroupFitter
+                npsf_models = len(model)
+            else:
+                npsf_models = model.n_submodels // psf_nsub
 
             # NOTE: param_cov/param_err are returned in the same order
             # as the model parameters
@@ -1013,13 +1100,18 @@ class PSFPhotometry(ModelImageMixin):
 
             # model is for a single source (which may be compound)
             if npsf_models == 1:
-                fit_models.append(model)
+                fit_models.append(model[0] if isinstance(model, list)
+                                  else model)
                 fit_infos.append(fit_info)
                 fit_param_errs.append(param_err)
                 continue
 
             # model is a grouped model for multiple sources
-            fit_models.extend(self._split_compound_model(model, psf_nsub))
+            if isinstance(model, list):
+                fit_models.extend(model)
+            else:
+                fit_models.extend(self._split_compound_model(model,
+                                                             psf_nsub))
             fit_infos.extend([fit_info] * npsf_models)  # views
             fit_param_errs.extend(self._split_param_errs(param_err, nfitparam))
 
@@ -1038,6 +1130,10 @@ class PSFPhotometry(ModelImageMixin):
         return fit_models
 
     def _fit_sources(self, data, init_params, *, error=None, mask=None):
+        if isinstance(self.fitter, LinearFluxFitter):
+            return self._fit_sources_linear(data, init_params, error=error,
+                                            mask=mask)
+
         if self.fitter_maxiters is not None:
             kwargs = {'maxiter': self.fitter_maxiters}
         else:
@@ -1046,45 +1142,63 @@ class PSFPhotometry(ModelImageMixin):
         sources = init_params.group_by('group_id')
         ungroup_idx = np.argsort(sources['id'].value)
         self._group_results['ungroup_indices'] = ungroup_idx
+
+        # the fit data of all the sources, in group order
+        yi_all, xi_all, cutout_all, npixfit, cen_index = (
+            self._define_fit_data(sources, data, mask))
+        bounds = sources.groups.indices
+        pixel_bounds = np.concatenate(([0], np.cumsum(npixfit)))
+
         sources = sources.groups
-        if self.progress_bar:  # pragma: no cover
+        if self.progress_bar and self.executor is None:  # pragma: no cover
             desc = 'Fit source/group'
             sources = add_progress_bar(sources, desc=desc)
 
-        # Save the fit_info results for these keys if they are present.
-        # Some of these keys are returned only by some fitters. These
-        # keys contain the fit residuals (fvec or fun), the parameter
-        # covariance matrix (param_cov), and the fit status (ierr,
-        # message) or (status).
-        fit_info_keys = ('fvec', 'fun', 'param_cov', 'ierr', 'message',
-                         'status')
-
-        fit_models = []
-        fit_infos = []
         nmodels = []
-        for sources_ in sources:  # fit in group_id order
-            nsources = len(sources_)
-            nmodels.append([nsources] * nsources)
-            psf_model = self._make_psf_model(sources_)
-            yi, xi, cutout = self._define_fit_data(sources_, data, mask)
-
-            weights = 1.0 / error[yi, xi] if error is not None else None
-
-            with warnings.catch_warnings():
-                warnings.simplefilter('ignore', AstropyUserWarning)
-                fit_model = self.fitter(psf_model, xi, yi, cutout,
-                                        weights=weights, **kwargs)
-                with contextlib.suppress(AttributeError):
-                    fit_model.clear_cache()
-
-                fit_info = {}
-                for key in fit_info_keys:
-                    value = self.fitter.fit_info.get(key, None)
-                    if value is not None:
-                        fit_info[key] = value
-
-            fit_models.append(fit_model)
-            fit_infos.append(fit_info)
+        results = []
+        # the warning filters are process-global state, so they are set
+        # here once (in the calling thread) instead of in the (possibly
+        # threaded) fit tasks
+        with warnings.catch_warnings():
+            warnings.simplefilter('ignore', AstropyUserWarning)
+            for sources_, (start, stop) in zip(sources, pairwise(bounds),
+                                               strict=True):
+                # fit in group_id order
+                nsources = len(sources_)
+                nmodels.append([nsources] * nsources)
+                psf_model = self._make_psf_model(sources_)
+
+                self._group_results['npixfit'].append(
+                    list(npixfit[start:stop]))
+                self._group_results['psfcenter_indices'].append(
+                    cen_index[start:stop])
+                pixels = slice(pixel_bounds[start], pixel_bounds[stop])
+                yi = yi_all[pixels]
+                xi = xi_all[pixels]
+                cutout = cutout_all[pixels]
+                weights = 1.0 / error[yi, xi] if error is not None else None
+                fit_inputs = (psf_model, xi, yi, cutout)
+
+                if self.executor is None:
+                    results.append(_fit_group(self.fitter, *fit_inputs,
+                                              weights=weights, **kwargs))
+                else:
+                    # each task gets its own fitter instance because the
+                    # fitters store their results in their fit_info attribute
+                    results.append(self.executor.submit(
+                        _fit_group, deepcopy(self.fitter), *fit_inputs,
+                        weights=weights, **kwargs))
+
+            if self.executor is not None:
+                # the futures are collected in the order they were
+                # submitted (i.e., group_id order), not as they complete
+                if self.progress_bar:  # pragma: no cover
+                    desc = 'Fit source/group'
+                    results = add_progress_bar(results, desc=desc)
+                results = [future.result() for future in results]
+
+        fit_models = [result[0] for result in results]
+        fit_infos = [result[1] for result in results]
 
         self._group_results['fit_infos'] = fit_infos
         self._group_results['nmodels'] = nmodels
@@ -1098,15 +1212,154 @@ class PSFPhotometry(ModelImageMixin):
 
         return fit_params
 
-    def _calc_fit_metrics(self, results_tbl):
-        # Keep cen_idx as a list because it can have NaNs with the ints.
-        # If NaNs are present, turning it into an array will convert the
-        # ints to floats, which cannot be used as slices.
-        cen_idx = self._ungroup(self._group_results['psfcenter_indices'])
+    def _evaluate_unit_flux(self, x, y, params):
+        """
+        Evaluate the unit-flux PSF model at the input (x, y) pixels,
+        where each pixel has its own model parameters.
+        """
+        flux_name = self._param_maps['model']['flux']
+        args = [np.ones(len(x)) if name == flux_name else params[name]
+                for name in self.psf_model.param_names]
+        if hasattr(self.psf_model, 'evaluate_sources'):
+            return self.psf_model.evaluate_sources(x, y, *args)
+        return self.psf_model.evaluate(x, y, *args)
+
+    def _fit_sources_linear(self, data, init_params, *, error=None,
+                            mask=None):
+        """
+        Fit the fluxes of all the sources at once with the
+        `LinearFluxFitter`.
 
-        split_index = [np.cumsum(npixfit)[:-1]
-                       for npixfit in self._group_results['npixfit']]
+        The per-group results are stored in the same form as for the
+        nonlinear fitters, but no per-source or per-group models are
+        created.
+        """
+        sources = init_params.group_by('group_id')
+        ungroup_idx = np.argsort(sources['id'].value)
+        self._group_results['ungroup_indices'] = ungroup_idx
+        bounds = sources.groups.indices
+        group_sizes = np.diff(bounds)
+        ngroups = len(group_sizes)
+        nsources = len(sources)
+
+        # the fit data of all the sources, in group order
+        yi, xi, cutout, npixfit, cen_index = self._define_fit_data(
+            sources, data, mask)
+        for start, stop in pairwise(bounds):
+            self._group_results['npixfit'].append(list(npixfit[start:stop]))
+            self._group_results['psfcenter_indices'].append(
+                cen_index[start:stop])
+        cutout = cutout.astype(float)
+        if error is not None:
+            weights = 1.0 / error[yi, xi]
+        else:
+            weights = np.ones(len(cutout))
+
+        params = {}
+        for name in self.psf_model.param_names:
+            init_col = self._param_maps['init'].get(name)
+            if init_col is None:
+                value = np.full(nsources, getattr(self.psf_model, name).value)
+            else:
+                value = sources[init_col]
+                if isinstance(value, u.Quantity):
+                    value = value.value
+            params[name] = np.asarray(value, dtype=float)
+
+        # the design matrix is block diagonal; each pixel has an entry
+        # for every source in its group
+        source_groups = np.repeat(np.arange(ngroups), group_sizes)
+        pixel_sources = np.repeat(np.arange(nsources), npixfit)
+        pixel_groups = source_groups[pixel_sources]
+        nentries = group_sizes[pixel_groups]
+        entry_pixels = np.repeat(np.arange(len(cutout)), nentries)
+        entry_starts = np.repeat(np.cumsum(nentries) - nentries, nentries)
+        entry_sources = (np.repeat(bounds[:-1][pixel_groups], nentries)
+                         + np.arange(len(entry_pixels)) - entry_starts)
+        values = self._evaluate_unit_flux(
+            xi[entry_pixels], yi[entry_pixels],
+            {name: value[entry_sources] for name, value in params.items()})
+        design = csr_matrix((values, (entry_pixels, entry_sources)),
+                            shape=(len(cutout), nsources))
+
+        fluxes, fun, param_covs, status = self.fitter._solve(
+            design, cutout, weights, source_groups, pixel_groups,
+            scale_cov=error is None)
+        flux_name = self._param_maps['model']['flux']
+        params[flux_name] = fluxes
+
+        npix_groups = np.bincount(pixel_groups, minlength=ngroups)
+        group_funs = np.split(fun, np.cumsum(npix_groups)[:-1])
+        fit_infos = []
+        for group in range(ngroups):
+            fit_infos.append({'fun': group_funs[group],
+                              'param_cov': param_covs[group],
+                              'status': status[group],
+                              'message': self.fitter._messages[status[group]]})
+        self._group_results['fit_infos'] = fit_infos
+        self._group_results['nmodels'] = [[size] * size
+                                          for size in group_sizes]
+
+        # the parameter (flux) errors of each source
+        param_err = np.full(nsources, np.nan)
+        for group, param_cov in enumerate(param_covs):
+            if param_cov is not None:
+                param_err[bounds[group]:bounds[group + 1]] = np.sqrt(
+                    np.diag(param_cov))
+
+        fit_infos = [fit_infos[group] for group in source_groups]
+        self.fit_info['fit_infos'] = self._order_by_id(fit_infos)
+        self.fit_info['fit_error_indices'] = self._get_fit_error_indices()
+        self.fit_info['fit_param_errs'] = param_err[ungroup_idx, np.newaxis]
+
+        # the table of the fit model parameters in source-id order, as
+        # returned by _model_params_to_table
+        model_params = {}
+        for name in self.psf_model.param_names:
+            param = getattr(self.psf_model, name)
+            value = params[name][ungroup_idx]
+            if self.data_unit is not None and name == flux_name:
+                value <<= self.data_unit  # add the flux units
+            model_params[name] = value
+            model_params[f'{name}_fixed'] = [param.fixed] * nsources
+            model_params[f'{name}_bounds'] = self._linear_param_bounds(
+                name, param, value)
+        _fit_model_params = QTable(model_params)
+        _fit_model_params.add_column(np.arange(nsources) + 1, index=0,
+                                     name='id')
+
+        fit_params = self._prepare_fit_results(_fit_model_params)
+        self._fit_model_params = _fit_model_params
+        self.fit_params = fit_params
+
+        return fit_params
+
+    def _linear_param_bounds(self, name, param, values):
+        """
+        Return the bounds of a model parameter for each source, as
+        defined in `_make_source_models`.
+        """
+        if self.xy_bounds is not None:
+            for key, bound in zip(('x', 'y'), self.xy_bounds, strict=True):
+                if (bound is not None
+                        and name == self._param_maps['model'][key]):
+                    return [(value - bound, value + bound)
+                            for value in values]
+
+        return [param.bounds] * len(values)
+
+    def _get_fit_residuals(self):
+        """
+        Return the fit residuals for each source.
 
+        Returns
+        -------
+        fit_residuals : list of 1D `~numpy.ndarray` or `None`
+            The fit residuals (over the unmasked fitted pixels) for each
+            source, in source ID order. `None` is returned if the fitter
+            does not return the fit residuals (e.g., the Astropy
+            ``SimplexLSQFitter``).
+        """
         # find the key with the fit residual (fitter dependent)
         finfo_keys = self._group_results['fit_infos'][0].keys()
         keys = ('fvec', 'fun')
@@ -1117,15 +1370,28 @@ class PSFPhotometry(ModelImageMixin):
 
         # SimplexLSQFitter
         if key is None:
-            qfit = cfit = np.array([[np.nan]] * len(results_tbl))
-            return qfit, cfit
+            return None
+
+        split_index = [np.cumsum(npixfit)[:-1]
+                       for npixfit in self._group_results['npixfit']]
 
         fit_residuals = []
         for idx, fit_info in zip(split_index,
                                  self._group_results['fit_infos'],
                                  strict=True):
             fit_residuals.extend(np.split(fit_info[key], idx))
-        fit_residuals = self._order_by_id(fit_residuals)
+        return self._order_by_id(fit_residuals)
+
+    def _calc_fit_metrics(self, results_tbl):
+        # Keep cen_idx as a list because it can have NaNs with the ints.
+        # If NaNs are present, turning it into an array will convert the
+        # ints to floats, which cannot be used as slices.
+        cen_idx = self._ungroup(self._group_results['psfcenter_indices'])
+
+        fit_residuals = self._get_fit_residuals()
+        if fit_residuals is None:
+            qfit = cfit = np.array([[np.nan]] * len(results_tbl))
+            return qfit, cfit
 
         with warnings.catch_warnings():
             # ignore divide-by-zero if flux = 0
@@ -1241,7 +1507,8 @@ class PSFPhotometry(ModelImageMixin):
         self.init_params = init_params
 
         _, counts = np.unique(init_params['group_id'], return_counts=True)
-        if max(counts) > 25:
+        if (max(counts) > 25
+                and not isinstance(self.fitter, SparseGroupFitter)):
             warnings.warn('Some groups have more than 25 sources. Fitting '
                           'such groups may take a long time and be '
                           'error-prone. You may want to consider using '
@@ -1508,9 +1775,18 @@ class IterativePSFPhotometry(ModelImageMixin):
         *only for the first iteration*. A warning is raised if any group
         size is larger than 25 sources.
 
-    fitter : `~astropy.modeling.fitting.Fitter`, optional
+    fitter : `~astropy.modeling.fitting.Fitter`, \
+            `~photutils.psf.SparseGroupFitter`, or \
+            `~photutils.psf.LinearFluxFitter`, optional
         The fitter object used to perform the fit of the model to the
-        data.
+        data. For large source groups, the
+        `~photutils.psf.SparseGroupFitter` is much faster than the
+        Astropy fitters because it does not create a compound model for
+        each group and uses a sparse Jacobian matrix. For forced
+        photometry, where all the PSF model parameters except the
+        flux are fixed, the `~photutils.psf.LinearFluxFitter` solves
+        for the fluxes of all the sources at once with linear least
+        squares.
 
     fitter_maxiters : int, optional
         The maximum number of iterations in which the ``fitter`` is
@@ -1568,6 +1844,45 @@ class IterativePSFPhotometry(ModelImageMixin):
         Note that the progress bar does not currently work in the
         Jupyter console due to limitations in ``tqdm``.
 
+    executor : `concurrent.futures.Executor` or `None`, optional
+        The executor used to fit the sources (or groups) in parallel
+        in each iteration. If `None`, then the sources are fit
+        serially. See `PSFPhotometry` for more details.
+
+    compact_results : bool, optional
+        Whether to store only a compact summary of the results of each
+        iteration in the ``fit_results`` attribute. If `False`, then
+        ``fit_results`` contains a copy of the `PSFPhotometry` instance
+        used in each iteration, including the PSF model, the fitter,
+        and the fit residuals of each source group. If `True`, then
+        each element of ``fit_results`` holds only the ``results``,
+        ``fit_params``, ``init_params``, and ``finder_results`` tables
+        and the ``fit_info`` dictionary (without the ``fvec`` or
+        ``fun`` fit residual arrays) of each iteration. This option
+        reduces the memory use for large images and many iterations.
+
+    fit_residuals_dir : str, `~pathlib.Path`, or `None`, optional
+        The name of an existing directory in which to save the fit
+        residuals of each iteration when ``compact_results=True``. The
+        fit residuals of each source, in source ID order, are saved in a
+        ``fit_residuals_iter<N>.npz`` file, where ``<N>`` is the
+        iteration number. The file name is stored in the
+        ``fit_residuals_file`` attribute of each ``fit_results``
+        element. If `None`, then the fit residuals are discarded. This
+        keyword can be input only if ``compact_results=True``.
+
+    incremental : bool, optional
+        Whether to update the residual image and the fit results
+        incrementally in each iteration. If `True`, then the residual
+        image is updated in place by subtracting only the models of the
+        newly fit sources (and adding back the previous models of any
+        refit sources) instead of rendering the models of all the fit
+        sources. Also, for the 'all' mode, only the source groups that
+        contain newly-detected sources are refit; the fit results of
+        the other sources are kept from the previous iteration. In this
+        case, the ``fit_info`` dictionary of each iteration contains
+        only the refit sources. See the Notes section for more details.
+
     Notes
     -----
     The data that will be fit for each source is defined by the
@@ -1625,6 +1940,15 @@ class IterativePSFPhotometry(ModelImageMixin):
     the fit. Again, the process is repeated until no new sources are
     detected or a maximum number of iterations is reached.
 
+    If ``incremental=True``, then the cost of each iteration after the
+    first is proportional to the number of new (or refit) sources
+    instead of the total number of sources. For the 'all' mode,
+    the sources are grouped using the ``grouper`` and only the groups
+    that contain a newly-detected source are refit. Note that the
+    fit results of the other groups are then not refit with updated
+    initial positions, so the results can differ slightly from the
+    results with ``incremental=False``.
+
     Care should be taken in defining the star groups. Simultaneously
     fitting very large star groups is computationally expensive and
     error-prone. Internally, source grouping requires the creation of a
@@ -1632,14 +1956,18 @@ class IterativePSFPhotometry(ModelImageMixin):
     currently constructed, large groups also require excessively large
     amounts of memory; this will hopefully be fixed in a future Astropy
     version. A warning will be raised if the number of sources in a
-    group exceeds 25.
+    group exceeds 25. Compound models are not created when using the
+    `~photutils.psf.SparseGroupFitter`, which can efficiently fit
+    large groups.
     """
 
     def __init__(self, psf_model, fit_shape, finder, *, grouper=None,
                  fitter=TRFLSQFitter(), fitter_maxiters=100,
                  xy_bounds=None, maxiters=3, mode='new',
                  localbkg_estimator=None, aperture_radius=None,
-                 sub_shape=None, progress_bar=False):
+                 sub_shape=None, progress_bar=False, executor=None,
+                 compact_results=False, fit_residuals_dir=None,
+                 incremental=False):
 
         if finder is None:
             raise ValueError('finder cannot be None for '
@@ -1655,7 +1983,8 @@ class IterativePSFPhotometry(ModelImageMixin):
                                       xy_bounds=xy_bounds,
                                       localbkg_estimator=localbkg_estimator,
                                       aperture_radius=aperture_radius,
-                                      progress_bar=progress_bar)
+                                      progress_bar=progress_bar,
+                                      executor=executor)
 
         self.maxiters = self._validate_maxiters(maxiters)
 
@@ -1667,6 +1996,18 @@ class IterativePSFPhotometry(ModelImageMixin):
 
         self.sub_shape = sub_shape
 
+        self.compact_results = compact_results
+        if fit_residuals_dir is not None:
+            if not compact_results:
+                raise ValueError('fit_residuals_dir can be input only if '
+                                 'compact_results=True.')
+            fit_residuals_dir = Path(fit_residuals_dir)
+            if not fit_residuals_dir.is_dir():
+                raise ValueError('fit_residuals_dir must be an existing '
+                                 'directory.')
+        self.fit_residuals_dir = fit_residuals_dir
+        self.incremental = incremental
+
         self.fit_results = []
 
     def _reset_results(self):
@@ -1684,6 +2025,38 @@ class IterativePSFPhotometry(ModelImageMixin):
             raise ValueError('maxiters must be an integer')
         return maxiters
 
+    def _copy_psfphot(self):
+        """
+        Return a deep copy of the `PSFPhotometry` instance used in the
+        current iteration.
+
+        The executor (if any) is shared with the copy because executors
+        cannot be copied.
+        """
+        executor = self._psfphot.executor
+        return deepcopy(self._psfphot, {id(executor): executor})
+
+    def _save_fit_results(self, iter_num):
+        """
+        Append the results of the current iteration to the
+        ``fit_results`` list.
+
+        Parameters
+        ----------
+        iter_num : int
+            The current iteration number (starting from 1).
+        """
+        if not self.compact_results:
+            self.fit_results.append(self._copy_psfphot())
+            return
+
+        filename = None
+        if self.fit_residuals_dir is not None:
+            filename = (self.fit_residuals_dir
+                        / f'fit_residuals_iter{iter_num}.npz')
+        self.fit_results.append(_PSFPhotometrySummary(
+            self._psfphot, fit_residuals_file=filename))
+
     @staticmethod
     def _emit_warnings(recorded_warnings):
         """
@@ -1758,9 +2131,10 @@ class IterativePSFPhotometry(ModelImageMixin):
         Create the initial parameters table by combining the original
         and new sources.
         """
-        # rename the columns from the fit results
+        # rename the columns from the fit results; copy is used to
+        # preserve the fit results of the previous iteration
         init_params = self._psfphot._rename_init_columns(
-            orig_sources, self._psfphot._param_maps,
+            orig_sources.copy(), self._psfphot._param_maps,
             self._psfphot._find_column_name)
         for colname in init_params.colnames:
             if '_init' not in colname:
@@ -1777,7 +2151,138 @@ class IterativePSFPhotometry(ModelImageMixin):
 
         # combine original and new source tables
         new_sources.meta.pop('date', None)  # prevent merge conflicts
-        return vstack([orig_sources, new_sources])
+        return vstack([init_params, new_sources])
+
+    def _add_models(self, image, model_params, scale):
+        """
+        Add the scaled PSF models to an image in place.
+
+        Only the ``sub_shape`` region around each source is updated.
+
+        Parameters
+        ----------
+        image : 2D `~numpy.ndarray`
+            The image to update.
+
+        model_params : `~astropy.table.Table`
+            A table containing the fit model parameters of the sources.
+
+        scale : float
+            The scale factor applied to the models (e.g., -1 to subtract
+            the models).
+        """
+        psf_model = self._psfphot.psf_model
+        try:
+            x_name = psf_model.x_name
+            y_name = psf_model.y_name
+        except AttributeError:
+            x_name = 'x_0'
+            y_name = 'y_0'
+
+        _add_model_stamps(image, psf_model, model_params,
+                          model_shape=self.sub_shape, x_name=x_name,
+                          y_name=y_name, scale=scale)
+
+    def _refit_touched_groups(self, data, mask, error, init_params, is_new,
+                              prev_index, prev_psfphot, residual_data):
+        """
+        Refit only the source groups that contain new sources.
+
+        This is used for the 'all' mode when ``incremental=True``. The
+        fit results of the sources in the other groups are kept from
+        the previous iteration. The ``self._psfphot`` tables are updated
+        to include all the sources and ``residual_data`` is updated in
+        place.
+
+        Parameters
+        ----------
+        data : 2D `~numpy.ndarray`
+            The original, unsubtracted, data.
+
+        mask : 2D bool `~numpy.ndarray` or `None`
+            The data mask.
+
+        error : 2D `~numpy.ndarray` or `None`
+            The data errors.
+
+        init_params : `~astropy.table.Table`
+            The initial parameters of all the sources.
+
+        is_new : 1D bool `~numpy.ndarray`
+            A boolean array indicating the new sources in
+            ``init_params``.
+
+        prev_index : 1D int `~numpy.ndarray`
+            The row index of each old source in the tables of the
+            previous iteration (-1 for new sources).
+
+        prev_psfphot : dict
+            The ``results``, ``fit_params``, ``init_params``, and
+            ``_fit_model_params`` tables of the previous iteration.
+
+        residual_data : 2D `~numpy.ndarray`
+            The residual image, which is updated in place.
+
+        Returns
+        -------
+        table : `~astropy.table.QTable` or `None`
+            The PSF-fitting results of all the sources. `None` is
+            returned if there are no sources to refit.
+        """
+        psfphot = self._psfphot
+        xcolname = psfphot._param_maps['init_cols']['x']
+        ycolname = psfphot._param_maps['init_cols']['y']
+        group_id = psfphot.grouper(init_params[xcolname],
+                                   init_params[ycolname])
+        touched = np.isin(group_id, group_id[is_new])
+        if not np.any(touched):
+            return None
+
+        new_tbl = psfphot(data, mask=mask, error=error,
+                          init_params=init_params[touched])
+        if new_tbl is None:
+            return None
+
+        # add back the previous models of the refit sources and of any
+        # previous sources that were removed, then subtract the new
+        # models
+        nprev = len(prev_psfphot['_fit_model_params'])
+        kept = np.zeros(nprev, dtype=bool)
+        kept[prev_index[~touched]] = True
+        self._add_models(residual_data,
+                         prev_psfphot['_fit_model_params'][~kept], 1.0)
+        self._add_models(residual_data, psfphot._fit_model_params, -1.0)
+
+        # merge the new fit results with the previous fit results of the
+        # untouched sources, keeping the init_params order
+        nkeep = np.count_nonzero(~touched)
+        order = np.empty(len(touched), dtype=int)
+        order[~touched] = np.arange(nkeep)
+        order[touched] = nkeep + np.arange(len(touched) - nkeep)
+        prev_rows = prev_index[~touched]
+
+        # the group sizes of the kept rows are from the previous
+        # grouping, so they are recomputed from the new group IDs
+        _, group_idx, group_counts = np.unique(group_id, return_inverse=True,
+                                               return_counts=True)
+        group_size = group_counts[group_idx]
+        for attr in ('results', 'fit_params', 'init_params',
+                     '_fit_model_params'):
+            prev_tbl = prev_psfphot[attr][prev_rows]
+            if 'iter_detected' in prev_tbl.colnames:
+                prev_tbl.remove_column('iter_detected')
+            tbl = vstack([prev_tbl, getattr(psfphot, attr)],
+                         metadata_conflicts='silent')[order]
+            if 'id' in tbl.colnames:
+                tbl['id'] = np.arange(len(tbl)) + 1
+            if 'group_id' in tbl.colnames:
+                tbl['group_id'] = group_id
+            if 'group_size' in tbl.colnames:
+                tbl['group_size'] = group_size
+            tbl.meta = getattr(psfphot, attr).meta
+            setattr(psfphot, attr, tbl)
+
+        return psfphot.results
 
     def __call__(self, data, *, mask=None, error=None, init_params=None):
         """
@@ -1910,7 +2415,7 @@ class IterativePSFPhotometry(ModelImageMixin):
         with warnings.catch_warnings(record=True) as rwarn0:
             phot_tbl = self._psfphot(data, mask=mask, error=error,
                                      init_params=init_params)
-            self.fit_results.append(deepcopy(self._psfphot))
+            self._save_fit_results(1)
 
         # this needs to be run outside of the context manager to be able
         # to reemit any warnings
@@ -1919,6 +2424,11 @@ class IterativePSFPhotometry(ModelImageMixin):
             return None
 
         residual_data = data
+        if self.incremental:
+            residual_data = data.astype(float)
+            self._add_models(residual_data, self._psfphot._fit_model_params,
+                             -1.0)
+
         with warnings.catch_warnings(record=True) as rwarn1:
             phot_tbl['iter_detected'] = 1
             if self.mode == 'all':
@@ -1926,8 +2436,9 @@ class IterativePSFPhotometry(ModelImageMixin):
 
             iter_num = 2
             while iter_num <= self.maxiters and phot_tbl is not None:
-                residual_data = self._psfphot.make_residual_image(
-                    residual_data, psf_shape=self.sub_shape)
+                if not self.incremental:
+                    residual_data = self._psfphot.make_residual_image(
+                        residual_data, psf_shape=self.sub_shape)
 
                 # do not warn if no sources are found beyond the first
                 # iteration
@@ -1942,10 +2453,19 @@ class IterativePSFPhotometry(ModelImageMixin):
                 finder_results = new_sources.copy()
                 new_sources = self._convert_finder_to_init(new_sources)
                 if self.mode == 'all':
+                    nprev = len(self._psfphot.fit_params)
                     init_params = self._create_init_params(
                         residual_data, mask, new_sources,
                         self._psfphot.fit_params)
-                    residual_data = data
+                    if self.incremental:
+                        prev_index = np.arange(len(init_params))
+                        prev_index[nprev:] = -1
+                        prev_psfphot = {
+                            attr: getattr(self._psfphot, attr)
+                            for attr in ('results', 'fit_params',
+                                         'init_params', '_fit_model_params')}
+                    else:
+                        residual_data = data
 
                     # keep track of the iteration number in which the source
                     # was detected
@@ -1964,10 +2484,23 @@ class IterativePSFPhotometry(ModelImageMixin):
                 if self.mode == 'all':
                     iter_detected = iter_detected[~imask]
 
-                new_tbl = self._psfphot(residual_data, mask=mask, error=error,
-                                        init_params=init_params)
+                if self.mode == 'all' and self.incremental:
+                    prev_index = prev_index[~imask]
+                    new_tbl = self._refit_touched_groups(
+                        data, mask, error, init_params, prev_index < 0,
+                        prev_index, prev_psfphot, residual_data)
+                    if new_tbl is None:  # no new sources to fit
+                        break
+                else:
+                    new_tbl = self._psfphot(residual_data, mask=mask,
+                                            error=error,
+                                            init_params=init_params)
+                    if self.incremental and new_tbl is not None:
+                        self._add_models(residual_data,
+                                         self._psfphot._fit_model_params,
+                                         -1.0)
                 self._psfphot.finder_results = finder_results
-                self.fit_results.append(deepcopy(self._psfphot))
+                self._save_fit_results(iter_num)
 
                 if self.mode == 'all':
                     new_tbl['iter_detected'] = iter_detected
@@ -2005,6 +2538,169 @@ class IterativePSFPhotometry(ModelImageMixin):
             self, data, psf_shape=psf_shape, include_localbkg=include_localbkg)
 
 
+def _add_model_stamps(image, psf_model, model_params, *, model_shape=None,
+                      x_name='x_0', y_name='y_0', scale=1.0):
+    """
+    Add scaled PSF models to an image in place.
+
+    Unlike `~photutils.datasets.make_model_image`, a full-sized model
+    image is not created. Only the ``model_shape`` region around each
+    source is evaluated and added to the image.
+
+    Parameters
+    ----------
+    image : 2D `~numpy.ndarray`
+        The image to update in place.
+
+    psf_model : 2D `astropy.modeling.Model`
+        The PSF model.
+
+    model_params : `~astropy.table.Table`
+        A table containing the model parameters for each source.
+
+    model_shape : `None`, int, or length-2 array_like, optional
+        The shape around the center of each source to evaluate the
+        model. If `None`, then the bounding box of the model will be
+        used.
+
+    x_name, y_name : str, optional
+        The names of the model parameters that correspond to the x and
+        y positions of the sources.
+
+    scale : float, optional
+        The scale factor applied to the models.
+    """
+    if model_shape is not None:
+        model_shape = as_pair('model_shape', model_shape,
+                              lower_bound=(0, 1))
+
+    params_to_set = set(model_params.colnames) & set(psf_model.param_names)
+    model = psf_model.copy()
+    for source in model_params:
+        for param in params_to_set:
+            setattr(model, param, source[param])
+
+        if model_shape is None:
+            mod_shape = _model_shape_from_bbox(model)
+        else:
+            mod_shape = model_shape
+
+        x0 = getattr(model, x_name).value
+        y0 = getattr(model, y_name).value
+        try:
+            slc_lg, _ = overlap_slices(image.shape, mod_shape, (y0, x0),
+                                       mode='trim')
+        except NoOverlapError:
+            continue
+
+        yy, xx = np.mgrid[slc_lg]
+        image[slc_lg] += scale * model(xx, yy)
+
+
+class _PSFPhotometrySummary:
+    """
+    Class to hold a compact summary of the results of a `PSFPhotometry`
+    run.
+
+    Unlike a copy of the `PSFPhotometry` instance, this class does not
+    hold the PSF model, the fitter, or the fit residual arrays of each
+    source group.
+
+    Parameters
+    ----------
+    psfphot : `PSFPhotometry`
+        The `PSFPhotometry` instance after it has been called.
+
+    fit_residuals_file : str, `~pathlib.Path`, or `None`, optional
+        The name of the ``.npz`` file in which to save the fit
+        residuals of each source, in source ID order. If `None`, then
+        the fit residuals are discarded.
+    """
+
+    _residual_keys = ('fvec', 'fun')
+
+    def __init__(self, psfphot, *, fit_residuals_file=None):
+        self.data_unit = psfphot.data_unit
+        self.finder_results = psfphot.finder_results
+        self.init_params = psfphot.init_params
+        self.fit_params = psfphot.fit_params
+        self._fit_model_params = psfphot._fit_model_params
+        self.fit_info = self._compact_fit_info(psfphot.fit_info)
+
+        # IterativePSFPhotometry modifies the returned results table
+        # in place
+        self.results = None
+        if psfphot.results is not None:
+            self.results = psfphot.results.copy()
+
+        self.fit_residuals_file = None
+        if fit_residuals_file is not None and psfphot.results is not None:
+            fit_residuals = psfphot._get_fit_residuals()
+            if fit_residuals is not None:
+                np.savez(fit_residuals_file, *fit_residuals)
+                self.fit_residuals_file = fit_residuals_file
+
+    def _compact_fit_info(self, fit_info):
+        """
+        Return a copy of the ``fit_info`` dictionary without the fit
+        residual arrays.
+
+        Sources that were fit simultaneously in a group share the same
+        compact fit info dictionary.
+        """
+        compact_infos = {}
+        fit_infos = []
+        for finfo in fit_info.get('fit_infos', []):
+            key = id(finfo)
+            if key not in compact_infos:
+                compact_infos[key] = {name: value
+                                      for name, value in finfo.items()
+                                      if name not in self._residual_keys}
+            fit_infos.append(compact_infos[key])
+
+        fit_info = dict(fit_info)
+        fit_info['fit_infos'] = fit_infos
+        return fit_info
+
+
+def _fit_group(fitter, psf_model, xi, yi, cutout, *, weights=None, **kwargs):
+    """
+    Fit a PSF model to a single source or a group of sources.
+
+    This is a module-level function so that it can be submitted to any
+    `concurrent.futures.Executor`, including process pools.
+
+    Returns
+    -------
+    fit_model : `astropy.modeling.Model`
+        The fit PSF model.
+
+    fit_info : dict
+        A dictionary of the fitter results for this source or group.
+    """
+    # Save the fit_info results for these keys if they are present.
+    # Some of these keys are returned only by some fitters. These keys
+    # contain the fit residuals (fvec or fun), the parameter covariance
+    # matrix (param_cov), and the fit status (ierr, message) or
+    # (status).
+    fit_info_keys = ('fvec', 'fun', 'param_cov', 'ierr', 'message', 'status')
+
+    # AstropyUserWarning (e.g., from the fitter) is ignored by the
+    # caller; the warning filters are not set here because they are
+    # process-global state that is not safe to modify from threads
+    fit_model = fitter(psf_model, xi, yi, cutout, weights=weights, **kwargs)
+    with contextlib.suppress(AttributeError):
+        fit_model.clear_cache()
+
+    fit_info = {}
+    for key in fit_info_keys:
+        value = fitter.fit_info.get(key, None)
+        if value is not None:
+            fit_info[key] = value
+
+    return fit_model, fit_info
+
+
 def _flatten(iterable):
     """
     Flatten a list of lists.
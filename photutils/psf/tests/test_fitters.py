@@ -0,0 +1,237 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Tests for the fitters module.
+"""
+
+import numpy as np
+import pytest
+from astropy.modeling.fitting import TRFLSQFitter
+from astropy.modeling.models import Gaussian2D
+from numpy.testing import assert_allclose
+
+from photutils.psf import (CircularGaussianPRF, CircularGaussianPSF,
+                           ImagePSF, LinearFluxFitter, SparseGroupFitter)
+
+
+@pytest.fixture(name='group_data')
+def fixture_group_data():
+    shape = (41, 61)
+    params = [(500.0, 10.3, 12.7), (800.0, 14.6, 15.2), (300.0, 30.1, 20.4),
+              (650.0, 48.8, 30.5), (450.0, 52.2, 27.9)]
+    yy, xx = np.mgrid[0:shape[0], 0:shape[1]]
+    data = np.zeros(shape)
+    for flux, x_0, y_0 in params:
+        model = CircularGaussianPRF(flux=flux, x_0=x_0, y_0=y_0, fwhm=2.7)
+        data += model(xx, yy)
+    return xx.ravel(), yy.ravel(), data.ravel(), params
+
+
+def make_init_models(psf_model, params):
+    models = []
+    for flux, x_0, y_0 in params:
+        model = psf_model.copy()
+        model.flux = flux * 0.9
+        model.x_0 = x_0 + 0.3
+        model.y_0 = y_0 - 0.2
+        models.append(model)
+    return models
+
+
+@pytest.mark.parametrize('psf_model', [CircularGaussianPRF(fwhm=2.7),
+                                       CircularGaussianPSF(fwhm=2.7)])
+def test_sparse_group_fitter(group_data, psf_model):
+    """
+    Test the fit of a group of models with and without analytic
+    derivatives.
+    """
+    xx, yy, data, params = group_data
+    init_models = make_init_models(psf_model, params)
+
+    fitter = SparseGroupFitter()
+    fit_models = fitter(init_models, xx, yy, data)
+    assert len(fit_models) == len(params)
+    assert fitter.fit_info['status'] > 0
+    assert fitter.fit_info['fun'].shape == data.shape
+    assert fitter.fit_info['param_cov'].shape == (15, 15)
+
+    # the input models are unchanged
+    assert_allclose(init_models[0].flux.value, params[0][0] * 0.9)
+
+    # compare with the compound model fit
+    compound_model = init_models[0]
+    for model in init_models[1:]:
+        compound_model += model
+    compound_fit = TRFLSQFitter()(compound_model, xx, yy, data)
+    for i, model in enumerate(fit_models):
+        for name in ('flux', 'x_0', 'y_0'):
+            assert_allclose(getattr(model, name).value,
+                            getattr(compound_fit[i], name).value,
+                            rtol=1e-4)
+    if psf_model.fit_deriv is None:
+        for i, model in enumerate(fit_models):
+            assert_allclose(model.flux.value, params[i][0], rtol=1e-5)
+            assert_allclose(model.x_0.value, params[i][1], rtol=1e-5)
+            assert_allclose(model.y_0.value, params[i][2], rtol=1e-5)
+
+
+def test_sparse_group_fitter_uneven_cutouts():
+    """
+    Test a group of sources with different numbers of fit pixels (e.g.,
+    a source at the image edge) using the analytic derivatives.
+    """
+    yy, xx = np.mgrid[0:25, 0:31]
+    params = [(400.0, 1.2, 0.8), (700.0, 15.4, 12.3), (500.0, 19.1, 14.6)]
+    data = np.zeros(xx.shape)
+    for flux, x_0, y_0 in params:
+        data += CircularGaussianPRF(flux=flux, x_0=x_0, y_0=y_0,
+                                    fwhm=2.7)(xx, yy)
+
+    init_models = make_init_models(CircularGaussianPRF(fwhm=2.7), params)
+    fitter = SparseGroupFitter()
+    fit_models = fitter(init_models, xx, yy, data)
+    assert fitter.fit_info['njev'] is not None
+    for i, model in enumerate(fit_models):
+        assert_allclose((model.flux.value, model.x_0.value,
+                         model.y_0.value), params[i], rtol=1e-5)
+
+
+def test_sparse_group_fitter_single_model():
+    yy2, xx2 = np.mgrid[0:21, 0:21]
+    data = CircularGaussianPRF(flux=100, x_0=10.2, y_0=9.6,
+                               fwhm=2.7)(xx2, yy2)
+    model = CircularGaussianPRF(flux=90, x_0=10, y_0=10, fwhm=2.7)
+    fitter = SparseGroupFitter()
+    fit_model = fitter(model, xx2, yy2, data, weights=np.ones(data.shape))
+    assert isinstance(fit_model, CircularGaussianPRF)
+    assert_allclose((fit_model.flux.value, fit_model.x_0.value,
+                     fit_model.y_0.value), (100, 10.2, 9.6), rtol=1e-6)
+
+
+def test_sparse_group_fitter_fixed_bounds(group_data):
+    xx, yy, data, params = group_data
+    psf_model = CircularGaussianPRF(fwhm=2.7)
+    psf_model.fwhm.fixed = False
+    init_models = make_init_models(psf_model, params)
+
+    # x_0 and y_0 of the first model are not fit
+    init_models[0].x_0 = params[0][1]
+    init_models[0].y_0.fixed = True
+    init_models[0].y_0 = params[0][2]
+    init_models[0].x_0.bounds = (params[0][1], params[0][1])
+    init_models[1].x_0.bounds = (params[1][1] - 0.1, params[1][1] + 0.1)
+
+    fitter = SparseGroupFitter()
+    fit_models = fitter(init_models, xx, yy, data)
+
+    assert fit_models[0].x_0.value == params[0][1]
+    assert fit_models[0].y_0.value == params[0][2]
+    assert fit_models[0].y_0.fixed
+    assert (params[1][1] - 0.1) <= fit_models[1].x_0.value
+    assert fit_models[1].x_0.value <= (params[1][1] + 0.1)
+    for i, model in enumerate(fit_models):
+        assert_allclose(model.flux.value, params[i][0], rtol=1e-4)
+        assert_allclose(model.fwhm.value, 2.7, rtol=1e-4)
+
+    # 5 models x 4 params, minus the fixed y_0
+    param_cov = fitter.fit_info['param_cov']
+    assert param_cov.shape == (19, 19)
+    assert np.all(np.isnan(param_cov[1]))
+    assert np.all(np.isfinite(param_cov[2:, 2:]))
+
+    # all parameters fixed
+    model = psf_model.copy()
+    for name in model.param_names:
+        getattr(model, name).fixed = True
+    fit_model = fitter(model, xx, yy, data)
+    assert fitter.fit_info['param_cov'] is None
+    assert fit_model.flux.value == model.flux.value
+
+
+def test_sparse_group_fitter_image_psf(group_data):
+    yy, xx = np.mgrid[0:51, 0:51]
+    psf_data = Gaussian2D(1, 25, 25, 3, 3)(xx, yy)
+    psf_data /= psf_data.sum()
+    psf_model = ImagePSF(psf_data)
+
+    xx, yy, _, params = group_data
+    data = np.zeros(xx.shape)
+    for flux, x_0, y_0 in params:
+        data += psf_model.evaluate(xx, yy, flux, x_0, y_0)
+
+    fitter = SparseGroupFitter()
+    fit_models = fitter(make_init_models(psf_model, params), xx, yy, data)
+    for i, model in enumerate(fit_models):
+        assert_allclose(model.flux.value, params[i][0], rtol=1e-4)
+        assert_allclose(model.x_0.value, params[i][1], rtol=1e-4)
+        assert_allclose(model.y_0.value, params[i][2], rtol=1e-4)
+
+
+def test_sparse_group_fitter_invalid_inputs(group_data):
+    xx, yy, data, _ = group_data
+    fitter = SparseGroupFitter()
+
+    match = 'At least one model must be input'
+    with pytest.raises(ValueError, match=match):
+        fitter([], xx, yy, data)
+
+    match = 'model must be an Astropy Model or a list of Astropy Models'
+    with pytest.raises(TypeError, match=match):
+        fitter([1, 2], xx, yy, data)
+
+    model = CircularGaussianPRF() + CircularGaussianPRF()
+    match = 'SparseGroupFitter does not support compound models'
+    with pytest.raises(ValueError, match=match):
+        fitter(model, xx, yy, data)
+
+    model = CircularGaussianPRF()
+    model.y_0.tied = lambda model: model.x_0
+    match = 'SparseGroupFitter does not support tied parameters'
+    with pytest.raises(ValueError, match=match):
+        fitter(model, xx, yy, data)
+
+
+def test_linear_flux_fitter(group_data):
+    xx, yy, data, params = group_data
+    psf_model = CircularGaussianPRF(fwhm=2.7)
+    psf_model.x_0.fixed = True
+    psf_model.y_0.fixed = True
+    init_models = []
+    for _, x_0, y_0 in params:
+        model = psf_model.copy()
+        model.x_0 = x_0
+        model.y_0 = y_0
+        init_models.append(model)
+
+    fitter = LinearFluxFitter()
+    fit_models = fitter(init_models, xx, yy, data, weights=np.ones(len(xx)))
+    assert len(fit_models) == len(params)
+    for model, param in zip(fit_models, params, strict=True):
+        assert_allclose(model.flux.value, param[0])
+    assert fitter.fit_info['status'] == 1
+    assert fitter.fit_info['param_cov'].shape == (5, 5)
+    assert_allclose(fitter.fit_info['fun'], 0, atol=1e-10)
+
+    fit_model = fitter(init_models[0], xx, yy, data)
+    assert isinstance(fit_model, CircularGaussianPRF)
+
+    # source with a zero model on all the pixels
+    model = init_models[0].copy()
+    model.x_0 = 1000
+    fit_models = fitter([init_models[0], model], xx, yy, data)
+    assert fit_models[1].flux.value == 0
+    assert fitter.fit_info['status'] == 0
+    assert fitter.fit_info['param_cov'] is None
+
+    match = 'At least one model must be input'
+    with pytest.raises(ValueError, match=match):
+        fitter([], xx, yy, data)
+
+    match = 'LinearFluxFitter requires all the PSF model parameters'
+    with pytest.raises(ValueError, match=match):
+        fitter(CircularGaussianPRF(), xx, yy, data)
+
+    model = psf_model.copy()
+    model.flux.fixed = True
+    match = 'LinearFluxFitter requires the PSF model flux parameter'
+    with pytest.raises(ValueError, match=match):
+        fitter(model, xx, yy, data)
@@ -8,11 +8,12 @@ import numpy as np
 import pytest
 from astropy.modeling.fitting import TRFLSQFitter
 from astropy.stats import gaussian_fwhm_to_sigma
-from numpy.testing import assert_allclose
+from numpy.testing import assert_allclose, assert_equal
 
 from photutils.psf import (AiryDiskPSF, CircularGaussianPRF,
                            CircularGaussianPSF, CircularGaussianSigmaPRF,
-                           GaussianPRF, GaussianPSF, MoffatPSF)
+                           GaussianPRF, GaussianPSF, MoffatPSF,
+                           functional_models)
 
 
 def make_gaussian_models(name):
@@ -248,3 +249,64 @@ def test_airydisk_psf_model(use_units):
     model = AiryDiskPSF(x_0=0, y_0=0, radius=5)
     bbox = 42.18329801081182
     assert_allclose(model.bounding_box, ((-bbox, bbox), (-bbox, bbox)))
+
+
+@pytest.mark.parametrize(('model', 'params'), [
+    (CircularGaussianPRF, {'fwhm': 2.7}),
+    (GaussianPRF, {'x_fwhm': 2.7, 'y_fwhm': 3.9, 'theta': 31.0}),
+    (MoffatPSF, {'alpha': 2.1, 'beta': 3.2}),
+    (AiryDiskPSF, {'radius': 2.9}),
+])
+def test_model_kernels(model, params, monkeypatch):
+    """
+    Test the compiled model kernels against the numpy implementation
+    and the model derivatives against finite differences.
+    """
+    model = model(flux=71.4, x_0=12.3, y_0=11.8, **params)
+    yy, xx = np.mgrid[0:25, 0:25]
+    param_values = [np.atleast_1d(value) for value in model.parameters]
+
+    values = model.evaluate(xx, yy, *param_values)
+    derivs = model.fit_deriv(xx, yy, *param_values)
+    assert values.shape == xx.shape
+    assert len(derivs) == len(model.param_names)
+
+    # scalar inputs
+    scalar_derivs = model.fit_deriv(10.5, 13.0, *model.parameters)
+    assert all(np.shape(deriv) == () for deriv in scalar_derivs)
+
+    # inputs with units give the same results as unitless inputs
+    param_units = model._parameter_units_for_data_units(
+        {'x': u.pix, 'y': u.pix}, {'z': u.Jy})
+    quantities = [value << param_units.get(name, u.dimensionless_unscaled)
+                  for name, value in zip(model.param_names, param_values,
+                                         strict=True)]
+    values_unit = model.evaluate(xx << u.pix, yy << u.pix, *quantities)
+    assert values_unit.unit == u.Jy
+    assert_equal(values_unit.value, values)
+    derivs_unit = model.fit_deriv(xx << u.pix, yy << u.pix, *quantities)
+    for deriv, deriv_unit in zip(derivs, derivs_unit, strict=True):
+        assert_equal(u.Quantity(deriv_unit).value, deriv)
+
+    monkeypatch.setattr(functional_models, '_functional_kernels', None)
+    assert_allclose(model.evaluate(xx, yy, *param_values), values,
+                    rtol=1e-12, atol=1e-15)
+    derivs_numpy = model.fit_deriv(xx, yy, *param_values)
+    for deriv, deriv_numpy in zip(derivs, derivs_numpy, strict=True):
+        assert_allclose(deriv_numpy, deriv, rtol=1e-10, atol=1e-14)
+    derivs_numpy = model.fit_deriv(10.5, 13.0, *model.parameters)
+    for deriv, deriv_numpy in zip(scalar_derivs, derivs_numpy, strict=True):
+        assert np.shape(deriv_numpy) == ()
+        assert_allclose(deriv_numpy, deriv, rtol=1e-10, atol=1e-14)
+    assert_allclose(model.evaluate(xx << u.pix, yy << u.pix, *quantities),
+                    values_unit, rtol=1e-12, atol=1e-15 * u.Jy)
+
+    eps = 1.0e-6
+    for i, deriv in enumerate(derivs):
+        params_hi = [value.copy() for value in param_values]
+        params_lo = [value.copy() for value in param_values]
+        params_hi[i] += eps
+        params_lo[i] -= eps
+        deriv_fd = (model.evaluate(xx, yy, *params_hi)
+                    - model.evaluate(xx, yy, *params_lo)) / (2.0 * eps)
+        assert_allclose(deriv, deriv_fd, rtol=1e-5, atol=1e-7)
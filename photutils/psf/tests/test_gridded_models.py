@@ -9,7 +9,7 @@ from itertools import product
 import numpy as np
 import pytest
 from astropy.modeling.models import Gaussian2D
-from astropy.nddata import NDData
+from astropy.nddata import NDData, NoOverlapError, overlap_slices
 from astropy.table import QTable
 from numpy.testing import assert_allclose, assert_equal
 
@@ -168,6 +168,135 @@ class TestGriddedPSFModel:
         assert 88.3 < orients[0] < 88.4
         assert 64.0 < orients[3] < 64.2
 
+    def test_evaluate_sources(self, psfmodel):
+        rng = np.random.default_rng(0)
+        nsources = 30
+        x_0 = rng.uniform(-20, 220, nsources)
+        y_0 = rng.uniform(-20, 220, nsources)
+        flux = rng.uniform(10, 100, nsources)
+        x_0[0:2] = (40, 160)  # sources on grid points
+        y_0[0:2] = (60, 140)
+
+        yy, xx = np.mgrid[-12:13, -12:13]
+        xx = np.round(x_0)[:, None, None] + xx
+        yy = np.round(y_0)[:, None, None] + yy
+        values = psfmodel.evaluate_sources(xx, yy, flux, x_0, y_0)
+        assert values.shape == (nsources, 25, 25)
+        for i in range(nsources):
+            expected = psfmodel.evaluate(xx[i], yy[i], flux[i], x_0[i],
+                                         y_0[i])
+            assert_allclose(values[i], expected, atol=1e-13)
+
+        # scalar parameters and 1D positions
+        values = psfmodel.evaluate_sources(xx[:, 0, 0], yy[:, 0, 0], 10.0,
+                                           40.0, 60.0)
+        expected = psfmodel.evaluate(xx[:, 0, 0], yy[:, 0, 0], 10.0, 40.0,
+                                     60.0)
+        assert_allclose(values, expected)
+
+        match = 'x and y must be arrays with the same shape'
+        with pytest.raises(ValueError, match=match):
+            psfmodel.evaluate_sources(xx, yy[:, 0], flux, x_0, y_0)
+
+    def test_make_model_image_batched(self, psfmodel):
+        """
+        Test that make_model_image with a GriddedPSFModel (evaluated in
+        batches) matches the image made from the individual models.
+        """
+        shape = (200, 200)
+        params = QTable()
+        params['x_0'] = [40, 50.3, 160.5, 160, -5.2, 198.7]
+        params['y_0'] = [60, 150.1, 50.8, 140, 10.4, 201.2]
+        params['flux'] = [100, 200, 300, 400, 500, 600]
+        params['local_bkg'] = [0.0, 1, 2, 3, 4, 5]
+        data = make_model_image(shape, psfmodel, params, model_shape=(11, 9))
+
+        expected = np.zeros(shape)
+        for row in params:
+            try:
+                slc_lg, _ = overlap_slices(shape, (11, 9),
+                                           (row['y_0'], row['x_0']),
+                                           mode='trim')
+            except NoOverlapError:
+                continue
+            yy, xx = np.mgrid[slc_lg]
+            expected[slc_lg] += psfmodel.evaluate(xx, yy, row['flux'],
+                                                  row['x_0'], row['y_0'])
+            expected[slc_lg] += row['local_bkg']
+        assert_allclose(data, expected)
+
+    @pytest.mark.parametrize('cache_size', [0, 10])
+    def test_fit_deriv(self, psfmodel, cache_size):
+        nddata = NDData(psfmodel.data, meta=psfmodel.meta.copy())
+        nddata.meta['grid_xypos'] = psfmodel.grid_xypos
+        model = GriddedPSFModel(nddata, cache_size=cache_size)
+
+        # inside and outside the grid; the positions are chosen so that
+        # no pixel falls exactly on the edge of the ePSF grid, where the
+        # derivatives are discontinuous
+        for x_0, y_0 in ((50.3, 100.6), (160.3, 139.2), (-10.4, 220.7)):
+            yy, xx = np.mgrid[-20:21, -20:21]
+            xx = xx + int(x_0)
+            yy = yy + int(y_0)
+            params = np.array([10.0, x_0, y_0])
+            derivs = model.fit_deriv(xx, yy, *params)
+            assert len(derivs) == 3
+
+            eps = 1.0e-6
+            for i, deriv in enumerate(derivs):
+                dparams = np.zeros(3)
+                dparams[i] = eps
+                expected = (model.evaluate(xx, yy, *(params + dparams))
+                            - model.evaluate(xx, yy, *(params - dparams)))
+                expected /= 2 * eps
+                assert_allclose(deriv, expected, atol=1e-6)
+
+    def test_epsf_cache(self, psfmodel):
+        nddata = NDData(psfmodel.data, meta=psfmodel.meta.copy())
+        nddata.meta['grid_xypos'] = psfmodel.grid_xypos
+        cmodel = GriddedPSFModel(nddata, cache_size=2, cache_subpixels=8)
+        assert cmodel.cache_info() == (0, 0, 2, 0)
+
+        yy, xx = np.mgrid[40:81, 20:61]
+        for x_0, y_0 in ((40.0, 60.0), (40.5, 60.25), (123.375, 87.125)):
+            result = cmodel.evaluate(xx, yy, 10.0, x_0, y_0)
+            expected = psfmodel.evaluate(xx, yy, 10.0, x_0, y_0)
+            assert_allclose(result, expected, atol=1e-12)
+
+        info = cmodel.cache_info()
+        assert info.hits == 0
+        assert info.misses == 3
+        assert info.currsize == 2
+
+        # evaluations at the same quantized position use the cache,
+        # including from model copies
+        model2 = cmodel.copy()
+        model2.evaluate(xx, yy, 10.0, 123.4, 87.1)
+        cmodel.evaluate(xx, yy, 10.0, 40.5, 60.25)
+        assert cmodel.cache_info() == (2, 3, 2, 2)
+
+        # least-recently-used item was discarded
+        cmodel.evaluate(xx, yy, 10.0, 40.0, 60.0)
+        assert cmodel.cache_info() == (2, 4, 2, 2)
+
+        cmodel.cache_clear()
+        assert cmodel.cache_info() == (0, 0, 2, 0)
+
+        # the cache is disabled by default
+        psfmodel.evaluate(xx, yy, 10.0, 40.0, 60.0)
+        assert psfmodel.cache_info() == (0, 0, 0, 0)
+
+        match = 'cache_size must be a non-negative integer'
+        with pytest.raises(ValueError, match=match):
+            GriddedPSFModel(nddata, cache_size=-1)
+        with pytest.raises(ValueError, match=match):
+            GriddedPSFModel(nddata, cache_size=2.5)
+        match = 'cache_subpixels must be a strictly-positive integer'
+        with pytest.raises(ValueError, match=match):
+            GriddedPSFModel(nddata, cache_size=1, cache_subpixels=0)
+        with pytest.raises(ValueError, match=match):
+            GriddedPSFModel(nddata, cache_size=1, cache_subpixels=1.5)
+
     @pytest.mark.parametrize('deepcopy', [False, True])
     def test_copy(self, psfmodel, deepcopy):
         flux = psfmodel.flux.value
@@ -3,9 +3,12 @@
 Tests for the grouper module.
 """
 
+from collections import defaultdict
+
 import numpy as np
 import pytest
 from numpy.testing import assert_equal
+from scipy.cluster.hierarchy import fclusterdata
 
 from photutils.psf.groupers import SourceGrouper
 
@@ -42,6 +45,11 @@ def test_grouper_inputs():
     with pytest.raises(ValueError, match=match):
         grouper(xx, yy)
 
+    match = 'max_group_size must be a strictly-positive integer'
+    for max_group_size in (0, -1, 2.5, np.nan, (1, 2)):
+        with pytest.raises(ValueError, match=match):
+            SourceGrouper(min_separation=10, max_group_size=max_group_size)
+
 
 def test_isolated_sources():
     """
@@ -274,3 +282,56 @@ def test_grouper_six():
     grouper = SourceGrouper(min_separation=0.6)
     groups = grouper(xx, yy)
     assert_equal(groups, gg)
+
+
+@pytest.mark.parametrize('min_separation', [1.0, 5.0, 20.0])
+def test_grouper_fclusterdata(min_separation):
+    """
+    Test that the groups match those from hierarchical clustering.
+    """
+    rng = np.random.default_rng(0)
+    xx = rng.uniform(0, 200, 1000)
+    yy = rng.uniform(0, 200, 1000)
+    group_id = fclusterdata(np.transpose((xx, yy)), t=min_separation,
+                            criterion='distance')
+    mapping = defaultdict(lambda: len(mapping) + 1)
+    gg = np.array([mapping[group] for group in group_id])
+
+    grouper = SourceGrouper(min_separation=min_separation)
+    groups = grouper(xx, yy)
+    assert_equal(groups, gg)
+
+
+def test_grouper_max_group_size():
+    rng = np.random.default_rng(0)
+    xx = rng.uniform(0, 100, 500)
+    yy = rng.uniform(0, 100, 500)
+    grouper = SourceGrouper(min_separation=10)
+    groups = grouper(xx, yy)
+    assert groups.max() == 1
+
+    grouper = SourceGrouper(min_separation=10, max_group_size=25)
+    groups = grouper(xx, yy)
+    counts = np.bincount(groups)[1:]
+    assert counts.max() <= 25
+    assert counts.min() >= 1
+    assert counts.sum() == len(xx)
+    # group ids start from 1 and increase in order of first appearance
+    _, idx = np.unique(groups, return_index=True)
+    assert_equal(groups[np.sort(idx)], np.arange(groups.max()) + 1)
+    # the split is deterministic
+    assert_equal(grouper(xx, yy), groups)
+
+    # groups smaller than max_group_size are not split
+    x1 = np.linspace(0, 1, 5)
+    y1 = np.zeros(5)
+    xx = np.hstack([x1, x1 + 2, x1 + 4])
+    yy = np.hstack([y1, y1, y1])
+    grouper = SourceGrouper(min_separation=0.3, max_group_size=5)
+    groups = grouper(xx, yy)
+    assert_equal(groups, np.repeat([1, 2, 3], 5))
+
+    grouper = SourceGrouper(min_separation=0.3, max_group_size=2)
+    groups = grouper(xx, yy)
+    assert np.bincount(groups)[1:].max() <= 2
+    assert groups.max() == 9
@@ -76,6 +76,24 @@ class TestImagePSF:
         for x, y in [(0.5, 0.5), (-0.5, 1.75)]:
             assert not np.allclose(model(x, y), gaussian_psf(x, y), rtol=0.001)
 
+    def test_fit_deriv(self, image_psf):
+        yy, xx = np.mgrid[-15:16, -15:16]
+        params = np.array([10.0, 0.3, -0.6])
+        derivs = image_psf.fit_deriv(xx, yy, *params)
+        assert len(derivs) == 3
+
+        eps = 1.0e-6
+        for i, deriv in enumerate(derivs):
+            dparams = np.zeros(3)
+            dparams[i] = eps
+            expected = (image_psf.evaluate(xx, yy, *(params + dparams))
+                        - image_psf.evaluate(xx, yy, *(params - dparams)))
+            expected /= 2 * eps
+            assert_allclose(deriv, expected, atol=1e-6)
+
+        # outside the PSF image
+        assert_equal(image_psf.fit_deriv(30, 30, *params), [0, 0, 0])
+
     def test_origin(self):
         yy, xx = np.mgrid[:5, :5]
         gaussian_psf = CircularGaussianPSF(x_0=2, y_0=2, fwhm=2.1)
@@ -241,6 +259,25 @@ class TestFittableImageModel:
             assert_allclose(model_norm(0, 0), model_norm2(0, 0) * 2)
             assert_allclose(np.sum(model_norm2(xx, yy)), 0.5)
 
+    def test_fit_deriv(self, gmodel_old):
+        yy, xx = np.mgrid[-10:11, -10:11]
+        with pytest.warns(AstropyDeprecationWarning):
+            model = FittableImageModel(gmodel_old(xx, yy), normalize=True,
+                                       oversampling=2)
+
+        params = np.array([10.0, 0.3, -0.6])
+        derivs = model.fit_deriv(xx, yy, *params)
+        assert len(derivs) == 3
+
+        eps = 1.0e-6
+        for i, deriv in enumerate(derivs):
+            dparams = np.zeros(3)
+            dparams[i] = eps
+            expected = (model.evaluate(xx, yy, *(params + dparams))
+                        - model.evaluate(xx, yy, *(params - dparams)))
+            expected /= 2 * eps
+            assert_allclose(deriv, expected, atol=1e-6)
+
     def test_fittable_image_model_oversampling(self, gmodel_old):
         oversamp = 3  # oversampling factor
         yy, xx = np.mgrid[-3:3.00001:(1 / oversamp), -3:3.00001:(1 / oversamp)]
@@ -3,6 +3,9 @@
 Tests for the photometry module.
 """
 
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
 import astropy.units as u
 import numpy as np
 import pytest
@@ -18,8 +21,10 @@ from photutils.background import LocalBackground, MMMBackground
 from photutils.datasets import make_model_image, make_noise_image
 from photutils.detection import DAOStarFinder
 from photutils.psf import (CircularGaussianPRF, IterativePSFPhotometry,
-                           PSFPhotometry, SourceGrouper, make_psf_model,
+                           LinearFluxFitter, PSFPhotometry, SourceGrouper,
+                           SparseGroupFitter, make_psf_model,
                            make_psf_model_image)
+from photutils.utils.cutouts import _overlap_slices as overlap_slices
 from photutils.utils.exceptions import NoDetectionsWarning
 
 
@@ -96,6 +101,10 @@ def test_invalid_inputs():
     with pytest.raises(ValueError, match=match):
         _ = PSFPhotometry(model, (5, 5), grouper=1)
 
+    match = 'executor must be a concurrent.futures.Executor instance'
+    with pytest.raises(TypeError, match=match):
+        _ = PSFPhotometry(model, (5, 5), executor=4)
+
     match = 'data must be a 2D array'
     psfphot = PSFPhotometry(model, (3, 3))
     with pytest.raises(ValueError, match=match):
@@ -535,6 +544,56 @@ def test_psf_photometry_mask(test_data):
     psfphot(data, mask=mask, init_params=init_params)
 
 
+def test_define_fit_data():
+    """
+    Test the batched fit data against per-source overlap_slices
+    cutouts.
+    """
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    fit_shape = (5, 3)
+    psfphot = PSFPhotometry(psf_model, fit_shape)
+
+    rng = np.random.default_rng(0)
+    data = rng.normal(size=(21, 31))
+    mask = np.zeros(data.shape, dtype=bool)
+    mask[10, 10:13] = True
+    mask[0, :] = True
+
+    sources = QTable()
+    sources['x_init'] = [10.3, 0.4, 30.6, 11.5, 15.0, -1.2]
+    sources['y_init'] = [10.2, 0.7, 20.4, 9.6, 1.5, 12.0]
+    sources['local_bkg'] = [0.0, 1.0, 2.0, 0.5, 0.0, 0.0]
+
+    yi, xi, cutout, npixfit, cen_index = psfphot._define_fit_data(
+        sources, data, mask)
+    assert_equal(np.sum(npixfit), len(xi))
+
+    start = 0
+    for i, row in enumerate(sources):
+        xcen = row['x_init']
+        ycen = row['y_init']
+        slc_lg, _ = overlap_slices(data.shape, fit_shape, (ycen, xcen),
+                                   mode='trim')
+        yy, xx = np.mgrid[slc_lg]
+        inv_mask = ~mask[yy, xx]
+        yy = yy[inv_mask]
+        xx = xx[inv_mask]
+
+        stop = start + npixfit[i]
+        assert_equal(yi[start:stop], yy)
+        assert_equal(xi[start:stop], xx)
+        assert_allclose(cutout[start:stop],
+                        data[yy, xx] - row['local_bkg'])
+
+        idx = np.where((xx == np.ceil(xcen - 0.5))
+                       & (yy == np.ceil(ycen - 0.5)))[0]
+        if len(idx) == 0:
+            assert np.isnan(cen_index[i])
+        else:
+            assert cen_index[i] == idx[0]
+        start = stop
+
+
 def test_psf_photometry_init_params(test_data):
     data, error, _ = test_data
     data = data.copy()
@@ -721,6 +780,124 @@ def test_grouper(test_data):
     assert_equal(phot['group_size'], (1, 1, 1, 1, 3, 3, 3, 2, 2, 1))
 
 
+@pytest.mark.parametrize('executor_cls',
+                         [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_executor(test_data, executor_cls):
+    data, error, sources = test_data
+
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    fit_shape = (5, 5)
+    grouper = SourceGrouper(min_separation=20)
+    init_params = sources[('x_0', 'y_0')]
+    psfphot = PSFPhotometry(psf_model, fit_shape, grouper=grouper,
+                            aperture_radius=4)
+    phot = psfphot(data, error=error, init_params=init_params)
+
+    kwargs = {'max_workers': 2}
+    if executor_cls is ProcessPoolExecutor:
+        kwargs['mp_context'] = get_context('spawn')
+    with executor_cls(**kwargs) as executor:
+        psfphot2 = PSFPhotometry(psf_model, fit_shape, grouper=grouper,
+                                 aperture_radius=4, executor=executor)
+        phot2 = psfphot2(data, error=error, init_params=init_params)
+
+    assert_equal(phot2['id'], phot['id'])
+    assert_equal(phot2['group_id'], phot['group_id'])
+    assert_equal(phot2['flags'], phot['flags'])
+    for col in ('x_fit', 'y_fit', 'flux_fit', 'flux_err', 'qfit', 'cfit'):
+        assert_allclose(phot2[col], phot[col])
+    assert (len(psfphot2.fit_info['fit_infos'])
+            == len(psfphot.fit_info['fit_infos']))
+    for finfo, finfo2 in zip(psfphot.fit_info['fit_infos'],
+                             psfphot2.fit_info['fit_infos'], strict=True):
+        assert finfo.keys() == finfo2.keys()
+        assert_allclose(finfo['param_cov'], finfo2['param_cov'])
+
+
+def test_sparse_group_fitter(test_data):
+    data, error, sources = test_data
+
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    fit_shape = (5, 5)
+    grouper = SourceGrouper(min_separation=20)
+    init_params = sources[('x_0', 'y_0')]
+    psfphot = PSFPhotometry(psf_model, fit_shape, grouper=grouper,
+                            aperture_radius=4)
+    phot = psfphot(data, error=error, init_params=init_params)
+
+    psfphot2 = PSFPhotometry(psf_model, fit_shape, grouper=grouper,
+                             aperture_radius=4, fitter=SparseGroupFitter())
+    phot2 = psfphot2(data, error=error, init_params=init_params)
+
+    assert phot2.colnames == phot.colnames
+    assert_equal(phot2['group_id'], phot['group_id'])
+    assert_equal(phot2['group_size'], phot['group_size'])
+    assert_equal(phot2['flags'], phot['flags'])
+
+    # the fits (with analytic derivatives for SparseGroupFitter and
+    # numerical derivatives for the compound models) stop at slightly
+    # different points within the fitter tolerance
+    for col in ('x_fit', 'y_fit'):
+        assert_allclose(phot2[col], phot[col], rtol=1e-4)
+    for col in ('flux_fit', 'x_err', 'y_err', 'flux_err'):
+        assert_allclose(phot2[col], phot[col], rtol=1e-3)
+    for col in ('qfit', 'cfit'):
+        assert_allclose(phot2[col], phot[col], atol=1e-4)
+
+    resid = psfphot.make_residual_image(data, psf_shape=fit_shape)
+    resid2 = psfphot2.make_residual_image(data, psf_shape=fit_shape)
+    assert_allclose(resid2, resid, atol=0.05)
+
+
+@pytest.mark.parametrize('use_error', [False, True])
+def test_linear_flux_fitter(test_data, use_error):
+    data, error, sources = test_data
+    if not use_error:
+        error = None
+
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    psf_model.x_0.fixed = True
+    psf_model.y_0.fixed = True
+    fit_shape = (5, 5)
+    grouper = SourceGrouper(min_separation=20)
+    init_params = sources[('x_0', 'y_0')]
+    init_params['x_0'] += 0.1
+    psfphot = PSFPhotometry(psf_model, fit_shape, grouper=grouper,
+                            aperture_radius=4)
+    phot = psfphot(data, error=error, init_params=init_params)
+
+    psfphot2 = PSFPhotometry(psf_model, fit_shape, grouper=grouper,
+                             aperture_radius=4, fitter=LinearFluxFitter())
+    phot2 = psfphot2(data, error=error, init_params=init_params)
+
+    assert phot2.colnames == phot.colnames
+    for col in ('id', 'group_id', 'group_size', 'x_fit', 'y_fit', 'npixfit',
+                'flags'):
+        assert_equal(phot2[col], phot[col])
+    for col in ('flux_fit', 'flux_err', 'qfit', 'cfit'):
+        assert_allclose(phot2[col], phot[col], rtol=1e-5)
+    assert np.all(np.isnan(phot2['x_err']))
+    assert (len(psfphot2.fit_info['fit_infos'])
+            == len(psfphot.fit_info['fit_infos']))
+
+    resid = psfphot.make_residual_image(data, psf_shape=fit_shape)
+    resid2 = psfphot2.make_residual_image(data, psf_shape=fit_shape)
+    assert_allclose(resid2, resid, atol=1e-6)
+
+    # units
+    unit = u.Jy
+    photu = psfphot2(data << unit, init_params=init_params)
+    assert photu['flux_fit'].unit == unit
+    assert_allclose(photu['flux_fit'].value,
+                    psfphot2(data, init_params=init_params)['flux_fit'])
+
+    # the model x and y parameters must be fixed
+    match = 'LinearFluxFitter requires all the PSF model parameters'
+    with pytest.raises(ValueError, match=match):
+        PSFPhotometry(CircularGaussianPRF(fwhm=2.7), fit_shape,
+                      fitter=LinearFluxFitter())
+
+
 def test_large_group_warning():
     psf_model = CircularGaussianPRF(flux=1, fwhm=2)
     grouper = SourceGrouper(min_separation=50)
@@ -991,6 +1168,19 @@ def test_iterative_psf_photometry_mode_all():
     resid = psfphot.make_residual_image(data, psf_shape=sub_shape)
     assert_allclose(resid, 0, atol=1e-6)
 
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        psfphot2 = IterativePSFPhotometry(psf_model, fit_shape,
+                                          finder=finder, grouper=grouper,
+                                          aperture_radius=4,
+                                          sub_shape=sub_shape, mode='all',
+                                          maxiters=3, executor=executor)
+        phot2 = psfphot2(data)
+    assert len(psfphot2.fit_results) == len(psfphot.fit_results)
+    for fit_result in psfphot2.fit_results:
+        assert fit_result.executor is executor
+    assert_equal(phot2['group_id'], phot['group_id'])
+    assert_allclose(phot2['flux_fit'], phot['flux_fit'])
+
     match = 'mode must be "new" or "all".'
     with pytest.raises(ValueError, match=match):
         psfphot = IterativePSFPhotometry(psf_model, fit_shape, finder=finder,
@@ -1031,6 +1221,133 @@ def test_iterative_psf_photometry_mode_all():
     assert resid_nddata.unit == unit
 
 
+@pytest.mark.parametrize('mode', ['new', 'all'])
+def test_iterative_psf_photometry_compact_results(mode, tmp_path):
+    sources = QTable()
+    sources['x_0'] = [50, 45, 55, 27, 22, 77, 82]
+    sources['y_0'] = [50, 52, 48, 27, 30, 77, 79]
+    sources['flux'] = [1000, 100, 50, 1000, 100, 1000, 100]
+
+    shape = (101, 101)
+    psf_model = CircularGaussianPRF(flux=500, fwhm=9.4)
+    psf_shape = (41, 41)
+    data = make_model_image(shape, psf_model, sources, model_shape=psf_shape)
+
+    fit_shape = (5, 5)
+    finder = DAOStarFinder(0.2, 6.0)
+    grouper = SourceGrouper(10)
+    kwargs = {'finder': finder, 'grouper': grouper, 'aperture_radius': 4,
+              'sub_shape': psf_shape, 'mode': mode, 'maxiters': 3}
+    psfphot = IterativePSFPhotometry(psf_model, fit_shape, **kwargs)
+    phot = psfphot(data)
+
+    psfphot2 = IterativePSFPhotometry(psf_model, fit_shape,
+                                      compact_results=True,
+                                      fit_residuals_dir=tmp_path, **kwargs)
+    phot2 = psfphot2(data)
+    assert_equal(phot2['id'], phot['id'])
+    assert_allclose(phot2['flux_fit'], phot['flux_fit'])
+    assert_allclose(phot2['qfit'], phot['qfit'])
+
+    assert len(psfphot2.fit_results) == len(psfphot.fit_results)
+    for i, (result, result2) in enumerate(zip(psfphot.fit_results,
+                                              psfphot2.fit_results,
+                                              strict=True)):
+        assert not isinstance(result2, PSFPhotometry)
+        assert not hasattr(result2, 'psf_model')
+        assert_equal(result2.results['id'], result.results['id'])
+        assert_allclose(result2.fit_params['flux_fit'],
+                        result.fit_params['flux_fit'])
+        assert_equal(result2.fit_info['fit_error_indices'],
+                     result.fit_info['fit_error_indices'])
+        for finfo in result2.fit_info['fit_infos']:
+            assert 'fun' not in finfo
+            assert 'fvec' not in finfo
+
+        filename = tmp_path / f'fit_residuals_iter{i + 1}.npz'
+        assert result2.fit_residuals_file == filename
+        with np.load(filename) as npz:
+            fit_residuals = [npz[f'arr_{j}'] for j in range(len(npz.files))]
+        assert len(fit_residuals) == len(result.results)
+        assert_equal(fit_residuals, result._get_fit_residuals())
+
+    resid = psfphot.make_residual_image(data, psf_shape=psf_shape)
+    resid2 = psfphot2.make_residual_image(data, psf_shape=psf_shape)
+    assert_allclose(resid2, resid)
+
+    # the fit residuals are discarded if fit_residuals_dir is None
+    psfphot3 = IterativePSFPhotometry(psf_model, fit_shape,
+                                      compact_results=True, **kwargs)
+    phot3 = psfphot3(data)
+    assert_allclose(phot3['flux_fit'], phot['flux_fit'])
+    for result in psfphot3.fit_results:
+        assert result.fit_residuals_file is None
+
+    match = 'fit_residuals_dir can be input only if compact_results=True'
+    with pytest.raises(ValueError, match=match):
+        IterativePSFPhotometry(psf_model, fit_shape,
+                               fit_residuals_dir=tmp_path, **kwargs)
+
+    match = 'fit_residuals_dir must be an existing directory'
+    with pytest.raises(ValueError, match=match):
+        IterativePSFPhotometry(psf_model, fit_shape, compact_results=True,
+                               fit_residuals_dir=tmp_path / 'missing',
+                               **kwargs)
+
+
+@pytest.mark.parametrize('mode', ['new', 'all'])
+def test_iterative_psf_photometry_incremental(mode):
+    sources = QTable()
+    sources['x_0'] = [50, 45, 55, 27, 22, 77, 82, 80]
+    sources['y_0'] = [50, 52, 48, 27, 30, 77, 79, 20]
+    sources['flux'] = [1000, 100, 50, 1000, 100, 1000, 100, 1000]
+
+    shape = (101, 101)
+    psf_model = CircularGaussianPRF(flux=500, fwhm=9.4)
+    psf_shape = (41, 41)
+    data = make_model_image(shape, psf_model, sources, model_shape=psf_shape)
+
+    fit_shape = (5, 5)
+    finder = DAOStarFinder(0.2, 6.0)
+    grouper = SourceGrouper(10)
+    kwargs = {'finder': finder, 'grouper': grouper, 'aperture_radius': 4,
+              'sub_shape': psf_shape, 'mode': mode, 'maxiters': 3}
+    psfphot = IterativePSFPhotometry(psf_model, fit_shape, **kwargs)
+    phot = psfphot(data)
+
+    psfphot2 = IterativePSFPhotometry(psf_model, fit_shape,
+                                      incremental=True, **kwargs)
+    phot2 = psfphot2(data)
+    assert len(phot2) == len(sources)
+    assert len(psfphot2.fit_results) == len(psfphot.fit_results)
+    assert_equal(phot2['id'], phot['id'])
+    assert_equal(phot2['group_id'], phot['group_id'])
+    assert_equal(phot2['group_size'], phot['group_size'])
+    assert_equal(phot2['iter_detected'], phot['iter_detected'])
+    assert_allclose(phot2['x_fit'], phot['x_fit'])
+    assert_allclose(phot2['y_fit'], phot['y_fit'])
+    assert_allclose(phot2['flux_fit'], phot['flux_fit'])
+
+    if mode == 'all':
+        # only the 'all' mode refits the blended sources together, so
+        # the 'new' mode fluxes of the blended sources are biased
+        assert_allclose(np.sort(phot2['flux_fit']),
+                        np.sort(sources['flux']))
+
+        # the isolated source is not refit after the first iteration
+        idx = np.argmin(np.abs(phot2['y_fit'] - 20))
+        first_tbl = psfphot2.fit_results[0].results
+        idx0 = np.argmin(np.abs(first_tbl['y_fit'] - 20))
+        assert phot2['flux_fit'][idx] == first_tbl['flux_fit'][idx0]
+        assert len(psfphot2.fit_results[-1].fit_info['fit_infos']) < len(phot2)
+
+    resid = psfphot.make_residual_image(data, psf_shape=psf_shape)
+    resid2 = psfphot2.make_residual_image(data, psf_shape=psf_shape)
+    assert_allclose(resid2, resid, atol=1e-6)
+    if mode == 'all':
+        assert_allclose(resid2, 0, atol=1e-6)
+
+
 def test_iterative_psf_photometry_overlap():
     """
     Regression test for #1769.
@@ -0,0 +1,179 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+Tests for the tiled_photometry module.
+"""
+
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from multiprocessing import get_context
+
+import numpy as np
+import pytest
+from astropy.utils.exceptions import AstropyUserWarning
+from numpy.testing import assert_allclose, assert_equal
+
+from photutils.datasets import make_noise_image
+from photutils.detection import DAOStarFinder
+from photutils.psf import (CircularGaussianPRF, PSFPhotometry,
+                           TiledPSFPhotometry, make_psf_model_image)
+from photutils.utils.exceptions import NoDetectionsWarning
+
+
+@pytest.fixture(name='test_data')
+def fixture_test_data():
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    model_shape = (9, 9)
+    n_sources = 40
+    shape = (151, 151)
+    data, true_params = make_psf_model_image(shape, psf_model, n_sources,
+                                             model_shape=model_shape,
+                                             flux=(500, 700),
+                                             min_separation=10, seed=0)
+    noise = make_noise_image(data.shape, mean=0, stddev=1, seed=0)
+    data += noise
+    error = np.abs(noise)
+
+    return data, error, true_params
+
+
+def test_tiled_psf_photometry_init_params(test_data):
+    data, error, sources = test_data
+
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    fit_shape = (5, 5)
+    init_params = sources[('x_0', 'y_0')]
+    psfphot = PSFPhotometry(psf_model, fit_shape, aperture_radius=4)
+    phot = psfphot(data, error=error, init_params=init_params)
+
+    tiled = TiledPSFPhotometry(psfphot, 50, halo=10)
+    phot2 = tiled(data, error=error, init_params=init_params)
+    assert len(phot2) == len(phot)
+    assert_equal(phot2['id'], phot['id'])
+    assert len(np.unique(phot2['group_id'])) == len(phot2)
+    assert_equal(phot2['flags'], phot['flags'])
+    assert_equal(phot2['npixfit'], phot['npixfit'])
+    for col in ('x_init', 'y_init', 'x_fit', 'y_fit', 'flux_fit',
+                'flux_err', 'qfit', 'cfit'):
+        assert_allclose(phot2[col], phot[col])
+
+    # the input psfphot instance is not modified
+    assert psfphot.results is phot
+
+    psf_shape = (9, 9)
+    resid = psfphot.make_residual_image(data, psf_shape=psf_shape)
+    resid2 = tiled.make_residual_image(data, psf_shape=psf_shape)
+    assert_allclose(resid2, resid)
+
+    model = psfphot.make_model_image(data.shape, psf_shape=psf_shape)
+    model2 = tiled.make_model_image(data.shape, psf_shape=psf_shape)
+    assert_allclose(model2, model)
+
+
+def test_tiled_psf_photometry_finder(test_data):
+    data, error, _ = test_data
+
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    fit_shape = (5, 5)
+    finder = DAOStarFinder(6.0, 2.0)
+    psfphot = PSFPhotometry(psf_model, fit_shape, finder=finder,
+                            aperture_radius=4)
+    phot = psfphot(data, error=error)
+
+    # the finder also detects partial sources at the edges of the
+    # extended tiles, whose fits may not converge; these sources are
+    # outside of the tile cores and are not included in the results
+    tiled = TiledPSFPhotometry(psfphot, (40, 60), halo=15)
+    match = 'One or more fit'
+    with pytest.warns(AstropyUserWarning, match=match):
+        phot2 = tiled(data, error=error)
+    assert_equal(phot2['id'], np.arange(len(phot2)) + 1)
+
+    # the sources near the tile seams are not duplicated
+    assert len(phot2) == len(phot)
+    idx = np.lexsort((phot['y_init'], phot['x_init']))
+    idx2 = np.lexsort((phot2['y_init'], phot2['x_init']))
+    for col in ('x_init', 'y_init', 'x_fit', 'y_fit', 'flux_fit'):
+        assert_allclose(phot2[col][idx2], phot[col][idx])
+
+
+@pytest.mark.parametrize('executor_cls',
+                         [ThreadPoolExecutor, ProcessPoolExecutor])
+def test_tiled_psf_photometry_executor(test_data, executor_cls):
+    data, error, sources = test_data
+
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    fit_shape = (5, 5)
+    init_params = sources[('x_0', 'y_0')]
+    psfphot = PSFPhotometry(psf_model, fit_shape, aperture_radius=4)
+    tiled = TiledPSFPhotometry(psfphot, 50)
+    phot = tiled(data, error=error, init_params=init_params)
+
+    kwargs = {'max_workers': 2}
+    if executor_cls is ProcessPoolExecutor:
+        kwargs['mp_context'] = get_context('spawn')
+    with executor_cls(**kwargs) as executor:
+        tiled2 = TiledPSFPhotometry(psfphot, 50, executor=executor)
+        phot2 = tiled2(data, error=error, init_params=init_params)
+
+    assert_equal(phot2['id'], phot['id'])
+    assert_equal(phot2['group_id'], phot['group_id'])
+    for col in ('x_fit', 'y_fit', 'flux_fit', 'flux_err'):
+        assert_allclose(phot2[col], phot[col])
+
+
+def test_tiled_psf_photometry_warnings(test_data):
+    data, error, sources = test_data
+    data = data.copy()
+    data[::20, ::20] = np.nan
+
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    init_params = sources[('x_0', 'y_0')]
+    psfphot = PSFPhotometry(psf_model, (5, 5), aperture_radius=4)
+    match = 'Input data contains unmasked non-finite values'
+    with ThreadPoolExecutor(max_workers=2) as executor:
+        tiled = TiledPSFPhotometry(psfphot, 50, executor=executor)
+        with pytest.warns(AstropyUserWarning, match=match) as rwarn:
+            tiled(data, error=error, init_params=init_params)
+
+    # the warning raised in each tile is emitted only once
+    messages = [str(warning.message) for warning in rwarn]
+    assert len([msg for msg in messages if msg.startswith(match)]) == 1
+
+
+def test_tiled_psf_photometry_no_sources(test_data):
+    data, _, _ = test_data
+
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    finder = DAOStarFinder(1.0e5, 2.0)
+    psfphot = PSFPhotometry(psf_model, (5, 5), finder=finder,
+                            aperture_radius=4)
+    tiled = TiledPSFPhotometry(psfphot, 50)
+    match = 'No sources were found'
+    with pytest.warns(NoDetectionsWarning, match=match):
+        assert tiled(data) is None
+
+
+def test_tiled_psf_photometry_inputs():
+    psf_model = CircularGaussianPRF(flux=1, fwhm=2.7)
+    psfphot = PSFPhotometry(psf_model, (7, 5))
+
+    match = 'psfphot must be a PSFPhotometry instance'
+    with pytest.raises(TypeError, match=match):
+        TiledPSFPhotometry(psf_model, 50)
+
+    match = 'halo must be an integer'
+    with pytest.raises(ValueError, match=match):
+        TiledPSFPhotometry(psfphot, 50, halo=7.5)
+
+    match = r'halo must be at least as large as the largest fit_shape'
+    with pytest.raises(ValueError, match=match):
+        TiledPSFPhotometry(psfphot, 50, halo=5)
+
+    match = 'executor must be a concurrent.futures.Executor instance'
+    with pytest.raises(TypeError, match=match):
+        TiledPSFPhotometry(psfphot, 50, executor=2)
+
+    tiled = TiledPSFPhotometry(psfphot, 50)
+    assert tiled.halo == 7
+    match = 'The psfphot finder must be defined'
+    with pytest.raises(ValueError, match=match):
+        tiled(np.zeros((100, 100)))
@@ -0,0 +1,515 @@
+# Licensed under a 3-clause BSD style license - see LICENSE.rst
+"""
+This module provides a class to perform PSF-fitting photometry on large
+images in overlapping tiles.
+"""
+
+import warnings
+from concurrent.futures import Executor, ProcessPoolExecutor
+from copy import deepcopy
+
+import astropy.units as u
+import numpy as np
+from astropy.nddata import NDData, StdDevUncertainty
+from astropy.table import QTable, vstack
+
+from photutils.psf.photometry import PSFPhotometry, _add_model_stamps
+from photutils.utils._parameters import as_pair
+from photutils.utils.exceptions import NoDetectionsWarning
+
+__all__ = ['TiledPSFPhotometry']
+
+
+class TiledPSFPhotometry:
+    """
+    Class to perform PSF photometry on a large image in overlapping
+    tiles.
+
+    The image is split into rectangular tiles. Each tile is extended by
+    a ``halo`` region on each side (clipped at the image edges) and
+    the input `PSFPhotometry` instance is run independently on each
+    extended tile. Each source is owned by the single tile whose core
+    (non-halo) region contains its initial center position. Only the
+    results of the owned sources are kept from each tile, which are
+    then stitched into a single deduplicated results table. The tiles
+    can be processed in parallel with a `concurrent.futures.Executor`
+    (e.g., a `~concurrent.futures.ProcessPoolExecutor`).
+
+    Parameters
+    ----------
+    psfphot : `PSFPhotometry`
+        The `PSFPhotometry` instance used to perform PSF photometry in
+        each tile. The instance is copied for each tile and is not
+        modified.
+
+    tile_shape : int or length-2 array_like
+        The shape of the core (non-halo) region of each tile. If
+        ``tile_shape`` is a scalar then a square shape of size
+        ``tile_shape`` will be used. If ``tile_shape`` has two elements,
+        they must be in ``(ny, nx)`` order. The tiles at the upper and
+        right edges of the image may be smaller.
+
+    halo : int or `None`, optional
+        The width (in pixels) of the halo region added to each side
+        of the tiles. The halo must be at least as large as the
+        largest ``fit_shape`` size of ``psfphot``. It should also be
+        large enough to include the neighbors of the sources within
+        the ``grouper`` separation, the ``localbkg_estimator`` annulus,
+        and the ``finder`` kernel. If `None`, then the largest
+        ``fit_shape`` size will be used.
+
+    executor : `concurrent.futures.Executor` or `None`, optional
+        The executor used to process the tiles in parallel (e.g., a
+        `~concurrent.futures.ProcessPoolExecutor`). Each tile is
+        submitted as a separate task. If `None`, then the tiles are
+        processed serially. The executor is not shut down by this
+        class. For a `~concurrent.futures.ProcessPoolExecutor`, the
+        ``psfphot`` instance (except for its ``executor``, which is not
+        used in the tile tasks) must be picklable. The warnings raised
+        while processing the tiles are collected and each unique
+        warning is emitted once. For executors other than a
+        `~concurrent.futures.ProcessPoolExecutor`, the warnings are
+        collected in the calling thread, so they must be raised in
+        the calling process (e.g., by a
+        `~concurrent.futures.ThreadPoolExecutor`).
+
+    Notes
+    -----
+    A source is owned by the tile whose core region contains its
+    initial (x, y) center position, where the core region of a tile
+    spanning the pixels ``x0`` to ``x1 - 1`` covers the positions
+    ``x0 - 0.5 <= x < x1 - 0.5`` (and similarly for y). Sources
+    outside of the image are owned by the nearest edge tile. When
+    ``init_params`` is not input, the ``finder`` is run on each
+    extended tile. If the halo is large enough to include the ``finder``
+    kernel, then a source near a tile seam is detected at the same
+    position in the neighboring tiles and is kept only once.
+
+    The source ``id`` values are preserved from the input
+    ``init_params`` table, if present. Otherwise, the sources are
+    numbered consecutively in tile order. The ``group_id`` values are
+    offset in each tile so that they are unique in the stitched table.
+    """
+
+    def __init__(self, psfphot, tile_shape, *, halo=None, executor=None):
+        if not isinstance(psfphot, PSFPhotometry):
+            raise TypeError('psfphot must be a PSFPhotometry instance.')
+        self.psfphot = psfphot
+
+        self.tile_shape = as_pair('tile_shape', tile_shape,
+                                  lower_bound=(0, 1))
+
+        min_halo = int(np.max(psfphot.fit_shape))
+        if halo is None:
+            halo = min_halo
+        if not np.isscalar(halo) or halo != int(halo):
+            raise ValueError('halo must be an integer.')
+        if halo < min_halo:
+            raise ValueError('halo must be at least as large as the '
+                             f'largest fit_shape size ({min_halo}).')
+        self.halo = int(halo)
+
+        if executor is not None and not isinstance(executor, Executor):
+            raise TypeError('executor must be a concurrent.futures.Executor '
+                            'instance.')
+        self.executor = executor
+
+        # be sure to reset these attributes for each __call__
+        # (see _reset_results)
+        self.results = None
+        self._fit_model_params = None
+
+    def _reset_results(self):
+        """
+        Reset these attributes for each __call__.
+        """
+        self.results = None
+        self._fit_model_params = None
+
+    def _define_tiles(self, shape):
+        """
+        Define the tiles for an image of a given shape.
+
+        Returns
+        -------
+        tiles : list of tuple
+            A list of ``(slices, core_bounds)`` tuples for each tile,
+            in row-major order. ``slices`` is a tuple of the y and x
+            slices of the extended (core plus halo) tile and
+            ``core_bounds`` is a tuple of the ``(xmin, xmax, ymin,
+            ymax)`` bounds of the source positions owned by the tile.
+        """
+        tiles = []
+        bounds = []
+        for size, tile_size in zip(shape, self.tile_shape, strict=True):
+            starts = np.arange(0, size, tile_size)
+            stops = np.minimum(starts + tile_size, size)
+            slices = [slice(max(start - self.halo, 0),
+                            min(stop + self.halo, size))
+                      for start, stop in zip(starts, stops, strict=True)]
+            lower = starts - 0.5
+            upper = stops - 0.5
+            lower[0] = -np.inf
+            upper[-1] = np.inf
+            bounds.append(list(zip(slices, lower, upper, strict=True)))
+
+        for yslc, ymin, ymax in bounds[0]:
+            for xslc, xmin, xmax in bounds[1]:
+                tiles.append(((yslc, xslc), (xmin, xmax, ymin, ymax)))
+
+        return tiles
+
+    def _copy_psfphot(self):
+        """
+        Return a copy of the input `PSFPhotometry` instance for the tile
+        tasks.
+
+        If an ``executor`` is used for the tiles, then the
+        ``psfphot`` executor is not included in the copy (executors
+        cannot be pickled). Otherwise, it is shared with the copy.
+        """
+        executor = self.psfphot.executor
+        if self.executor is not None:
+            return deepcopy(self.psfphot, {id(executor): None})
+        return deepcopy(self.psfphot, {id(executor): executor})
+
+    def __call__(self, data, *, mask=None, error=None, init_params=None):
+        """
+        Perform PSF photometry in tiles.
+
+        Parameters
+        ----------
+        data : 2D `~numpy.ndarray`
+            The 2D array on which to perform photometry. Invalid data
+            values (i.e., NaN or inf) are automatically masked. The
+            array can be a `~numpy.memmap`, in which case only the tiles
+            are read into memory.
+
+        mask : 2D bool `~numpy.ndarray`, optional
+            A boolean mask with the same shape as ``data``, where a
+            `True` value indicates the corresponding element of ``data``
+            is masked.
+
+        error : 2D `~numpy.ndarray`, optional
+            The pixel-wise 1-sigma errors of the input ``data``. See
+            `PSFPhotometry` for more details.
+
+        init_params : `~astropy.table.Table` or `None`, optional
+            A table containing the initial guesses of the model
+            parameters (e.g., x, y, flux) for each source. If `None`,
+            then the ``psfphot`` ``finder`` is run on each tile. See
+            `PSFPhotometry` for the allowed column names.
+
+        Returns
+        -------
+        table : `~astropy.table.QTable` or `None`
+            An astropy table with the PSF-fitting results of all the
+            sources, with the same columns as the `PSFPhotometry`
+            output table. `None` is returned if no sources are found.
+        """
+        if isinstance(data, NDData):
+            data_ = data.data
+            if data.unit is not None:
+                data_ <<= data.unit
+            mask = data.mask
+            unc = data.uncertainty
+            if unc is not None:
+                error = unc.represent_as(StdDevUncertainty).quantity
+                if error.unit is u.dimensionless_unscaled:
+                    error = error.value
+                else:
+                    error = error.to(data.unit)
+            return self.__call__(data_, mask=mask, error=error,
+                                 init_params=init_params)
+
+        # reset results from previous runs
+        self._reset_results()
+
+        if data.ndim != 2:
+            raise ValueError('data must be a 2D array.')
+        for name, array in (('mask', mask), ('error', error)):
+            if array is not None and array.shape != data.shape:
+                raise ValueError(f'data and {name} must have the same '
+                                 'shape.')
+
+        param_maps = self.psfphot._param_maps
+        xcolname = param_maps['init_cols']['x']
+        ycolname = param_maps['init_cols']['y']
+        if init_params is None and self.psfphot.finder is None:
+            raise ValueError('The psfphot finder must be defined if '
+                             'init_params is not input.')
+        if init_params is not None:
+            init_params = self.psfphot._validate_init_params(init_params)
+            if 'id' not in init_params.colnames:
+                init_params['id'] = np.arange(len(init_params)) + 1
+
+        tasks = []
+        tile_ids = []
+        for slices, core_bounds in self._define_tiles(data.shape):
+            origin = (slices[1].start, slices[0].start)
+            tile_params = None
+            ids = None
+            if init_params is not None:
+                # include the sources in the core and halo regions
+                xmin, xmax, ymin, ymax = core_bounds
+                xpos = np.asarray(init_params[xcolname])
+                ypos = np.asarray(init_params[ycolname])
+                in_tile = ((xpos >= xmin - self.halo)
+                           & (xpos < xmax + self.halo)
+                           & (ypos >= ymin - self.halo)
+                           & (ypos < ymax + self.halo))
+                if not np.any(in_tile):
+                    continue
+                tile_params = init_params[in_tile]
+                tile_params[xcolname] -= origin[0]
+                tile_params[ycolname] -= origin[1]
+
+                # PSFPhotometry requires consecutive source ids starting
+                # at 1; the tile ids are mapped back to the input ids
+                # after the fit
+                ids = np.asarray(tile_params['id'])
+                tile_params['id'] = np.arange(len(tile_params)) + 1
+
+            args = (self._copy_psfphot(), data[slices],
+                    None if mask is None else mask[slices],
+                    None if error is None else error[slices], tile_params,
+                    origin, core_bounds)
+            tasks.append(args)
+            tile_ids.append(ids)
+
+        # the warning filters are process-global state that is not
+        # thread-safe, so the warnings are recorded here once (in the
+        # calling thread) instead of in the (possibly threaded) tile
+        # tasks; tasks run in separate processes record their own
+        # warnings and return them
+        in_processes = isinstance(self.executor, ProcessPoolExecutor)
+        with warnings.catch_warnings(record=True) as rwarn:
+            warnings.simplefilter('always')
+            warnings.simplefilter('ignore', NoDetectionsWarning)
+            if self.executor is None:
+                tile_results = [_fit_tile(*args) for args in tasks]
+            else:
+                futures = [self.executor.submit(_fit_tile, *args,
+                                                record_warnings=in_processes)
+                           for args in tasks]
+                tile_results = [future.result() for future in futures]
+        recorded_warnings = [(str(warning.message), warning.category)
+                             for warning in rwarn]
+
+        results = []
+        model_params = []
+        max_group_id = 0
+        for (results_tbl, model_tbl, tile_warnings), ids in zip(
+                tile_results, tile_ids, strict=True):
+            recorded_warnings.extend(tile_warnings)
+            if results_tbl is None:
+                continue
+            if ids is not None:
+                results_tbl['id'] = ids[results_tbl['id'] - 1]
+                model_tbl['id'] = results_tbl['id']
+            results_tbl['group_id'] += max_group_id
+            max_group_id = np.max(results_tbl['group_id'])
+            results.append(results_tbl)
+            model_params.append(model_tbl)
+
+        # emit unique warnings from the tiles
+        for message, category in dict.fromkeys(recorded_warnings):
+            warnings.warn(message, category)
+
+        if not results:
+            warnings.warn('No sources were found.', NoDetectionsWarning)
+            return None
+
+        meta = results[0].meta
+        results = vstack(results, metadata_conflicts='silent')
+        model_params = vstack(model_params, metadata_conflicts='silent')
+        if init_params is None:
+            ids = np.arange(len(results)) + 1
+            results['id'] = ids
+            model_params['id'] = ids
+        else:
+            idx = np.argsort(results['id'], kind='stable')
+            results = results[idx]
+            model_params = model_params[idx]
+
+        # redefine flag = 2 with respect to the full image
+        xfitcol = param_maps['fit'][param_maps['model']['x']]
+        yfitcol = param_maps['fit'][param_maps['model']['y']]
+        outside = ((results[xfitcol] < 0) | (results[yfitcol] < 0)
+                   | (results[xfitcol] > data.shape[1])
+                   | (results[yfitcol] > data.shape[0]))
+        results['flags'] = (results['flags'] & ~2) | (2 * outside)
+
+        results.meta = meta
+        self.results = results
+        self._fit_model_params = model_params
+
+        return results
+
+    def _get_xy_names(self):
+        psf_model = self.psfphot.psf_model
+        try:
+            return psf_model.x_name, psf_model.y_name
+        except AttributeError:
+            return 'x_0', 'y_0'
+
+    def make_model_image(self, shape, *, psf_shape=None):
+        """
+        Create a 2D image from the fit PSF models.
+
+        Parameters
+        ----------
+        shape : 2 tuple of int
+            The shape of the output array.
+
+        psf_shape : 2 tuple of int, optional
+            The shape of the region around the center of the fit model
+            to render in the output image. If ``psf_shape`` is a scalar
+            integer, then a square shape of size ``psf_shape`` will be
+            used. If `None`, then the bounding box of the model will be
+            used. This keyword must be specified if the model does not
+            have a ``bounding_box`` attribute.
+
+        Returns
+        -------
+        array : 2D `~numpy.ndarray`
+            The rendered image from the fit PSF models. This image will
+            not have any units.
+        """
+        image = np.zeros(shape)
+        x_name, y_name = self._get_xy_names()
+        model_params = self._fit_model_params.copy()
+        for colname in model_params.colnames:
+            if isinstance(model_params[colname], u.Quantity):
+                model_params[colname] = model_params[colname].value
+        _add_model_stamps(image, self.psfphot.psf_model, model_params,
+                          model_shape=psf_shape, x_name=x_name,
+                          y_name=y_name)
+        return image
+
+    def make_residual_image(self, data, *, psf_shape=None):
+        """
+        Create a 2D residual image from the fit PSF models.
+
+        The fit PSF models of all the sources are subtracted from a copy
+        of the data in place, without creating a full-sized model
+        image.
+
+        Parameters
+        ----------
+        data : 2D `~numpy.ndarray`
+            The 2D array on which photometry was performed. This should
+            be the same array input when calling this class.
+
+        psf_shape : 2 tuple of int, optional
+            The shape of the region around the center of the fit model
+            to subtract. If ``psf_shape`` is a scalar integer, then
+            a square shape of size ``psf_shape`` will be used. If
+            `None`, then the bounding box of the model will be used.
+            This keyword must be specified if the model does not have a
+            ``bounding_box`` attribute.
+
+        Returns
+        -------
+        array : 2D `~numpy.ndarray`
+            The residual image of the ``data`` minus the fit PSF models.
+        """
+        residual = data.astype(float)
+        x_name, y_name = self._get_xy_names()
+        _add_model_stamps(residual, self.psfphot.psf_model,
+                          self._fit_model_params, model_shape=psf_shape,
+                          x_name=x_name, y_name=y_name, scale=-1.0)
+        return residual
+
+
+def _fit_tile(psfphot, data, mask, error, init_params, origin, core_bounds,
+              record_warnings=False):
+    """
+    Perform PSF photometry on a single tile.
+
+    This is a module-level function so that it can be submitted to any
+    `concurrent.futures.Executor`, including process pools.
+
+    Parameters
+    ----------
+    psfphot : `PSFPhotometry`
+        The `PSFPhotometry` instance.
+
+    data, mask, error : 2D `~numpy.ndarray` or `None`
+        The data, mask, and error arrays of the extended tile.
+
+    init_params : `~astropy.table.Table` or `None`
+        The initial parameters of the sources in the extended tile, in
+        the tile pixel coordinates.
+
+    origin : tuple of int
+        The ``(x, y)`` pixel position of the tile origin in the full
+        image.
+
+    core_bounds : tuple of float
+        The ``(xmin, xmax, ymin, ymax)`` bounds of the initial source
+        positions (in the full image) owned by the tile.
+
+    record_warnings : bool, optional
+        Whether to record the warnings raised while processing the
+        tile. This should be `True` only when the tile is processed in
+        a separate process, where the warnings cannot be recorded by
+        the caller. The warning filters are not thread-safe, so this
+        must be `False` when the tile is processed in a thread.
+
+    Returns
+    -------
+    results : `~astropy.table.QTable` or `None`
+        The PSF-fitting results of the sources owned by the tile, in
+        full image coordinates.
+
+    model_params : `~astropy.table.QTable` or `None`
+        The fit model parameters of the sources owned by the tile, in
+        full image coordinates.
+
+    recorded_warnings : list of tuple
+        The ``(message, category)`` of the warnings raised while
+        processing the tile. The list is empty if ``record_warnings``
+        is `False`.
+    """
+    if record_warnings:
+        with warnings.catch_warnings(record=True) as rwarn:
+            warnings.simplefilter('always')
+            warnings.simplefilter('ignore', NoDetectionsWarning)
+            results = psfphot(data, mask=mask, error=error,
+                              init_params=init_params)
+        recorded_warnings = [(str(warning.message), warning.category)
+                             for warning in rwarn]
+    else:
+        results = psfphot(data, mask=mask, error=error,
+                          init_params=init_params)
+        recorded_warnings = []
+
+    if results is None:
+        return None, None, recorded_warnings
+
+    param_maps = psfphot._param_maps
+    model_names = param_maps['model']
+    shifts = {'x': origin[0], 'y': origin[1]}
+
+    # the fit model parameters are in the same (source id) order as the
+    # results table
+    model_params = QTable()
+    model_params['id'] = results['id']
+    for name in psfphot.psf_model.param_names:
+        model_params[name] = psfphot._fit_model_params[name]
+
+    for key, shift in shifts.items():
+        results[param_maps['init_cols'][key]] += shift
+        results[param_maps['fit'][model_names[key]]] += shift
+        model_params[model_names[key]] += shift
+
+    xmin, xmax, ymin, ymax = core_bounds
+    xinit = np.asarray(results[param_maps['init_cols']['x']])
+    yinit = np.asarray(results[param_maps['init_cols']['y']])
+    owned = ((xinit >= xmin) & (xinit < xmax)
+             & (yinit >= ymin) & (yinit < ymax))
+    if not np.any(owned):
+        return None, None, recorded_warnings
+
+    return results[owned], model_params[owned], recorded_warnings
@@ -4,11 +4,15 @@ This module provides tools for deblending overlapping sources labeled in
 a segmentation image.
 """
 
+import atexit
+import heapq
 import warnings
-from concurrent.futures import ProcessPoolExecutor, as_completed
+from concurrent.futures import (ProcessPoolExecutor, ThreadPoolExecutor,
+                                as_completed, wait)
+from concurrent.futures.process import BrokenProcessPool
 from dataclasses import dataclass
-from functools import partial
 from multiprocessing import cpu_count, get_context
+from multiprocessing.shared_memory import SharedMemory
 
 import numpy as np
 from astropy.units import Quantity
@@ -38,7 +42,8 @@ class _DeblendParams:
 
 def deblend_sources(data, segment_img, npixels, *, labels=None, nlevels=32,
                     contrast=0.001, mode='exponential', connectivity=8,
-                    relabel=True, nproc=1, progress_bar=True):
+                    relabel=True, nproc=1, backend='processes',
+                    progress_bar=True):
     """
     Deblend overlapping sources labeled in a segmentation image.
 
@@ -114,17 +119,31 @@ def deblend_sources(data, segment_img, npixels, *, labels=None, nlevels=32,
         than 1). If set to 1, then a serial implementation is used
         instead of a parallel one. If `None`, then the number of
         processes will be set to the number of CPUs detected on the
-        machine. Please note that due to overheads, multiprocessing may
-        be slower than serial processing if only a small number of
-        sources are to be deblended. The benefits of multiprocessing
-        require ~1000 or more sources to deblend, with larger gains as
-        the number of sources increase.
+        machine. For multiprocessing, the sources are deblended in
+        batches of sources with balanced total segment areas, and the
+        input image and segmentation image are passed to the worker
+        processes in shared memory. The worker processes are kept
+        alive and reused by subsequent calls with the same ``nproc``
+        (e.g., when processing a stream of images), so the process
+        startup cost is paid only once. Please note that due to
+        overheads, multiprocessing may be slower than serial processing
+        if only a small number of sources are to be deblended.
+
+    backend : {'processes', 'threads'}, optional
+        The parallel backend used if ``nproc`` is larger than 1. If
+        ``'processes'`` (default), then the sources are deblended using
+        multiprocessing (see ``nproc``). If ``'threads'``, then the
+        sources are deblended using a pool of ``nproc`` threads that
+        operate on views of the input arrays. The most expensive
+        deblending steps release the GIL, so the ``'threads'`` backend
+        avoids the process startup and data transfer costs and can give
+        a parallel speedup even for a few hundred sources.
 
     progress_bar : bool, optional
         Whether to display a progress bar. If ``nproc = 1``, then the
         ID shown after the progress bar is the source label being
-        deblended. If multiprocessing is used (``nproc > 1``), the ID
-        shown is the last source label that was deblended. The progress
+        deblended. If parallel processing is used (``nproc > 1``), the
+        ID shown is the last source label that was deblended. The progress
         bar requires that the `tqdm <https://tqdm.github.io/>`_ optional
         dependency be installed. Note that the progress bar does not
         currently work in the Jupyter console due to limitations in
@@ -163,6 +182,9 @@ def deblend_sources(data, segment_img, npixels, *, labels=None, nlevels=32,
     if mode not in ('exponential', 'linear', 'sinh'):
         raise ValueError('mode must be "exponential", "linear", or "sinh"')
 
+    if backend not in ('processes', 'threads'):
+        raise ValueError('backend must be "processes" or "threads"')
+
     if labels is None:
         labels = segment_img.labels
     else:
@@ -219,48 +241,17 @@ def deblend_sources(data, segment_img, npixels, *, labels=None, nlevels=32,
                 max_label += nlabels
 
     else:
-        # Use multiprocessing to deblend sources
-
-        # Prepare the arguments for the worker function
-        all_source_data = []
-        all_source_segments = []
-        all_source_slices = []
-        for label_idx in label_indices:
-            source_slice = segment_img.slices[label_idx]
-            source_data = data[source_slice]
-            source_segment = segment_img.data[source_slice]
-            all_source_data.append(source_data)
-            all_source_segments.append(source_segment)
-            all_source_slices.append(source_slice)
-
-        args_all = zip(all_source_data, all_source_segments, labels,
-                       strict=True)
-
-        # Create a partial function to pass the deblend_params to the
-        # worker function
-        worker = partial(_deblend_source, deblend_params=deblend_params)
-
-        # Prepare to store futures and results to preserve the input
-        # order of the labels when using as_completed()
-        futures_dict = {}
-        results = [None] * len(labels)
-
-        disable_pbar = not progress_bar
-        mp_context = get_context('spawn')
-        with ProcessPoolExecutor(mp_context=mp_context,
-                                 max_workers=nproc) as executor:
-            # Submit all jobs at once
-            for index, args in enumerate(args_all):
-                futures_dict[executor.submit(worker, *args)] = index
-
-            with tqdm(total=len(labels), desc='Deblending',
-                      disable=disable_pbar) as pbar:
-                # Process the results as they are completed
-                for future in as_completed(futures_dict):
-                    pbar.update(1)
-                    idx = futures_dict[future]
-                    pbar.set_postfix_str(f'ID: {labels[idx]}')
-                    results[idx] = future.result()
+        # Use multiprocessing or multithreading to deblend sources
+        all_source_slices = [segment_img.slices[label_idx]
+                             for label_idx in label_indices]
+        areas = segment_img.areas[label_indices]
+        if backend == 'threads':
+            deblend_func = _deblend_sources_threads
+        else:
+            deblend_func = _deblend_sources_multiprocess
+        results = deblend_func(data, segment_img.data, labels,
+                               all_source_slices, areas, deblend_params,
+                               nproc, progress_bar)
 
         # Process the results
         max_label = segment_img.max_label + 1
@@ -320,6 +311,240 @@ def deblend_sources(data, segment_img, npixels, *, labels=None, nlevels=32,
     return segm_img
 
 
+class _ProcessPool:
+    """
+    A ``spawn`` process pool that is reused across `deblend_sources`
+    calls.
+
+    The pool is created on first use and is kept alive until the number
+    of requested processes changes (or the interpreter exits), so that
+    repeated calls (e.g., `~photutils.segmentation.SourceFinder` on a
+    stream of images) do not pay the process startup cost every time.
+    """
+
+    def __init__(self):
+        self.executor = None
+        self.nproc = None
+
+    def get(self, nproc):
+        """
+        Return a process pool with ``nproc`` worker processes.
+        """
+        if self.executor is None or self.nproc != nproc:
+            self.shutdown()
+            mp_context = get_context('spawn')
+            self.executor = ProcessPoolExecutor(mp_context=mp_context,
+                                                max_workers=nproc)
+            self.nproc = nproc
+        return self.executor
+
+    def shutdown(self):
+        """
+        Shut down the process pool (if any).
+        """
+        if self.executor is not None:
+            self.executor.shutdown()
+            self.executor = None
+            self.nproc = None
+
+
+_process_pool = _ProcessPool()
+atexit.register(_process_pool.shutdown)
+
+
+def _make_chunks(areas, nchunks):
+    """
+    Split sources into chunks with balanced total segment areas.
+
+    The sources are assigned in order of decreasing area to the chunk
+    with the smallest total area (the "longest processing time"
+    heuristic).
+
+    Parameters
+    ----------
+    areas : 1D `~numpy.ndarray`
+        The segment areas of the sources.
+
+    nchunks : int
+        The number of chunks.
+
+    Returns
+    -------
+    chunks : list of 1D int `~numpy.ndarray`
+        The indices of the sources in each chunk, sorted in increasing
+        order. The chunks are ordered by decreasing total area. Empty
+        chunks are not returned.
+    """
+    heap = [(0, idx) for idx in range(nchunks)]
+    chunks = [[] for _ in range(nchunks)]
+    for idx in np.argsort(areas, kind='stable')[::-1]:
+        load, chunk_idx = heapq.heappop(heap)
+        chunks[chunk_idx].append(idx)
+        heapq.heappush(heap, (load + areas[idx], chunk_idx))
+
+    loads = [np.sum(areas[chunk]) for chunk in chunks]
+    return [np.sort(chunks[idx]) for idx in np.argsort(loads)[::-1]
+            if chunks[idx]]
+
+
+def _to_shared_memory(array):
+    """
+    Copy an array to a new shared memory block.
+
+    Parameters
+    ----------
+    array : `~numpy.ndarray`
+        The input array.
+
+    Returns
+    -------
+    shm : `~multiprocessing.shared_memory.SharedMemory`
+        The shared memory block. The caller is responsible for closing
+        and unlinking it.
+
+    info : tuple
+        The shared memory block name and the array shape and dtype,
+        used by worker processes to access the array.
+    """
+    shm = SharedMemory(create=True, size=max(array.nbytes, 1))
+    shared = np.ndarray(array.shape, dtype=array.dtype, buffer=shm.buf)
+    shared[...] = array
+    del shared  # release the buffer so that shm can be closed
+
+    return shm, (shm.name, array.shape, array.dtype)
+
+
+def _deblend_chunk(data_info, segment_info, labels, slices,
+                   deblend_params):
+    """
+    Deblend a chunk of sources from images in shared memory.
+
+    This function is run in the worker processes. Only the cutouts of
+    the sources are copied from the shared memory blocks.
+    """
+    data_shm = SharedMemory(name=data_info[0])
+    segment_shm = SharedMemory(name=segment_info[0])
+    data = np.ndarray(data_info[1], dtype=data_info[2], buffer=data_shm.buf)
+    segment_data = np.ndarray(segment_info[1], dtype=segment_info[2],
+                              buffer=segment_shm.buf)
+
+    try:
+        return [_deblend_source(data[slc].copy(), segment_data[slc].copy(),
+                                label, deblend_params)
+                for label, slc in zip(labels, slices, strict=True)]
+    finally:
+        # the array views must be released before closing
+        del data, segment_data
+        data_shm.close()
+        segment_shm.close()
+
+
+def _deblend_sources_multiprocess(data, segment_data, labels, slices,
+                                  areas, deblend_params, nproc,
+                                  progress_bar):
+    """
+    Deblend sources using multiprocessing.
+
+    The sources are split into chunks (several per process) with
+    balanced total segment areas, and the input data and segmentation
+    images are passed to the worker processes in shared memory. The
+    worker processes are reused across calls (see `_ProcessPool`).
+
+    Returns
+    -------
+    results : list of tuple
+        The deblended source cutout and warnings of each source, in the
+        same order as the input ``labels``.
+    """
+    # several chunks per process balance the load between processes
+    chunks = _make_chunks(areas, min(len(labels), 4 * nproc))
+    results = [None] * len(labels)
+
+    data_shm, data_info = _to_shared_memory(np.asarray(data))
+    segment_shm, segment_info = _to_shared_memory(segment_data)
+    futures_dict = {}
+    try:
+        executor = _process_pool.get(nproc)
+        for chunk in chunks:
+            future = executor.submit(_deblend_chunk, data_info,
+                                     segment_info, labels[chunk],
+                                     [slices[idx] for idx in chunk],
+                                     deblend_params)
+            futures_dict[future] = chunk
+
+        with tqdm(total=len(labels), desc='Deblending',
+                  disable=not progress_bar) as pbar:
+            # process the results as they are completed, storing them
+            # in the input order of the labels
+            for future in as_completed(futures_dict):
+                chunk = futures_dict[future]
+                try:
+                    chunk_results = future.result()
+                except BrokenProcessPool:  # pragma: no cover
+                    _process_pool.shutdown()
+                    raise
+                for idx, result in zip(chunk, chunk_results, strict=True):
+                    results[idx] = result
+                pbar.update(len(chunk))
+                pbar.set_postfix_str(f'ID: {labels[chunk[-1]]}')
+    except Exception:
+        # the process pool is reused, so the pending chunks must be
+        # cancelled and the running chunks must finish before the
+        # shared memory blocks are unlinked
+        for future in futures_dict:
+            future.cancel()
+        wait(futures_dict)
+        raise
+    finally:
+        data_shm.close()
+        data_shm.unlink()
+        segment_shm.close()
+        segment_shm.unlink()
+
+    return results
+
+
+def _deblend_sources_threads(data, segment_data, labels, slices, areas,
+                             deblend_params, nproc, progress_bar):
+    """
+    Deblend sources using a thread pool.
+
+    The threads operate on views of the input arrays (no data are
+    copied). The expensive deblending steps (e.g., the watershed
+    segmentation) release the GIL, so the sources are deblended in
+    parallel.
+
+    Returns
+    -------
+    results : list of tuple
+        The deblended source cutout and warnings of each source, in the
+        same order as the input ``labels``.
+    """
+    results = [None] * len(labels)
+    with ThreadPoolExecutor(max_workers=nproc) as executor:
+        # submit the largest sources first to balance the load between
+        # the threads
+        futures_dict = {}
+        for idx in np.argsort(areas, kind='stable')[::-1]:
+            slc = slices[idx]
+            future = executor.submit(_deblend_source, data[slc],
+                                     segment_data[slc], labels[idx],
+                                     deblend_params)
+            futures_dict[future] = idx
+
+        with tqdm(total=len(labels), desc='Deblending',
+                  disable=not progress_bar) as pbar:
+            # process the results as they are completed, storing them
+            # in the input order of the labels
+            for future in as_completed(futures_dict):
+                idx = futures_dict[future]
+                results[idx] = future.result()
+                pbar.update(1)
+                pbar.set_postfix_str(f'ID: {labels[idx]}')
+
+    return results
+
+
 def _deblend_source(data, segment_data, label, deblend_params):
     """
     Convenience function to deblend a single labeled source.
@@ -483,12 +708,18 @@ class _SingleSourceDeblender:
         """
         Make markers (possible sources) for the watershed algorithm.
 
+        The final markers are computed from a single max-tree
+        (component tree) of the source (see `make_markers_maxtree`),
+        which is equivalent to, but much faster than, labeling the
+        source at each threshold level.
+
         Parameters
         ----------
         return_all : bool, optional
             If `False` then return only the final segmentation marker
-            image. If `True` then return all segmentation marker images.
-            This keyword is useful for debugging and testing.
+            image. If `True` then return all segmentation marker images,
+            which are computed by labeling the source at each threshold
+            level. This keyword is useful for debugging and testing.
 
         Returns
         -------
@@ -498,6 +729,9 @@ class _SingleSourceDeblender:
             segmentation marker images is returned. `None` is returned
             if there is only one source at every threshold.
         """
+        if not return_all:
+            return self.make_markers_maxtree()
+
         thresholds = self.compute_thresholds()
         segm_lower = _detect_sources(self.data, thresholds[0], self.npixels,
                                      self.footprint, self.segment_mask,
@@ -523,6 +757,136 @@ class _SingleSourceDeblender:
 
         return segm_lower
 
+    def make_markers_maxtree(self):
+        """
+        Make markers (possible sources) for the watershed algorithm
+        using a max-tree (component tree) of the source.
+
+        The max-tree is built once from the source pixels quantized
+        by the threshold levels (i.e., the number of thresholds below
+        each pixel value). Each tree node represents a connected
+        component of the pixels above one or more consecutive threshold
+        levels. The source segments at every threshold level, their
+        areas, and their parent/child relationships are derived from the
+        tree nodes, giving the same markers as `make_markers` with
+        ``return_all=True`` (including the label numbers) without
+        labeling the source at each threshold.
+
+        Returns
+        -------
+        markers : 2D `~numpy.ndarray` or `None`
+            A segmentation image that contain markers for possible
+            sources. `None` is returned if there is only one source at
+            every threshold.
+        """
+        from skimage.morphology import max_tree
+
+        thresholds = self.compute_thresholds()
+
+        # the threshold level of each pixel is the number of thresholds
+        # below the pixel value, i.e., a pixel is above the threshold
+        # at index k if its level is > k; pixels outside of the source
+        # segment (or with non-finite values) have a level of 0
+        mask = self.segment_mask & np.isfinite(self.data)
+        levels = np.zeros(self.data.shape, dtype=np.int32)
+        levels[mask] = np.searchsorted(thresholds, self.data[mask],
+                                       side='left')
+
+        connectivity = 2 if np.all(self.footprint) else 1
+        parent, traverser = max_tree(levels, connectivity=connectivity)
+        parent = parent.ravel()
+        levels = levels.ravel()
+
+        # the tree nodes are represented by their canonical pixels;
+        # skimage canonizes the tree such that the parent of each pixel
+        # is a canonical pixel
+        root = traverser[0]
+        is_node = levels[parent] != levels
+        is_node[root] = True
+        nodes = np.flatnonzero(is_node)
+        node_index = np.full(levels.size, -1, dtype=np.intp)
+        node_index[nodes] = np.arange(nodes.size)
+        pixel_nodes = node_index[np.where(is_node, np.arange(levels.size),
+                                          parent)]
+
+        node_parents = node_index[parent[nodes]]
+        node_levels = levels[nodes]
+        parent_levels = node_levels[node_parents]
+        root_index = node_index[root]
+        parent_levels[root_index] = -1
+
+        # the area and the first pixel index (in raster order) of the
+        # components represented by each node are accumulated from the
+        # highest to the lowest level so that all descendants of a node
+        # are included before the node is added to its parent
+        areas = np.bincount(pixel_nodes, minlength=nodes.size)
+        first_pixels = np.unique(pixel_nodes, return_index=True)[1]
+        for level in np.unique(node_levels)[::-1]:
+            idx = np.flatnonzero(node_levels == level)
+            idx = idx[idx != root_index]
+            np.add.at(areas, node_parents[idx], areas[idx])
+            np.minimum.at(first_pixels, node_parents[idx], first_pixels[idx])
+
+        markers = None
+        marker_level = None
+        is_marker = np.zeros(nodes.size, dtype=bool)
+        for level in range(1, len(thresholds) + 1):
+            # the source segments at this threshold level
+            active = (parent_levels < level) & (node_levels >= level)
+            segments = np.flatnonzero(active & (areas >= self.npixels))
+            if segments.size < 2:
+                continue
+
+            if markers is None:
+                markers = segments
+                marker_level = level
+                is_marker[markers] = True
+                continue
+
+            # find the marker (the lower-level parent) of each segment
+            owners = segments.copy()
+            found = is_marker[owners]
+            while not np.all(found):
+                owners[~found] = node_parents[owners[~found]]
+                found = is_marker[owners]
+
+            # markers with multiple children are replaced by them
+            nchildren = np.bincount(owners, minlength=nodes.size)
+            split = nchildren[markers] >= 2
+            if np.any(split):
+                children = segments[nchildren[owners] >= 2]
+                is_marker[markers[split]] = False
+                is_marker[children] = True
+                markers = np.concatenate((markers[~split], children))
+                marker_level = None
+
+        if markers is None:
+            return None
+
+        # assign the marker label numbers; markers defined at a single
+        # threshold level keep the label numbers of all (including the
+        # removed small) segments at that level, otherwise the markers
+        # are labeled consecutively in raster order
+        if marker_level is None:
+            labeled = markers
+        else:
+            labeled = np.flatnonzero((parent_levels < marker_level)
+                                     & (node_levels >= marker_level))
+        labeled = labeled[np.argsort(first_pixels[labeled])]
+        marker_labels = np.zeros(nodes.size, dtype=np.int32)
+        marker_labels[labeled] = np.arange(1, labeled.size + 1)
+
+        # propagate the marker labels to all of their descendants,
+        # from the lowest to the highest level
+        node_labels = np.zeros(nodes.size, dtype=np.int32)
+        for level in np.unique(node_levels):
+            idx = np.flatnonzero(node_levels == level)
+            idx = idx[idx != root_index]
+            node_labels[idx] = np.where(is_marker[idx], marker_labels[idx],
+                                        node_labels[node_parents[idx]])
+
+        return node_labels[pixel_nodes].reshape(self.data.shape)
+
     def make_marker_segment(self, segment_lower, segment_upper):
         """
         Make markers (possible sources) for the watershed algorithm.
@@ -3,7 +3,10 @@
 This module provides tools for detecting sources in an image.
 """
 
+import os
 import warnings
+from concurrent.futures import ThreadPoolExecutor
+from itertools import pairwise
 
 import numpy as np
 from astropy.stats import SigmaClip
@@ -12,6 +15,7 @@ from scipy.ndimage import label as ndi_label
 
 from photutils.segmentation.core import SegmentationImage
 from photutils.segmentation.utils import _make_binary_structure
+from photutils.utils._parameters import as_pair
 from photutils.utils._quantity_helpers import process_quantities
 from photutils.utils._stats import nanmean, nanstd
 from photutils.utils.exceptions import NoDetectionsWarning
@@ -202,46 +206,39 @@ def _detect_sources(data, threshold, npixels, footprint, inverse_mask, *,
     # NOTE: recasting segment_img to int and using output=segment_img
     # gives similar performance
     segment_img, nlabels = ndi_label(segment_img, structure=footprint)
-    labels = np.arange(nlabels, dtype=segment_img.dtype) + 1
-
-    # remove objects with less than npixels
-    # NOTE: making cutout images and setting their pixels to 0 is
-    # ~10x faster than using segment_img directly and ~50% faster
-    # than using ndimage.sum_labels.
-    slices = find_objects(segment_img)
-    segm_labels = []
-    segm_slices = []
-    for label, slc in zip(labels, slices, strict=True):
-        cutout = segment_img[slc]
-        segment_mask = (cutout == label)
-        if np.count_nonzero(segment_mask) < npixels:
-            cutout[segment_mask] = 0
-            continue
-        segm_labels.append(label)
-        segm_slices.append(slc)
 
-    if np.count_nonzero(segment_img) == 0:
+    # remove objects with less than npixels; the areas of all labels
+    # are computed in a single pass over the label image
+    areas = np.bincount(segment_img.ravel(), minlength=nlabels + 1)
+    keep = areas >= npixels
+    keep[0] = False  # background
+    labels = np.flatnonzero(keep).astype(segment_img.dtype)
+    if labels.size == 0:
         return None
 
-    if relabel:
-        # relabel the segmentation image with consecutive numbers;
+    if labels.size != nlabels:
+        # relabel (or remove the small objects) using a lookup table;
         # ndimage.label returns segment_img with dtype = np.int32
         # unless the input array has more than 2**31 - 1 pixels
-        nlabels = len(segm_labels)
-        if len(labels) != nlabels:
-            label_map = np.zeros(np.max(labels) + 1,
-                                 dtype=segment_img.dtype)
-            labels = np.arange(nlabels, dtype=segment_img.dtype) + 1
-            label_map[segm_labels] = labels
-            segment_img = label_map[segment_img]
-    else:
-        labels = segm_labels
+        label_map = np.zeros(nlabels + 1, dtype=segment_img.dtype)
+        if relabel:
+            label_map[labels] = np.arange(1, labels.size + 1,
+                                          dtype=segment_img.dtype)
+            labels = label_map[labels]
+        else:
+            label_map[labels] = labels
+        segment_img = label_map[segment_img]
 
     if return_segmimg:
+        segm_slices = find_objects(segment_img)
+        if not relabel:
+            segm_slices = [segm_slices[label - 1] for label in labels]
+
         segm = object.__new__(SegmentationImage)
         segm._data = segment_img
         segm.__dict__['labels'] = labels
         segm.__dict__['slices'] = segm_slices
+        segm.__dict__['areas'] = areas[keep]
         return segm
 
     # this is used by deblend_sources
@@ -251,7 +248,8 @@ def _detect_sources(data, threshold, npixels, footprint, inverse_mask, *,
     return segment_img
 
 
-def detect_sources(data, threshold, npixels, *, connectivity=8, mask=None):
+def detect_sources(data, threshold, npixels, *, connectivity=8, mask=None,
+                   tile_shape=None, nproc=1, output_file=None):
     """
     Detect sources above a specified threshold value in an image.
 
@@ -294,13 +292,40 @@ def detect_sources(data, threshold, npixels, *, connectivity=8, mask=None):
         `True` values indicate masked pixels. Masked pixels will not be
         included in any source.
 
+    tile_shape : int or tuple of 2 int, optional
+        The ``(ny, nx)`` shape of the tiles used to detect sources in
+        tiles. If ``tile_shape`` is a scalar, then a square tile of size
+        ``tile_shape`` will be used. If `None` (default), the sources
+        are detected in the full image at once (or in a single tile if
+        ``output_file`` is input). In tiled mode, the pixels above the
+        threshold are labeled in each tile independently and the labels
+        are then merged across the tile seams, so that only one tile of
+        ``data``, ``threshold``, and ``mask`` needs to be in memory at a
+        time (e.g., if they are `~numpy.memmap` arrays). The output
+        segmentation image is identical to the non-tiled output.
+
+    nproc : int, optional
+        The number of threads used to label (and relabel) the tiles
+        in tiled mode. If `None`, then the number of threads will be
+        set to the number of CPUs detected on the machine. This keyword
+        is ignored unless ``tile_shape`` or ``output_file`` is input.
+
+    output_file : str, `~pathlib.Path`, or `None`, optional
+        The filename of a ``.npy`` file to which the segmentation
+        image is written as a `~numpy.memmap` array (tiled mode),
+        which allows the segmentation of images that are larger than
+        the available memory. The file can be loaded with `numpy.load`
+        (e.g., with ``mmap_mode='r'``). If `None` (default), the
+        segmentation image is kept in memory.
+
     Returns
     -------
     segment_image : `~photutils.segmentation.SegmentationImage` or `None`
         A 2D segmentation image, with the same shape as ``data``, where
         sources are marked by different positive integer values. A value
         of zero is reserved for the background. If no sources are found
-        then `None` is returned.
+        then `None` is returned. If ``output_file`` is input, then the
+        segmentation image data is a `~numpy.memmap` array.
 
     Raises
     ------
@@ -364,16 +389,295 @@ def detect_sources(data, threshold, npixels, *, connectivity=8, mask=None):
             raise ValueError('mask must not be True for every pixel. There '
                              'are no unmasked pixels in the image to detect '
                              'sources.')
-        inverse_mask = np.logical_not(mask)
-    else:
-        inverse_mask = None
 
     footprint = _make_binary_structure(data.ndim, connectivity)
 
-    segm = _detect_sources(data, threshold, npixels, footprint,
-                           inverse_mask, relabel=True, return_segmimg=True)
+    if tile_shape is not None or output_file is not None:
+        if tile_shape is None:
+            tile_shape = data.shape
+        tile_shape = as_pair('tile_shape', tile_shape, lower_bound=(0, 1),
+                             upper_bound=data.shape)
+        if nproc is None:
+            nproc = os.cpu_count()  # pragma: no cover
+        segm = _detect_sources_tiled(data, threshold, npixels, footprint,
+                                     mask, tile_shape, nproc, output_file)
+    else:
+        inverse_mask = None if mask is None else np.logical_not(mask)
+        segm = _detect_sources(data, threshold, npixels, footprint,
+                               inverse_mask, relabel=True,
+                               return_segmimg=True)
 
     if segm is None:
         warnings.warn('No sources were found.', NoDetectionsWarning)
 
     return segm
+
+
+def _label_tile(data, threshold, mask, footprint, segment_img, tile_slc):
+    """
+    Label the pixels above the threshold in a single tile.
+
+    The tile labels are written to ``segment_img``.
+
+    Returns
+    -------
+    nlabels : int
+        The number of labels in the tile.
+
+    areas : 1D `~numpy.ndarray`
+        The area of each tile label.
+
+    first_pixels : 1D `~numpy.ndarray`
+        The flat index (in the full image) of the first pixel (in raster
+        order) of each tile label.
+
+    bboxes : 2D `~numpy.ndarray`
+        The ``(ymin, ymax, xmin, xmax)`` bounding box (in the full
+        image) of each tile label, with exclusive maximum values.
+    """
+    if np.ndim(threshold) != 0:
+        threshold = threshold[tile_slc]
+
+    # ignore RuntimeWarning caused by > comparison when data contains NaNs
+    # (np.errstate is thread safe, unlike warnings.catch_warnings)
+    with np.errstate(invalid='ignore'):
+        tile_img = np.asarray(data[tile_slc] > threshold)
+    if mask is not None:
+        tile_img &= np.logical_not(mask[tile_slc])
+
+    tile_img, nlabels = ndi_label(tile_img, structure=footprint)
+    segment_img[tile_slc] = tile_img
+
+    if nlabels == 0:
+        empty = np.zeros(0, dtype=int)
+        return 0, empty, empty, np.zeros((4, 0), dtype=int)
+
+    yslc, xslc = tile_slc
+
+    areas = np.bincount(tile_img.ravel(), minlength=nlabels + 1)[1:]
+    nonzero = np.flatnonzero(tile_img)
+    first = nonzero[np.unique(tile_img.ravel()[nonzero],
+                              return_index=True)[1]]
+    first_y, first_x = np.divmod(first, tile_img.shape[1])
+    first_pixels = ((first_y + yslc.start) * segment_img.shape[1]
+                    + first_x + xslc.start)
+
+    bboxes = np.array([(slc[0].start, slc[0].stop, slc[1].start,
+                        slc[1].stop) for slc in find_objects(tile_img)]).T
+    bboxes[0:2] += yslc.start
+    bboxes[2:4] += xslc.start
+
+    return nlabels, areas, first_pixels, bboxes
+
+
+def _union_find(nodes_a, nodes_b, nnodes):
+    """
+    Find the connected components of a graph with a vectorized
+    union-find.
+
+    Parameters
+    ----------
+    nodes_a, nodes_b : 1D int `~numpy.ndarray`
+        The node indices of the graph edges.
+
+    nnodes : int
+        The number of nodes.
+
+    Returns
+    -------
+    roots : 1D int `~numpy.ndarray`
+        The root node of each node, which is the smallest node index in
+        its connected component.
+    """
+    roots = np.arange(nnodes)
+    while True:
+        # path compression (pointer jumping)
+        while True:
+            parents = roots[roots]
+            if np.array_equal(parents, roots):
+                break
+            roots = parents
+
+        roots_a = roots[nodes_a]
+        roots_b = roots[nodes_b]
+        diff = roots_a != roots_b
+        if not np.any(diff):
+            return roots
+
+        # union: link the larger root to the smallest linked root
+        roots_a = roots_a[diff]
+        roots_b = roots_b[diff]
+        np.minimum.at(roots, np.maximum(roots_a, roots_b),
+                      np.minimum(roots_a, roots_b))
+
+
+def _detect_sources_tiled(data, threshold, npixels, footprint, mask,
+                          tile_shape, nproc, output_file):
+    """
+    Detect sources above a specified threshold value in an image using
+    tiles.
+
+    The pixels above the threshold are labeled in each tile
+    independently (in parallel using ``nproc`` threads). The tile labels
+    that are connected across the tile seams are then merged using a
+    union-find, and the ``npixels`` cut is applied to the merged
+    sources. Finally, the sources are relabeled tile by tile with
+    consecutive numbers in raster order (of their first pixel), giving
+    the same segmentation image as `_detect_sources`.
+
+    Parameters
+    ----------
+    data, threshold, npixels, footprint
+        See `_detect_sources`.
+
+    mask : 2D bool `~numpy.ndarray` or `None`
+        A boolean mask, with the same shape as the input ``data``, where
+        `True` values indicate masked pixels.
+
+    tile_shape : (2,) int `~numpy.ndarray`
+        The ``(ny, nx)`` shape of the tiles.
+
+    nproc : int
+        The number of threads.
+
+    output_file : str, `~pathlib.Path`, or `None`
+        The filename of the output ``.npy`` memmap file. If `None`, the
+        segmentation image is kept in memory.
+
+    Returns
+    -------
+    segment_image : `~photutils.segmentation.SegmentationImage` or `None`
+        A 2D segmentation image. If no sources are found then `None` is
+        returned.
+    """
+    shape = data.shape
+    yedges = [*range(0, shape[0], tile_shape[0]), shape[0]]
+    xedges = [*range(0, shape[1], tile_shape[1]), shape[1]]
+    tiles = [(slice(y0, y1), slice(x0, x1))
+             for y0, y1 in pairwise(yedges) for x0, x1 in pairwise(xedges)]
+    ntiles = (len(yedges) - 1, len(xedges) - 1)
+
+    # ndimage.label returns an array with dtype = np.int32 unless the
+    # input array has more than 2**31 - 1 pixels
+    dtype = np.int32 if data.size < 2**31 else np.int64
+    if output_file is None:
+        segment_img = np.zeros(shape, dtype=dtype)
+    else:
+        segment_img = np.lib.format.open_memmap(output_file, mode='w+',
+                                                dtype=dtype, shape=shape)
+
+    def label_tile(tile_slc):
+        return _label_tile(data, threshold, mask, footprint, segment_img,
+                           tile_slc)
+
+    if nproc > 1:
+        with ThreadPoolExecutor(max_workers=nproc) as executor:
+            tile_results = list(executor.map(label_tile, tiles))
+    else:
+        tile_results = [label_tile(tile_slc) for tile_slc in tiles]
+
+    # the provisional (global) label of each tile label is offset by
+    # the number of labels in the previous tiles; the provisional
+    # label 0 is the background
+    nlabels, areas, first_pixels, bboxes = zip(*tile_results, strict=True)
+    offsets = np.cumsum((0, *nlabels))
+    nprov = offsets[-1] + 1
+    areas = np.concatenate(((0,), *areas))
+    first_pixels = np.concatenate(((0,), *first_pixels))
+    bboxes = np.concatenate((np.zeros((4, 1), dtype=int), *bboxes), axis=1)
+    offsets = offsets[:-1].reshape(ntiles)
+
+    def seam_labels(index, axis, tile_index):
+        # the provisional labels along a full image row (axis=0) or
+        # column (axis=1) within the tile row/column tile_index
+        if axis == 0:
+            labels = np.array(segment_img[index], dtype=np.int64)
+            edges = xedges
+            tile_offsets = offsets[tile_index]
+        else:
+            labels = np.array(segment_img[:, index], dtype=np.int64)
+            edges = yedges
+            tile_offsets = offsets[:, tile_index]
+        for (idx0, idx1), offset in zip(pairwise(edges), tile_offsets,
+                                        strict=True):
+            seam = labels[idx0:idx1]
+            seam[seam > 0] += offset
+        return labels
+
+    # find the pairs of provisional labels that are connected across the
+    # tile seams
+    diagonal = bool(footprint[0, 0])
+    nodes_a = []
+    nodes_b = []
+    for axis, edges in ((0, yedges), (1, xedges)):
+        for tile_index, edge in enumerate(edges[1:-1], start=1):
+            labels0 = seam_labels(edge - 1, axis, tile_index - 1)
+            labels1 = seam_labels(edge, axis, tile_index)
+            pairs = [(labels0, labels1)]
+            if diagonal:
+                pairs.extend([(labels0[:-1], labels1[1:]),
+                              (labels0[1:], labels1[:-1])])
+            for pair0, pair1 in pairs:
+                connected = (pair0 > 0) & (pair1 > 0)
+                nodes_a.append(pair0[connected])
+                nodes_b.append(pair1[connected])
+
+    # merge the connected provisional labels; the union-find is
+    # performed only on the provisional labels along the seams
+    roots = np.arange(nprov)
+    if nodes_a:
+        nodes_a = np.concatenate(nodes_a)
+        nodes_b = np.concatenate(nodes_b)
+        nodes, indices = np.unique(np.concatenate((nodes_a, nodes_b)),
+                                   return_inverse=True)
+        seam_roots = _union_find(indices[:nodes_a.size],
+                                 indices[nodes_a.size:], nodes.size)
+        roots[nodes] = nodes[seam_roots]
+
+    # combine the source properties of the merged labels
+    merged = np.flatnonzero(roots != np.arange(nprov))
+    merged_roots = roots[merged]
+    np.add.at(areas, merged_roots, areas[merged])
+    np.minimum.at(first_pixels, merged_roots, first_pixels[merged])
+    for idx, ufunc in enumerate((np.minimum, np.maximum) * 2):
+        ufunc.at(bboxes[idx], merged_roots, bboxes[idx][merged])
+
+    # remove the sources with less than npixels (after merging) and
+    # assign consecutive labels in raster order of their first pixel
+    keep = (roots == np.arange(nprov)) & (areas >= npixels)
+    keep[0] = False  # background
+    keep = np.flatnonzero(keep)
+    if keep.size == 0:
+        return None
+    keep = keep[np.argsort(first_pixels[keep])]
+    label_map = np.zeros(nprov, dtype=dtype)
+    label_map[keep] = np.arange(1, keep.size + 1, dtype=dtype)
+    label_map = label_map[roots]
+
+    def relabel_tile(tile_idx):
+        tile_slc = tiles[tile_idx]
+        offset = offsets.flat[tile_idx]
+        lookup = label_map[offset:offset + nlabels[tile_idx] + 1].copy()
+        lookup[0] = 0
+        segment_img[tile_slc] = lookup[segment_img[tile_slc]]
+
+    tile_indices = [idx for idx, nlabel in enumerate(nlabels) if nlabel > 0]
+    if nproc > 1:
+        with ThreadPoolExecutor(max_workers=nproc) as executor:
+            list(executor.map(relabel_tile, tile_indices))
+    else:
+        for tile_idx in tile_indices:
+            relabel_tile(tile_idx)
+
+    if isinstance(segment_img, np.memmap):
+        segment_img.flush()
+
+    bboxes = bboxes[:, keep]
+    segm = object.__new__(SegmentationImage)
+    segm._data = segment_img
+    segm.__dict__['labels'] = np.arange(1, keep.size + 1, dtype=dtype)
+    segm.__dict__['slices'] = [(slice(y0, y1), slice(x0, x1))
+                               for y0, y1, x0, x1 in bboxes.T]
+    segm.__dict__['areas'] = areas[keep]
+
+    return segm
@@ -88,12 +88,36 @@ class SourceFinder:
         The number of processes to use for source deblending. If set to
         1, then a serial implementation is used instead of a parallel
         one. If `None`, then the number of processes will be set to the
-        number of CPUs detected on the machine. Please note that due to
-        overheads, multiprocessing may be slower than serial processing
-        if only a small number of sources are to be deblended. The
-        benefits of multiprocessing require ~1000 or more sources to
-        deblend, with larger gains as the number of sources increase.
-        This keyword is ignored unless ``deblend=True``.
+        number of CPUs detected on the machine. The worker processes are
+        reused across calls with the same ``nproc``, so the process
+        startup cost is paid only once when processing a stream of
+        images. Please note that due to overheads, multiprocessing may
+        be slower than serial processing if only a small number of
+        sources are to be deblended. This keyword is ignored unless
+        ``deblend=True``.
+
+    backend : {'processes', 'threads'}, optional
+        The parallel backend used for source deblending if ``nproc``
+        is larger than 1. If ``'processes'`` (default), then
+        multiprocessing is used. If ``'threads'``, then a pool of
+        ``nproc`` threads is used, which avoids the process startup and
+        data transfer costs. See `~photutils.segmentation.deblend_sources`
+        for more details. This keyword is ignored unless
+        ``deblend=True``.
+
+    tile_shape : int or tuple of 2 int, optional
+        The ``(ny, nx)`` shape of the tiles used to detect sources in
+        tiles, with the tile labels merged across the tile seams. If
+        `None` (default), the sources are detected in the full image at
+        once (or in a single tile if ``output_file`` is input). See
+        `~photutils.segmentation.detect_sources` for more details.
+
+    tile_nproc : int, optional
+        The number of threads used to label the tiles in parallel. If
+        `None`, then the number of threads will be set to the number of
+        CPUs detected on the machine. This keyword is ignored unless
+        ``tile_shape`` is input or ``output_file`` is input when the
+        instance is called.
 
     progress_bar : bool, optional
         Whether to display a progress bar. If ``nproc = 1``, then the
@@ -153,6 +177,7 @@ class SourceFinder:
 
     def __init__(self, npixels, *, connectivity=8, deblend=True, nlevels=32,
                  contrast=0.001, mode='exponential', relabel=True, nproc=1,
+                 backend='processes', tile_shape=None, tile_nproc=1,
                  progress_bar=True):
         self.npixels = as_pair('npixels', npixels, check_odd=False)
         self.deblend = deblend
@@ -162,14 +187,18 @@ class SourceFinder:
         self.mode = mode
         self.relabel = relabel
         self.nproc = nproc
+        self.backend = backend
+        self.tile_shape = tile_shape
+        self.tile_nproc = tile_nproc
         self.progress_bar = progress_bar
 
     def __repr__(self):
         params = ('npixels', 'deblend', 'connectivity', 'nlevels', 'contrast',
-                  'mode', 'relabel', 'nproc', 'progress_bar')
+                  'mode', 'relabel', 'nproc', 'backend', 'tile_shape',
+                  'tile_nproc', 'progress_bar')
         return make_repr(self, params)
 
-    def __call__(self, data, threshold, mask=None):
+    def __call__(self, data, threshold, mask=None, output_file=None):
         """
         Detect sources, including deblending, in an image using
         segmentation.
@@ -193,21 +222,36 @@ class SourceFinder:
             `True` value indicates the corresponding element of ``data``
             is masked. Masked pixels will not be included in any source.
 
+        output_file : str, `~pathlib.Path`, or `None`, optional
+            The filename of a ``.npy`` file to which the segmentation
+            image is written as a `~numpy.memmap` array. If `None`
+            (default), the segmentation image is kept in memory. Please
+            note that source deblending is performed in memory, i.e.,
+            the deblended segmentation image is computed in memory and
+            then written to ``output_file``. See
+            `~photutils.segmentation.detect_sources` for more details.
+
         Returns
         -------
         segment_image : `~photutils.segmentation.SegmentationImage` or `None`
             A 2D segmentation image, with the same shape as the input data,
             where sources are marked by different positive integer values. A
             value of zero is reserved for the background. If no sources are
-            found then `None` is returned.
+            found then `None` is returned. If ``output_file`` is input,
+            then the segmentation image data is a `~numpy.memmap` array.
         """
         segment_img = detect_sources(data, threshold, self.npixels[0],
-                                     mask=mask, connectivity=self.connectivity)
+                                     mask=mask, connectivity=self.connectivity,
+                                     tile_shape=self.tile_shape,
+                                     nproc=self.tile_nproc,
+                                     output_file=output_file)
         if segment_img is None:
             return None
 
         # source deblending requires scikit-image
         if self.deblend:
+            # the output_file memmap array (if any)
+            segment_memmap = segment_img.data
             segment_img = deblend_sources(data, segment_img, self.npixels[1],
                                           nlevels=self.nlevels,
                                           contrast=self.contrast,
@@ -215,6 +259,15 @@ class SourceFinder:
                                           connectivity=self.connectivity,
                                           relabel=self.relabel,
                                           nproc=self.nproc,
+                                          backend=self.backend,
                                           progress_bar=self.progress_bar)
 
+            if output_file is not None:
+                # write the deblended segmentation image to the output
+                # file (the deblended labels have the same dtype as the
+                # detected labels)
+                segment_memmap[...] = segment_img.data
+                segment_memmap.flush()
+                segment_img._data = segment_memmap
+
         return segment_img
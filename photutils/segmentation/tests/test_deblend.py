@@ -11,8 +11,11 @@ from numpy.testing import assert_allclose, assert_equal
 
 from photutils.segmentation import (SegmentationImage, deblend_sources,
                                     detect_sources)
-from photutils.segmentation.deblend import (_DeblendParams,
+from photutils.segmentation.deblend import (_deblend_sources_multiprocess,
+                                            _DeblendParams, _make_chunks,
+                                            _process_pool,
                                             _SingleSourceDeblender)
+from photutils.segmentation.utils import _make_binary_structure
 from photutils.utils._optional_deps import HAS_SKIMAGE
 
 
@@ -45,6 +48,13 @@ class TestDeblendSources:
             assert_equal(result.data, result2.data)
             assert result2.data.dtype == self.segm.data.dtype
 
+            # test multithreading
+            result3 = deblend_sources(self.data, self.segm, self.npixels,
+                                      mode=mode, progress_bar=False, nproc=2,
+                                      backend='threads')
+            assert_equal(result.data, result3.data)
+            assert result3.data.dtype == self.segm.data.dtype
+
         assert result.nlabels == 2
         assert result.nlabels == len(result.slices)
         mask1 = (result.data == 1)
@@ -71,6 +81,46 @@ class TestDeblendSources:
         assert result.areas[0] == result.areas[4]
         assert result.areas[0] == result.areas[5]
 
+        # test multiprocessing with several sources per chunk and the
+        # reuse of the worker processes across calls
+        result2 = deblend_sources(data, segm, self.npixels,
+                                  progress_bar=False, nproc=2)
+        assert_equal(result2.data, result.data)
+        executor = _process_pool.executor
+        result3 = deblend_sources(data, segm, self.npixels,
+                                  progress_bar=False, nproc=2)
+        assert_equal(result3.data, result.data)
+        assert _process_pool.executor is executor
+
+        result4 = deblend_sources(data, segm, self.npixels,
+                                  progress_bar=False, nproc=3,
+                                  backend='threads')
+        assert_equal(result4.data, result.data)
+
+    def test_deblend_multiprocess_error(self):
+        g4 = Gaussian2D(100, 50, 15, 5, 5)
+        g5 = Gaussian2D(100, 50, 85, 5, 5)
+        data = self.data + g4(self.x, self.y) + g5(self.x, self.y)
+        segm = detect_sources(data, self.threshold, self.npixels)
+        labels = segm.labels
+        slices = segm.slices
+        areas = segm.areas
+
+        # an invalid nlevels makes the deblending of every chunk fail
+        footprint = _make_binary_structure(2, 8)
+        deblend_params = _DeblendParams(self.npixels, footprint, None,
+                                        0.001, 'exponential')
+        with pytest.raises(TypeError):
+            _deblend_sources_multiprocess(data, segm.data, labels, slices,
+                                          areas, deblend_params, 2, False)
+
+        # the reused process pool still works after the failure
+        result = deblend_sources(data, segm, self.npixels,
+                                 progress_bar=False)
+        result2 = deblend_sources(data, segm, self.npixels,
+                                  progress_bar=False, nproc=2)
+        assert_equal(result2.data, result.data)
+
     def test_deblend_multiple_sources_with_neighbor(self):
         g1 = Gaussian2D(100, 50, 50, 20, 5, theta=45)
         g2 = Gaussian2D(100, 35, 50, 5, 5)
@@ -235,6 +285,12 @@ class TestDeblendSources:
             deblend_sources(self.data, self.segm, self.npixels,
                             mode='invalid', progress_bar=False)
 
+    def test_invalid_backend(self):
+        match = 'backend must be "processes" or "threads"'
+        with pytest.raises(ValueError, match=match):
+            deblend_sources(self.data, self.segm, self.npixels,
+                            backend='invalid', progress_bar=False)
+
     def test_invalid_connectivity(self):
         match = 'Invalid connectivity'
         with pytest.raises(ValueError, match=match):
@@ -355,6 +411,35 @@ class TestDeblendSources:
         markers = single_debl.make_markers(return_all=True)
         assert len(markers) == 19
 
+    @pytest.mark.parametrize('mode', ['exponential', 'linear', 'sinh'])
+    @pytest.mark.parametrize('connectivity', [4, 8])
+    def test_make_markers_maxtree(self, mode, connectivity):
+        """
+        Test that the max-tree markers are identical to the markers
+        computed by labeling the source at each threshold level.
+        """
+        rng = np.random.default_rng(0)
+        data = self.data3 + rng.normal(0.0, 2.0, self.data3.shape)
+        data[45, 45] = np.nan
+        segm = detect_sources(data, self.threshold, self.npixels,
+                              connectivity=connectivity)
+        footprint = _make_binary_structure(2, connectivity)
+
+        for npixels in (1, 5, 20):
+            deblend_params = _DeblendParams(npixels, footprint, 32, 0.001,
+                                            mode)
+            for label in segm.labels:
+                slc = segm.slices[segm.get_index(label)]
+                single_debl = _SingleSourceDeblender(data[slc],
+                                                     segm.data[slc], label,
+                                                     deblend_params)
+                markers = single_debl.make_markers_maxtree()
+                all_markers = single_debl.make_markers(return_all=True)
+                if all_markers[-1] is None:
+                    assert markers is None
+                else:
+                    assert_equal(markers, all_markers[-1])
+
 
 @pytest.mark.skipif(not HAS_SKIMAGE, reason='skimage is required')
 def test_nmarkers_fallback():
@@ -381,3 +466,19 @@ def test_nmarkers_fallback():
         assert segm2.info['warnings']['nmarkers']['input_labels'][0] == 1
         mesg = segm2.info['warnings']['nmarkers']['message']
         assert mesg.startswith('Deblending mode changed')
+
+
+def test_make_chunks():
+    areas = np.array([50, 10, 40, 30, 20, 5, 45])
+    chunks = _make_chunks(areas, 3)
+    assert len(chunks) == 3
+    assert_equal(np.sort(np.concatenate(chunks)), np.arange(len(areas)))
+    loads = [areas[chunk].sum() for chunk in chunks]
+    assert loads == sorted(loads, reverse=True)
+    assert max(loads) - min(loads) <= areas.min()
+    for chunk in chunks:
+        assert_equal(chunk, np.sort(chunk))
+
+    # fewer sources than chunks
+    chunks = _make_chunks(areas[:2], 5)
+    assert len(chunks) == 2
@@ -9,8 +9,10 @@ import pytest
 from astropy.stats import SigmaClip
 from numpy.testing import assert_allclose, assert_equal
 
-from photutils.segmentation.detect import detect_sources, detect_threshold
-from photutils.segmentation.utils import make_2dgaussian_kernel
+from photutils.segmentation.detect import (_detect_sources, detect_sources,
+                                           detect_threshold)
+from photutils.segmentation.utils import (_make_binary_structure,
+                                          make_2dgaussian_kernel)
 from photutils.utils.exceptions import NoDetectionsWarning
 
 DATA = np.array([[0, 1, 0], [0, 2, 0], [0, 0, 0]]).astype(float)
@@ -212,6 +214,34 @@ class TestDetectSources:
         with pytest.warns(NoDetectionsWarning, match=match):
             detect_sources(data, 0, npixels=14)
 
+    def test_relabel(self):
+        """
+        Test the removal of small sources with and without relabeling.
+        """
+        data = np.zeros((9, 9))
+        data[0, 0] = 1  # label 1 (removed)
+        data[0, 3:6] = 1  # label 2
+        data[3, 0] = 1  # label 3 (removed)
+        data[4:7, 4:6] = 1  # label 4
+        footprint = _make_binary_structure(2, 8)
+
+        segm = _detect_sources(data, 0, 2, footprint, None)
+        assert_equal(segm.labels, [1, 2])
+        assert segm.labels.dtype == segm.data.dtype
+        assert_equal(segm.areas, [3, 6])
+        assert segm.slices == [np.s_[0:1, 3:6], np.s_[4:7, 4:6]]
+
+        segm = _detect_sources(data, 0, 2, footprint, None, relabel=False)
+        assert_equal(segm.labels, [2, 4])
+        assert_equal(np.unique(segm.data), [0, 2, 4])
+        assert segm.slices == [np.s_[0:1, 3:6], np.s_[4:7, 4:6]]
+
+        segm = _detect_sources(data, 0, 2, footprint, None, relabel=False,
+                               return_segmimg=False)
+        assert_equal(np.unique(segm), [0, 2, 4])
+        assert _detect_sources(data, 0, 4, footprint, None,
+                               return_segmimg=False) is None
+
     def test_zerothresh(self):
         """
         Test detection with zero threshold.
@@ -287,3 +317,62 @@ class TestDetectSources:
         match = 'mask must have the same shape as the input image'
         with pytest.raises(ValueError, match=match):
             detect_sources(self.data, 1.0, 1.0, mask=np.ones((5, 5)))
+
+    @pytest.mark.parametrize('connectivity', [4, 8])
+    @pytest.mark.parametrize('tile_shape', [1, 7, (13, 5), (40, 100)])
+    @pytest.mark.parametrize('nproc', [1, 2])
+    def test_tiled(self, connectivity, tile_shape, nproc):
+        """
+        Test that the tiled segmentation image is identical to the
+        non-tiled segmentation image.
+        """
+        rng = np.random.default_rng(0)
+        data = rng.normal(0.0, 1.0, (45, 61))
+        data[20:25, 10:50] = 5.0  # source crossing many tile seams
+        data[30, 30] = np.nan
+        threshold = np.full(data.shape, 0.8)
+        threshold[:, 40:] = 1.2
+        mask = np.zeros(data.shape, dtype=bool)
+        mask[5:9, 5:30] = True
+
+        for npixels in (1, 3, 10):
+            segm1 = detect_sources(data, threshold, npixels,
+                                   connectivity=connectivity, mask=mask)
+            segm2 = detect_sources(data, threshold, npixels,
+                                   connectivity=connectivity, mask=mask,
+                                   tile_shape=tile_shape, nproc=nproc)
+            assert_equal(segm2.data, segm1.data)
+            assert segm2.data.dtype == segm1.data.dtype
+            assert_equal(segm2.labels, segm1.labels)
+            assert segm2.labels.dtype == segm1.labels.dtype
+            assert segm2.slices == segm1.slices
+            assert_equal(segm2.areas, segm1.areas)
+
+    def test_tiled_output_file(self, tmp_path):
+        data = np.zeros((30, 30))
+        data[2:28, 14:16] = 5.0
+        data[3:5, 3:5] = 5.0
+        filename = tmp_path / 'segm.npy'
+        segm1 = detect_sources(data, 1.0, 10)
+        segm2 = detect_sources(data, 1.0, 10, tile_shape=8,
+                               output_file=filename)
+        assert isinstance(segm2.data, np.memmap)
+        assert segm2.nlabels == 1
+        assert_equal(segm2.data, segm1.data)
+        assert_equal(np.load(filename, mmap_mode='r'), segm1.data)
+
+        # single tile
+        segm3 = detect_sources(data, 1.0, 10,
+                               output_file=tmp_path / 'segm3.npy')
+        assert_equal(segm3.data, segm1.data)
+
+        # small sources are removed after merging across tiles
+        match = 'No sources were found'
+        with pytest.warns(NoDetectionsWarning, match=match):
+            segm = detect_sources(data, 1.0, 53, tile_shape=8)
+            assert segm is None
+
+    def test_tiled_invalid_tile_shape(self):
+        match = 'tile_shape must be > 0'
+        with pytest.raises(ValueError, match=match):
+            detect_sources(self.data, 1.0, 1.0, tile_shape=0)
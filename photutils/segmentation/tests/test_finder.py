@@ -33,6 +33,11 @@ class TestSourceFinder:
         assert segm2.nlabels == 94
         assert np.all(segm1.data == segm2.data)
 
+        finder = SourceFinder(npixels=self.npixels, nproc=2,
+                              backend='threads', progress_bar=False)
+        segm3 = finder(self.convolved_data, self.threshold)
+        assert np.all(segm1.data == segm3.data)
+
     def test_invalid_units(self):
         finder = SourceFinder(npixels=self.npixels, progress_bar=False)
         match = 'must all have the same units'
@@ -74,6 +79,29 @@ class TestSourceFinder:
         segm2 = sf2(data, threshold=0.1)
         assert segm2.nlabels == 3
 
+    def test_tile_shape(self):
+        finder = SourceFinder(npixels=self.npixels, deblend=False,
+                              progress_bar=False)
+        segm1 = finder(self.convolved_data, self.threshold)
+        finder = SourceFinder(npixels=self.npixels, deblend=False,
+                              tile_shape=(50, 70), tile_nproc=2,
+                              progress_bar=False)
+        segm2 = finder(self.convolved_data, self.threshold)
+        assert np.all(segm1.data == segm2.data)
+
+    @pytest.mark.skipif(not HAS_SKIMAGE, reason='skimage is required')
+    def test_output_file(self, tmp_path):
+        finder = SourceFinder(npixels=self.npixels, progress_bar=False)
+        segm1 = finder(self.convolved_data, self.threshold)
+
+        filename = tmp_path / 'segm.npy'
+        segm2 = finder(self.convolved_data, self.threshold,
+                       output_file=filename)
+        assert isinstance(segm2.data, np.memmap)
+        assert np.all(segm2.data == segm1.data)
+        assert segm2.nlabels == segm1.nlabels
+        assert np.all(np.load(filename) == segm1.data)
+
     def test_repr(self):
         finder = SourceFinder(npixels=self.npixels, deblend=False,
                               progress_bar=False)